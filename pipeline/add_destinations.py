@@ -16,12 +16,13 @@ URL hash navigation (in browser PDF viewer):
 """
 
 import argparse
-import json
 import re
 import sys
 import pdfplumber
 import pymupdf as fitz
 
+from node_store import open_nodes
+
 NODES_PATH = "runs/1/nodes.json"
 
 # ---------------------------------------------------------------------------
@@ -155,14 +156,12 @@ def main():
     parser.add_argument("--nodes", default=NODES_PATH)
     args = parser.parse_args()
 
-    with open(args.nodes) as f:
-        nodes = json.load(f)
-
-    # Filter out false-positive rule_codes (scraper state-machine artifacts)
-    # before creating destinations, exactly as build_groups does in main.py.
-    valid_node_indexes = _filter_sequential_rule_codes(nodes)
-    rule_nodes = [n for n in nodes if n.get("rule_code") and n["node_index"] in valid_node_indexes]
-    print(f"Found {len(rule_nodes)} rule nodes ({len([n for n in nodes if n.get('rule_code')]) - len(rule_nodes)} false positives filtered)")
+    with open_nodes(args.nodes) as nodes:
+        # Filter out false-positive rule_codes (scraper state-machine artifacts)
+        # before creating destinations, exactly as build_groups does in main.py.
+        valid_node_indexes = _filter_sequential_rule_codes(nodes)
+        rule_nodes = [n for n in nodes if n.get("rule_code") and n["node_index"] in valid_node_indexes]
+        print(f"Found {len(rule_nodes)} rule nodes ({len([n for n in nodes if n.get('rule_code')]) - len(rule_nodes)} false positives filtered)")
 
     # Sort by (page, node_index) to process in document order so that the
     # min_top disambiguation works correctly for same-page duplicate text snippets.
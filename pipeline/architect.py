@@ -8,9 +8,12 @@ Usage:
     python architect.py runs/1 --process cdd-individuals          # Single process
     python architect.py runs/1 --dry-run                          # Print prompts only
     python architect.py runs/1 --model claude-sonnet-4-5-20250929 # Override model
+    python architect.py runs/1 --concurrency 4                    # 4 process forms in flight
+    python architect.py runs/1 --batch --review                   # Message Batches (resumable)
 """
 
 import argparse
+import hashlib
 import json
 import logging
 import os
@@ -18,11 +21,19 @@ import re
 import sys
 import time
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 import anthropic
+import httpx
 from dotenv import load_dotenv
 
+from llm_client import (
+    CachedClient, ResponseCache, TokenBucket, cached_system, format_usage, run_message_batch,
+)
+from model_router import ROUTE_OBJECTIVES, ModelRouter, ModelStats
+from replay import RecordingTransport, ReplayTransport
+
 load_dotenv()
 
 logging.basicConfig(
@@ -642,6 +653,27 @@ def apply_feedback_overrides(result: dict, feedback: dict) -> dict:
     return result
 
 
+def load_enriched_groups(path: str) -> list[dict]:
+    """Load groups_enriched.json, expanding the compact node-table form.
+
+    ``main.py enrich --compact`` writes ``{"nodes": [...], "groups": [...]}``
+    with a ``node_range`` per group; the expanded groups share node dicts.
+    """
+    with open(path) as f:
+        data = json.load(f)
+    if isinstance(data, list):
+        return data
+
+    nodes = data["nodes"]
+    groups = []
+    for g in data["groups"]:
+        start, end = g["node_range"]
+        group = {k: v for k, v in g.items() if k != "node_range"}
+        group["text_nodes"] = nodes[start:end]
+        groups.append(group)
+    return groups
+
+
 def load_toc_classification(run_dir: str) -> dict[str, list[str]]:
     """Load toc_classified.json and return the process_to_sections mapping.
 
@@ -674,8 +706,122 @@ def gather_process_nodes(process_id: str, groups: list[dict], toc_classification
     return all_nodes
 
 
-def build_process_user_message(process_id: str, form_def: dict, text_nodes: list[dict], feedback: dict | None = None) -> str:
-    """Build the user message for a process-mode LLM call."""
+# ---------------------------------------------------------------------------
+# Token budgeting — split oversized processes into chunks by ToC section
+# ---------------------------------------------------------------------------
+
+CHARS_PER_TOKEN = 4  # rough average for English regulatory text
+CHUNK_INPUT_TOKENS = 6000  # regulatory text per call; beyond this a process is chunked
+CHUNK_WORKERS = 4  # chunks of one process architected in parallel
+RULE_UNIT_REGEX = re.compile(r"^\d+(\.\d+)+$")  # a rule ("10.3.4"), not a paragraph ("10.3.4(1)")
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap offline token estimate (no API round-trip)."""
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def estimate_node_tokens(text_nodes: list[dict]) -> int:
+    """Estimated tokens of the regulatory-text block build_process_user_message renders."""
+    return sum(estimate_tokens(f"  [{tn['rule_code']}] {tn['text']}\n") for tn in text_nodes)
+
+
+def _split_before(text_nodes: list[dict], starts_unit) -> list[list[dict]]:
+    """Split nodes before each node where starts_unit(node) holds."""
+    units: list[list[dict]] = []
+    for tn in text_nodes:
+        if not units or starts_unit(tn):
+            units.append([])
+        units[-1].append(tn)
+    return units
+
+
+def _split_section(section_nodes: list[dict], max_tokens: int) -> list[list[dict]]:
+    """Pieces of an oversized section: whole rules (with their paragraphs and notes)
+    where they fit, otherwise the rule's individual coded paragraphs."""
+    pieces: list[list[dict]] = []
+    for unit in _split_before(section_nodes, lambda tn: RULE_UNIT_REGEX.match(tn.get("rule_code") or "")):
+        if estimate_node_tokens(unit) <= max_tokens:
+            pieces.append(unit)
+        else:
+            pieces.extend(_split_before(unit, lambda tn: bool(tn.get("rule_code"))))
+    return pieces
+
+
+def _pack(pieces: list[list[dict]], max_tokens: int) -> list[list[dict]]:
+    """Greedily concatenate consecutive pieces into chunks of at most max_tokens."""
+    chunks: list[list[dict]] = []
+    size = 0
+    for piece in pieces:
+        piece_tokens = estimate_node_tokens(piece)
+        if not chunks or size + piece_tokens > max_tokens:
+            chunks.append([])
+            size = 0
+        chunks[-1].extend(piece)
+        size += piece_tokens
+    return chunks
+
+
+def chunk_process_nodes(process_id: str, groups: list[dict], toc_classification: dict[str, list[str]],
+                        max_tokens: int | None = CHUNK_INPUT_TOKENS) -> list[list[dict]]:
+    """Split a process's text nodes into chunks of roughly max_tokens each.
+
+    Whole ToC sections are packed in order; a section bigger than the budget
+    is split between rules (or, failing that, between coded paragraphs).
+    Concatenated, the chunks are exactly
+    gather_process_nodes(); a falsy max_tokens disables chunking.
+    """
+    text_nodes = gather_process_nodes(process_id, groups, toc_classification)
+    if not text_nodes or not max_tokens or estimate_node_tokens(text_nodes) <= max_tokens:
+        return [text_nodes] if text_nodes else []
+
+    group_map = {g["id"]: g for g in groups}
+    pieces: list[list[dict]] = []
+    for code in toc_classification.get(process_id, []):
+        if code not in group_map:
+            continue
+        section_nodes = group_map[code].get("text_nodes", [])
+        if estimate_node_tokens(section_nodes) <= max_tokens:
+            pieces.append(section_nodes)
+        else:
+            pieces.extend(_pack(_split_section(section_nodes, max_tokens), max_tokens))
+    return _pack([p for p in pieces if p], max_tokens)
+
+
+def merge_chunk_results(results: list[dict]) -> dict:
+    """Merge per-chunk SectionData, de-duplicating group slugs, control ids and rules.
+
+    The first occurrence of a group or control wins; a control produced by
+    several chunks keeps the union of their source-rules.
+    """
+    merged: dict[str, list] = {"controls": [], "groups": [], "rules": []}
+    group_ids: set[str] = set()
+    controls: dict[str, dict] = {}
+    rule_keys: set[str] = set()
+    for result in results:
+        for group in result.get("groups", []):
+            if group["id"] not in group_ids:
+                group_ids.add(group["id"])
+                merged["groups"].append(group)
+        for ctrl in result.get("controls", []):
+            existing = controls.get(ctrl["id"])
+            if existing is None:
+                controls[ctrl["id"]] = ctrl
+                merged["controls"].append(ctrl)
+                continue
+            sources = existing.setdefault("source-rules", [])
+            sources.extend(r for r in ctrl.get("source-rules", []) if r not in sources)
+        for rule in result.get("rules", []):
+            key = json.dumps(rule, sort_keys=True)
+            if key not in rule_keys:
+                rule_keys.add(key)
+                merged["rules"].append(rule)
+    return merged
+
+
+def build_process_user_message(process_id: str, form_def: dict, text_nodes: list[dict], feedback: dict | None = None,
+                               part: tuple[int, int] | None = None) -> str:
+    """Build the user message for a process-mode LLM call (*part* = (k, n) for chunk k of n)."""
     # Format text nodes
     nodes_text = ""
     for tn in text_nodes:
@@ -745,9 +891,18 @@ The following sub-processes are handled via links to separate forms. Do NOT gene
     if feedback:
         feedback_section = build_feedback_prompt_section(feedback)
 
+    # Chunked processes: each call sees only its slice of the regulatory text
+    part_section = ""
+    if part:
+        k, n = part
+        part_section = f"""
+## Partial Input (part {k} of {n})
+This form's regulatory text is too large for one call, so it has been split into {n} parts that are generated separately and merged. Produce controls only for the rules in this part, and use the group slugs you would use for the whole form so the parts merge cleanly.
+"""
+
     return f"""## Process Form: {form_def['title']}
 Process ID: {process_id}
-{gating_section}{sub_types_section}{subprocess_section}{form_links_section}{notes_section}{feedback_section}
+{gating_section}{sub_types_section}{subprocess_section}{form_links_section}{notes_section}{feedback_section}{part_section}
 ## Regulatory Text ({len(text_nodes)} text nodes)
 {nodes_text}
 Analyse the regulatory text above and produce the controls, groups, and rules for the "{form_def['title']}" process form. Remember:
@@ -841,36 +996,34 @@ def log_coverage_report(report: dict):
             logger.warning(f"    {lc['id']} (conf={lc['confidence']}): {lc['label']}")
 
 
-def call_process_architect(
-    client: anthropic.Anthropic,
+def build_process_request(
     process_id: str,
     form_def: dict,
     text_nodes: list[dict],
     model: str,
-    dry_run: bool = False,
     feedback: dict | None = None,
-) -> dict | None:
-    """Call the LLM for a process form and return parsed SectionData."""
-    user_msg = build_process_user_message(process_id, form_def, text_nodes, feedback)
+    part: tuple[int, int] | None = None,
+) -> dict:
+    """messages.create parameters for one process form (or one chunk of it)."""
+    user_msg = build_process_user_message(process_id, form_def, text_nodes, feedback, part)
+    # Static prefix (OUTPUT_TOOL + PROCESS_SYSTEM_PROMPT) is prompt-cached;
+    # only the user message differs between process forms.
+    return {
+        "model": model,
+        "max_tokens": 16000,
+        "system": cached_system(PROCESS_SYSTEM_PROMPT),
+        "messages": [{"role": "user", "content": user_msg}],
+        "tools": [OUTPUT_TOOL],
+        "tool_choice": {"type": "tool", "name": "output_section_data"},
+    }
 
-    if dry_run:
-        print(f"\n{'='*60}")
-        print(f"DRY RUN — Process: {process_id} | Model: {model}")
-        print(f"{'='*60}")
-        print(f"SYSTEM PROMPT: ({len(PROCESS_SYSTEM_PROMPT)} chars)")
-        print(f"USER MESSAGE:\n{user_msg}")
-        return None
 
-    logger.info(f"Calling API for process {process_id} with model {model}...")
+def parse_process_response(process_id: str, response, calls: list[dict] | None = None) -> dict | None:
+    """Extract, validate and clean the SectionData tool call from a response.
 
-    response = client.messages.create(
-        model=model,
-        max_tokens=16000,
-        system=PROCESS_SYSTEM_PROMPT,
-        messages=[{"role": "user", "content": user_msg}],
-        tools=[OUTPUT_TOOL],
-        tool_choice={"type": "tool", "name": "output_section_data"},
-    )
+    Appends the call's usage and validation warning count to *calls*, if given.
+    """
+    logger.info(f"  {process_id}: {format_usage(response.usage)}")
 
     for block in response.content:
         if block.type == "tool_use" and block.name == "output_section_data":
@@ -878,6 +1031,8 @@ def call_process_architect(
             warnings = validate_output(data)
             for w in warnings:
                 logger.warning(f"  {process_id}: {w}")
+            if calls is not None:
+                calls.append({"usage": response.usage, "warnings": len(warnings)})
             data = strip_invalid_items(data)
             return data
 
@@ -885,6 +1040,80 @@ def call_process_architect(
     return None
 
 
+def call_process_architect(
+    client: anthropic.Anthropic,
+    process_id: str,
+    form_def: dict,
+    text_nodes: list[dict],
+    model: str,
+    dry_run: bool = False,
+    feedback: dict | None = None,
+    part: tuple[int, int] | None = None,
+    calls: list[dict] | None = None,
+) -> dict | None:
+    """Call the LLM for a process form (or one chunk of it) and return parsed SectionData.
+
+    The response is streamed and validated as it arrives (see StreamValidator);
+    a clearly malformed generation is abandoned and re-issued. *calls*, if
+    given, collects per-call stats for the model router.
+    """
+    request = build_process_request(process_id, form_def, text_nodes, model, feedback, part)
+    label = f"{process_id} (part {part[0]}/{part[1]})" if part else process_id
+
+    if dry_run:
+        print(f"\n{'='*60}")
+        print(f"DRY RUN — Process: {label} | Model: {model}")
+        print(f"{'='*60}")
+        print(f"SYSTEM PROMPT: ({len(PROCESS_SYSTEM_PROMPT)} chars)")
+        print(f"USER MESSAGE:\n{request['messages'][0]['content']}")
+        return None
+
+    logger.info(f"Calling API for process {label} with model {model}...")
+
+    for attempt in range(STREAM_REISSUES + 1):
+        validator = StreamValidator(label, abort=attempt < STREAM_REISSUES)
+        try:
+            response = client.messages.create_streaming(on_tool_input=validator, **request)
+            break
+        except MalformedOutputError as e:
+            logger.warning(f"  {label}: abandoned malformed output ({e}); re-issuing")
+    if calls is not None and client.served_from_cache():
+        calls.append({"cached": True})
+        calls = None
+    return parse_process_response(label, response, calls)
+
+
+def call_process_architect_chunked(
+    client: anthropic.Anthropic,
+    process_id: str,
+    form_def: dict,
+    chunks: list[list[dict]],
+    model: str,
+    dry_run: bool = False,
+    feedback: dict | None = None,
+    calls: list[dict] | None = None,
+) -> dict | None:
+    """Architect each chunk of a process in parallel and merge the results."""
+    n = len(chunks)
+    if n == 1:
+        return call_process_architect(client, process_id, form_def, chunks[0], model, dry_run, feedback,
+                                      calls=calls)
+
+    def call(k: int, chunk: list[dict]) -> dict | None:
+        return call_process_architect(client, process_id, form_def, chunk, model, dry_run, feedback, (k, n),
+                                      calls)
+
+    with ThreadPoolExecutor(max_workers=min(n, CHUNK_WORKERS)) as pool:
+        results = list(pool.map(call, range(1, n + 1), chunks))
+
+    failed = [k for k, r in enumerate(results, 1) if r is None]
+    if dry_run or len(failed) == n:
+        return None
+    if failed:
+        logger.error(f"  {process_id}: no result for part(s) {failed} of {n}; their rules will show as unmapped")
+    return merge_chunk_results([r for r in results if r is not None])
+
+
 def inject_process_existence(slug: str, form_def: dict, result: dict) -> dict:
     """Prepend the standard process-existence gate group and control to the result."""
     title = form_def["title"]
@@ -930,10 +1159,391 @@ def inject_static_fields(slug: str, result: dict, form_def: dict) -> dict:
     return result
 
 
+# ---------------------------------------------------------------------------
+# Concurrency helpers
+# ---------------------------------------------------------------------------
+
+API_RATE_PER_SEC = 2.0  # request starts per second across all workers (was a fixed 0.5s sleep)
+
+# Persisted Message Batch ids (in the run directory) for --batch resumption
+ARCHITECT_BATCH_STATE = "architect_batch.json"
+REVIEW_BATCH_STATE = "review_batch.json"
+
+
+def write_json_atomic(path: str, data) -> None:
+    """Write JSON to a sibling temp file and rename it over *path*.
+
+    Readers (the viewer, a concurrent re-run) never see a half-written file.
+    """
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def build_coverage_audit(coverage_reports: dict[str, dict], order) -> dict:
+    """Assemble _coverage_audit.json from per-process reports, in *order* of process id."""
+    processes = {pid: coverage_reports[pid] for pid in order if pid in coverage_reports}
+    total_input = sum(r["total_input"] for r in processes.values())
+    total_mapped = sum(r["total_mapped"] for r in processes.values())
+    total_unmapped = sum(r["total_unmapped"] for r in processes.values())
+    total_low_conf = sum(len(r["low_confidence"]) for r in processes.values())
+    overall_pct = round(total_mapped / total_input * 100, 1) if total_input else 100.0
+
+    return {
+        "summary": {
+            "overall_coverage_pct": overall_pct,
+            "total_input_rules": total_input,
+            "total_mapped_rules": total_mapped,
+            "total_unmapped_rules": total_unmapped,
+            "total_low_confidence_controls": total_low_conf,
+            "processes_audited": len(processes),
+        },
+        "processes": processes,
+    }
+
+
+# ---------------------------------------------------------------------------
+# Incremental runs — skip process forms whose inputs are unchanged
+# ---------------------------------------------------------------------------
+
+FINGERPRINT_KEY = "_fingerprint"
+
+
+def process_fingerprint(form_def: dict, chunks: list[list[dict]], model: str, feedback: dict | None) -> str:
+    """Hash of everything a process form's generation depends on.
+
+    Covers the gathered text (as rendered into the prompt, per chunk), the
+    PROCESS_FORMS entry, the feedback file, the model id, and the shared
+    system prompt and output schema.
+    """
+    payload = json.dumps({
+        "chunks": [
+            [[tn["rule_code"], tn["text"], tn["is_bold"], tn["is_italic"]] for tn in chunk]
+            for chunk in chunks
+        ],
+        "form": form_def,
+        "feedback": feedback,
+        "model": model,
+        "prompt": [PROCESS_SYSTEM_PROMPT, OUTPUT_TOOL],
+    }, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def load_unchanged_output(process_id: str, fingerprint: str) -> dict | None:
+    """The existing processes/<id>.json if it was generated from the same inputs."""
+    path = PROCESSES_DIR / f"{process_id}.json"
+    if not path.exists():
+        return None
+    try:
+        with open(path) as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return data if data.get(FINGERPRINT_KEY) == fingerprint else None
+
+
+def find_unchanged_output(
+    process_id: str,
+    form_def: dict,
+    chunks: list[list[dict]],
+    model: str,
+    feedback: dict | None,
+    router: ModelRouter | None = None,
+    force: bool = False,
+) -> tuple[str, dict | None]:
+    """(fingerprint, existing output if generated from the same inputs).
+
+    With a *router*, an unchanged form generated by any of its candidate
+    models is kept (and its fingerprint returned): routing only decides the
+    model of forms that are regenerated anyway. With *force* the form is
+    regenerated, so the fingerprint is always *model*'s.
+    """
+    if force:
+        return process_fingerprint(form_def, chunks, model, feedback), None
+    models = [model] + [m for m in (router.candidates if router else ()) if m != model]
+    for m in models:
+        fingerprint = process_fingerprint(form_def, chunks, m, feedback)
+        existing = load_unchanged_output(process_id, fingerprint)
+        if existing is not None:
+            return fingerprint, existing
+    return process_fingerprint(form_def, chunks, model, feedback), None
+
+
+def architect_one_process(
+    client: anthropic.Anthropic | None,
+    run_dir: str,
+    process_id: str,
+    form_def: dict,
+    groups: list[dict],
+    toc_classification: dict[str, list[str]],
+    position: str,
+    dry_run: bool = False,
+    model_override: str | None = None,
+    chunk_tokens: int | None = CHUNK_INPUT_TOKENS,
+    force: bool = False,
+    router: ModelRouter | None = None,
+) -> dict | None:
+    """Generate, post-process and write one process form. Returns its coverage report.
+
+    Unless *force*, a form whose existing output carries the same fingerprint
+    is not regenerated; its coverage is recomputed from the file on disk.
+    Generated forms are recorded in the *router*'s stats file.
+    """
+    prepared = prepare_process(run_dir, process_id, groups, toc_classification, position,
+                               model_override, chunk_tokens, router)
+    if prepared is None:
+        return None
+    text_nodes, chunks, model, feedback = prepared
+
+    fingerprint, existing = find_unchanged_output(process_id, form_def, chunks, model, feedback,
+                                                  None if model_override else router, force)
+    if existing is not None:
+        logger.info(f"  {process_id} unchanged (fingerprint {fingerprint}) — skipped; use --force to regenerate")
+        return compute_coverage_report(process_id, text_nodes, existing)
+
+    calls = []
+    started = time.perf_counter()
+    result = call_process_architect_chunked(
+        client, process_id, form_def, chunks, model, dry_run, feedback, calls,
+    )
+    latency = time.perf_counter() - started
+
+    if result is None:
+        return None
+
+    report = finish_process(process_id, form_def, text_nodes, feedback, result, toc_classification,
+                            dry_run, fingerprint)
+    if router is not None and not dry_run:
+        router.stats.record_form(process_id, model, len(text_nodes), calls, latency, report)
+    return report
+
+
+def prepare_process(
+    run_dir: str,
+    process_id: str,
+    groups: list[dict],
+    toc_classification: dict[str, list[str]],
+    position: str,
+    model_override: str | None = None,
+    chunk_tokens: int | None = CHUNK_INPUT_TOKENS,
+    router: ModelRouter | None = None,
+) -> tuple[list[dict], list[list[dict]], str, dict | None] | None:
+    """Gather a process form's inputs: (text nodes, chunks, model, feedback), or None to skip it."""
+    # Gather text nodes, split into chunks when over the token budget
+    chunks = chunk_process_nodes(process_id, groups, toc_classification, chunk_tokens)
+    text_nodes = [tn for chunk in chunks for tn in chunk]
+
+    if not text_nodes:
+        logger.info(f"[{position}] Skipping {process_id} (no text nodes)")
+        return None
+
+    # Select model
+    if model_override:
+        model = model_override
+    else:
+        model = MODEL_LARGE if len(text_nodes) >= TEXT_NODE_THRESHOLD else MODEL_SMALL
+        if router is not None:
+            model, reason = router.choose(len(text_nodes), model)
+            logger.info(f"[{position}] Route {process_id} → {model} ({reason})")
+
+    logger.info(f"[{position}] Processing {process_id} ({len(text_nodes)} nodes, model={model.split('-')[1] if '-' in model else model})")
+    if len(chunks) > 1:
+        logger.info(f"  ~{estimate_node_tokens(text_nodes)} tokens of text > {chunk_tokens}; "
+                    f"split into {len(chunks)} parts of {[len(c) for c in chunks]} nodes")
+
+    # Load feedback if available
+    feedback = load_feedback(run_dir, process_id)
+
+    return text_nodes, chunks, model, feedback
+
+
+def finish_process(
+    process_id: str,
+    form_def: dict,
+    text_nodes: list[dict],
+    feedback: dict | None,
+    result: dict,
+    toc_classification: dict[str, list[str]],
+    dry_run: bool = False,
+    fingerprint: str | None = None,
+) -> dict:
+    """Post-process an LLM result, write processes/<id>.json and return its coverage report."""
+    # Inject static fields (sub_scoping, form_links, existence gate)
+    result = inject_static_fields(process_id, result, form_def)
+
+    # Apply feedback overrides (post-LLM, not sent to LLM)
+    if feedback:
+        result = apply_feedback_overrides(result, feedback)
+
+    # Preserve checklist-items from the existing output file.
+    # The LLM may generate checklist-items from scratch (schema supports it), but if it
+    # doesn't — or if the existing file had hand-crafted checklist-items — graft them
+    # back onto any matching controls so they are never silently lost on re-runs.
+    existing_output_path = PROCESSES_DIR / f"{process_id}.json"
+    if existing_output_path.exists():
+        try:
+            with open(existing_output_path) as f:
+                existing_data = json.load(f)
+            existing_checklists = {
+                ctrl["id"]: ctrl["checklist-items"]
+                for ctrl in existing_data.get("controls", [])
+                if "checklist-items" in ctrl
+            }
+            preserved = 0
+            for ctrl in result.get("controls", []):
+                cid = ctrl["id"]
+                if cid in existing_checklists and "checklist-items" not in ctrl:
+                    ctrl["checklist-items"] = existing_checklists[cid]
+                    preserved += 1
+            if preserved:
+                logger.info(f"  Preserved {preserved} checklist-items block(s) from existing {process_id}.json")
+        except Exception as e:
+            logger.warning(f"  Could not read existing {process_id}.json to preserve checklist-items: {e}")
+
+    # Coverage audit
+    report = compute_coverage_report(process_id, text_nodes, result)
+    log_coverage_report(report)
+
+    # Add gating rule if this process is gated — target the first ToC section
+    # assigned to this process (gates the whole process group in the viewer)
+    if form_def["gated_by"]:
+        process_sections = toc_classification.get(process_id, [])
+        if process_sections:
+            gating_rule = {
+                "target": process_sections[0],
+                "scope": form_def["gated_by"],
+                "effect": "SHOW",
+                "schema": {"const": "Yes"},
+            }
+            result["rules"].insert(0, gating_rule)
+
+    # Write output, stamped with the inputs it was generated from
+    if fingerprint:
+        result[FINGERPRINT_KEY] = fingerprint
+    if not dry_run:
+        write_json_atomic(str(PROCESSES_DIR / f"{process_id}.json"), result)
+        logger.info(
+            f"Wrote {process_id}.json — "
+            f"{len(result['controls'])} controls, "
+            f"{len(result['groups'])} groups, "
+            f"{len(result['rules'])} rules, "
+            f"{len(result['sub_scoping'])} sub-types, "
+            f"{len(result['form_links'])} form-links"
+        )
+
+    return report
+
+
+def run_architect_batch(
+    client: CachedClient,
+    run_dir: str,
+    processes_to_run: dict[str, dict],
+    groups: list[dict],
+    toc_classification: dict[str, list[str]],
+    model_override: str | None = None,
+    chunk_tokens: int | None = CHUNK_INPUT_TOKENS,
+    force: bool = False,
+    router: ModelRouter | None = None,
+) -> dict[str, dict]:
+    """Generate every process form through one Message Batch. Returns coverage reports.
+
+    The *router* picks models as in a live run, but batch results are not
+    recorded in its stats (batch turnaround says nothing about latency).
+
+    Chunked processes contribute one request per part (custom_id
+    "<process>--part<k>"). The batch id is persisted to
+    <run_dir>/architect_batch.json, so an interrupted run picks the same
+    batch back up on the next --batch run.
+    """
+    total = len(processes_to_run)
+    coverage_reports = {}
+    prepared = {}
+    requests = {}
+    for i, (process_id, form_def) in enumerate(processes_to_run.items(), 1):
+        inputs = prepare_process(run_dir, process_id, groups, toc_classification, f"{i}/{total}",
+                                 model_override, chunk_tokens, router)
+        if inputs is None:
+            continue
+        text_nodes, chunks, model, feedback = inputs
+        fingerprint, existing = find_unchanged_output(process_id, form_def, chunks, model, feedback,
+                                                      None if model_override else router, force)
+        if existing is not None:
+            logger.info(f"  {process_id} unchanged (fingerprint {fingerprint}) — skipped; use --force to regenerate")
+            coverage_reports[process_id] = compute_coverage_report(process_id, text_nodes, existing)
+            continue
+        n = len(chunks)
+        custom_ids = [process_id] if n == 1 else [f"{process_id}--part{k}" for k in range(1, n + 1)]
+        for k, (custom_id, chunk) in enumerate(zip(custom_ids, chunks), 1):
+            requests[custom_id] = build_process_request(
+                process_id, form_def, chunk, model, feedback, (k, n) if n > 1 else None,
+            )
+        prepared[process_id] = (text_nodes, feedback, custom_ids, fingerprint)
+
+    responses = run_message_batch(client, requests, os.path.join(run_dir, ARCHITECT_BATCH_STATE))
+
+    for process_id, (text_nodes, feedback, custom_ids, fingerprint) in prepared.items():
+        results = [parse_process_response(cid, responses[cid]) for cid in custom_ids if cid in responses]
+        results = [r for r in results if r is not None]
+        if not results:
+            continue
+        if len(results) < len(custom_ids):
+            logger.error(f"  {process_id}: {len(custom_ids) - len(results)} of {len(custom_ids)} parts "
+                         "missing; their rules will show as unmapped")
+        result = results[0] if len(custom_ids) == 1 else merge_chunk_results(results)
+        coverage_reports[process_id] = finish_process(
+            process_id, processes_to_run[process_id], text_nodes, feedback, result, toc_classification,
+            fingerprint=fingerprint,
+        )
+    return {pid: coverage_reports[pid] for pid in processes_to_run if pid in coverage_reports}
+
+
 def run_process_architect(run_dir: str, single_process: str | None = None,
                           dry_run: bool = False, model_override: str | None = None,
-                          run_review: bool = False):
-    """Process-mode pipeline: one LLM call per process form."""
+                          run_review: bool = False, concurrency: int = 1,
+                          rate: float = API_RATE_PER_SEC, use_cache: bool = True,
+                          refresh: bool = False, batch: bool = False,
+                          chunk_tokens: int | None = CHUNK_INPUT_TOKENS, force: bool = False,
+                          max_in_flight: int | None = None, route: str = "cost",
+                          transport: httpx.BaseTransport | None = None):
+    """Process-mode pipeline: one LLM call per process form.
+
+    With concurrency > 1, up to that many process forms are in flight at once;
+    API request starts are still paced by a shared token bucket at *rate* per
+    second. Output files and the coverage audit are identical to a serial run.
+
+    Responses are cached in runs/.cache/llm, so a rerun with unchanged prompts
+    makes no API calls. use_cache=False bypasses the cache entirely;
+    refresh=True re-calls the API and overwrites the cached responses.
+
+    With batch=True the calls (and the review pass) go out as Message Batches
+    instead; see run_architect_batch.
+
+    Processes whose regulatory text is estimated above *chunk_tokens* are
+    split by ToC section into parallel calls and merged (0/None disables).
+
+    Each output records a fingerprint of its inputs (text nodes, PROCESS_FORMS
+    entry, feedback file, model, prompt); forms whose fingerprint is unchanged
+    are skipped unless *force*, but still count towards the coverage audit.
+
+    Transient API errors are retried with backoff (see llm_client). A form
+    that still fails is logged and skipped while the rest carry on; the run
+    then exits non-zero, and rerunning it regenerates only the failed forms
+    since completed ones are written as they finish and skipped by
+    fingerprint. *max_in_flight* caps concurrent API requests across
+    generation, chunk and review calls (default: no cap beyond the pools).
+
+    Unless *route* is "fixed", models are chosen by ModelRouter from the
+    stats in runs/.cache/model_stats.jsonl — the cheapest ("cost") or
+    fastest ("latency") model meeting the coverage bar for the form's size
+    band — and each generated form (and its review) is recorded there.
+    *model_override* bypasses routing but is still recorded.
+
+    *transport* replaces the SDK's HTTP transport — replay.RecordingTransport
+    to capture fixtures, replay.ReplayTransport to run offline from them.
+    Replayed runs always use the fixed model rule and record no routing
+    stats, so record fixtures with route="fixed" too.
+    """
 
     # Load data
     enriched_path = os.path.join(run_dir, "groups_enriched.json")
@@ -941,8 +1551,7 @@ def run_process_architect(run_dir: str, single_process: str | None = None,
         logger.error(f"groups_enriched.json not found in {run_dir}. Run 'python main.py enrich' first.")
         sys.exit(1)
 
-    with open(enriched_path) as f:
-        groups = json.load(f)
+    groups = load_enriched_groups(enriched_path)
 
     # Load ToC classification (section → process mapping)
     toc_classification = load_toc_classification(run_dir)
@@ -956,156 +1565,130 @@ def run_process_architect(run_dir: str, single_process: str | None = None,
     else:
         processes_to_run = PROCESS_FORMS
 
+    total = len(processes_to_run)
+    concurrency = max(1, concurrency)
+
     # Create API client (unless dry run)
     client = None
     if not dry_run:
-        client = anthropic.Anthropic()
+        http_client = httpx.Client(transport=transport) if transport is not None else None
+        client = CachedClient(
+            anthropic.Anthropic(http_client=http_client),
+            ResponseCache(enabled=use_cache, refresh=refresh),
+            TokenBucket(rate, capacity=concurrency),
+            max_in_flight=max_in_flight,
+        )
+
+    router = None
+    if route != "fixed" and not isinstance(transport, ReplayTransport):
+        router = ModelRouter(ModelStats(), (MODEL_SMALL, MODEL_LARGE), objective=route)
 
     # Output directory
     processes_dir = str(PROCESSES_DIR)
     if not dry_run:
         os.makedirs(processes_dir, exist_ok=True)
 
-    # Coverage reports accumulator
-    coverage_reports: dict[str, dict] = {}
-
-    total = len(processes_to_run)
-    for i, (process_id, form_def) in enumerate(processes_to_run.items(), 1):
-        # Gather text nodes
-        text_nodes = gather_process_nodes(process_id, groups, toc_classification)
-
-        if not text_nodes:
-            logger.info(f"[{i}/{total}] Skipping {process_id} (no text nodes)")
-            continue
-
-        # Select model
-        if model_override:
-            model = model_override
-        else:
-            model = MODEL_LARGE if len(text_nodes) >= TEXT_NODE_THRESHOLD else MODEL_SMALL
-
-        logger.info(f"[{i}/{total}] Processing {process_id} ({len(text_nodes)} nodes, model={model.split('-')[1] if '-' in model else model})")
-
-        # Load feedback if available
-        feedback = load_feedback(run_dir, process_id)
-
-        result = call_process_architect(
-            client, process_id, form_def, text_nodes, model, dry_run, feedback,
-        )
+    # Pipelined review: each form is reviewed as soon as it is written, on its
+    # own pool, while the remaining forms are still being generated.
+    pipeline_review = run_review and not batch and not dry_run
+    review_pool = ThreadPoolExecutor(max_workers=concurrency) if pipeline_review else None
+    review_futures = {}
+    failed: list[str] = []
+
+    def work(i: int, process_id: str) -> dict | None:
+        try:
+            report = architect_one_process(
+                client, run_dir, process_id, processes_to_run[process_id], groups,
+                toc_classification, f"{i}/{total}", dry_run, model_override, chunk_tokens, force, router,
+            )
+        except anthropic.AnthropicError as e:
+            logger.error(f"  {process_id} failed: {e.__class__.__name__}: {e}")
+            failed.append(process_id)
+            return None
+        if report is not None and review_pool is not None:
+            review_futures[process_id] = review_pool.submit(
+                review_one_process, client, process_id, report, groups, toc_classification,
+            )
+        return report
 
-        if result is None:
-            continue
+    process_ids = list(processes_to_run)
+    positions = range(1, total + 1)
 
-        # Inject static fields (sub_scoping, form_links, existence gate)
-        result = inject_static_fields(process_id, result, form_def)
-
-        # Apply feedback overrides (post-LLM, not sent to LLM)
-        if feedback:
-            result = apply_feedback_overrides(result, feedback)
-
-        # Preserve checklist-items from the existing output file.
-        # The LLM may generate checklist-items from scratch (schema supports it), but if it
-        # doesn't — or if the existing file had hand-crafted checklist-items — graft them
-        # back onto any matching controls so they are never silently lost on re-runs.
-        existing_output_path = PROCESSES_DIR / f"{process_id}.json"
-        if existing_output_path.exists():
-            try:
-                with open(existing_output_path) as f:
-                    existing_data = json.load(f)
-                existing_checklists = {
-                    ctrl["id"]: ctrl["checklist-items"]
-                    for ctrl in existing_data.get("controls", [])
-                    if "checklist-items" in ctrl
-                }
-                preserved = 0
-                for ctrl in result.get("controls", []):
-                    cid = ctrl["id"]
-                    if cid in existing_checklists and "checklist-items" not in ctrl:
-                        ctrl["checklist-items"] = existing_checklists[cid]
-                        preserved += 1
-                if preserved:
-                    logger.info(f"  Preserved {preserved} checklist-items block(s) from existing {process_id}.json")
-            except Exception as e:
-                logger.warning(f"  Could not read existing {process_id}.json to preserve checklist-items: {e}")
-
-        # Coverage audit
-        report = compute_coverage_report(process_id, text_nodes, result)
-        coverage_reports[process_id] = report
-        log_coverage_report(report)
-
-        # Add gating rule if this process is gated — target the first ToC section
-        # assigned to this process (gates the whole process group in the viewer)
-        if form_def["gated_by"]:
-            process_sections = toc_classification.get(process_id, [])
-            if process_sections:
-                gating_rule = {
-                    "target": process_sections[0],
-                    "scope": form_def["gated_by"],
-                    "effect": "SHOW",
-                    "schema": {"const": "Yes"},
-                }
-                result["rules"].insert(0, gating_rule)
-
-        # Write output
-        if not dry_run:
-            output_path = str(PROCESSES_DIR / f"{process_id}.json")
-            with open(output_path, "w") as f:
-                json.dump(result, f, indent=2)
-            logger.info(
-                f"Wrote {process_id}.json — "
-                f"{len(result['controls'])} controls, "
-                f"{len(result['groups'])} groups, "
-                f"{len(result['rules'])} rules, "
-                f"{len(result['sub_scoping'])} sub-types, "
-                f"{len(result['form_links'])} form-links"
+    # Coverage reports accumulator — filled in process order whatever order calls finish
+    coverage_reports: dict[str, dict] = {}
+    generated = False
+    try:
+        if batch and not dry_run:
+            coverage_reports = run_architect_batch(
+                client, run_dir, processes_to_run, groups, toc_classification, model_override, chunk_tokens,
+                force, router,
             )
-
-        # Rate limiting
-        if not dry_run:
-            time.sleep(0.5)
+        elif concurrency == 1 or dry_run:
+            reports = map(work, positions, process_ids)
+            for process_id, report in zip(process_ids, reports):
+                if report is not None:
+                    coverage_reports[process_id] = report
+        else:
+            logger.info(f"Running {total} process forms with concurrency={concurrency}, rate={rate}/s")
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                for process_id, report in zip(process_ids, pool.map(work, positions, process_ids)):
+                    if report is not None:
+                        coverage_reports[process_id] = report
+        generated = True
+    finally:
+        if review_pool is not None:
+            if generated and review_futures:
+                logger.info(f"Generation done; waiting for {len(review_futures)} pipelined review(s)...")
+            # After an error, queued reviews are dropped; running ones finish
+            review_pool.shutdown(wait=True, cancel_futures=not generated)
 
     if not dry_run:
         # Write coverage audit report
         if coverage_reports:
             audit_path = str(PROCESSES_DIR / "_coverage_audit.json")
-            total_input = sum(r["total_input"] for r in coverage_reports.values())
-            total_mapped = sum(r["total_mapped"] for r in coverage_reports.values())
-            total_unmapped = sum(r["total_unmapped"] for r in coverage_reports.values())
-            total_low_conf = sum(len(r["low_confidence"]) for r in coverage_reports.values())
-            overall_pct = round(total_mapped / total_input * 100, 1) if total_input else 100.0
-
-            audit_data = {
-                "summary": {
-                    "overall_coverage_pct": overall_pct,
-                    "total_input_rules": total_input,
-                    "total_mapped_rules": total_mapped,
-                    "total_unmapped_rules": total_unmapped,
-                    "total_low_confidence_controls": total_low_conf,
-                    "processes_audited": len(coverage_reports),
-                },
-                "processes": coverage_reports,
-            }
-            with open(audit_path, "w") as f:
-                json.dump(audit_data, f, indent=2)
+            audit_data = build_coverage_audit(coverage_reports, process_ids)
+            write_json_atomic(audit_path, audit_data)
             logger.info(f"Coverage audit → {audit_path}")
 
-            print(f"\nCoverage: {overall_pct}% ({total_mapped}/{total_input} rules)")
-            if total_unmapped > 0:
-                print(f"  Unmapped rules: {total_unmapped}")
-            if total_low_conf > 0:
-                print(f"  Low confidence controls: {total_low_conf}")
+            summary = audit_data["summary"]
+            print(f"\nCoverage: {summary['overall_coverage_pct']}% "
+                  f"({summary['total_mapped_rules']}/{summary['total_input_rules']} rules)")
+            if summary["total_unmapped_rules"] > 0:
+                print(f"  Unmapped rules: {summary['total_unmapped_rules']}")
+            if summary["total_low_confidence_controls"] > 0:
+                print(f"  Low confidence controls: {summary['total_low_confidence_controls']}")
 
         if run_review and coverage_reports:
-            logger.info("Starting second-pass review...")
-            review_results = run_review_pass(client, run_dir, groups, coverage_reports, toc_classification)
+            if review_pool is not None:
+                reviews = ((pid, review_futures[pid].result()) for pid in process_ids if pid in review_futures)
+                review_results = {pid: r for pid, r in reviews if r is not None}
+            else:
+                logger.info("Starting second-pass review...")
+                review_results = run_review_pass(
+                    client, run_dir, groups, coverage_reports, toc_classification, batch=batch,
+                    concurrency=concurrency,
+                )
             review_path = str(PROCESSES_DIR / "_review_results.json")
-            with open(review_path, "w") as f:
-                json.dump(review_results, f, indent=2)
+            write_json_atomic(review_path, review_results)
+            if router is not None:
+                for pid, review in review_results.items():
+                    router.stats.record_review(pid, review)
             logger.info(f"Review results → {review_path}")
 
+        cache = client.cache
+        if cache.enabled:
+            logger.info(f"LLM cache: {cache.hits} hit(s), {cache.misses} API call(s)")
+        logger.info(f"API usage: {client.usage}")
+
         print(f"\nDone! Process files written to {processes_dir}/")
         print(f"  Process forms: {total}")
 
+        if failed:
+            failed = [pid for pid in process_ids if pid in failed]
+            logger.error(f"{len(failed)} process form(s) failed: {', '.join(failed)}. "
+                         f"Rerun to resume — completed forms are skipped by fingerprint.")
+            sys.exit(1)
+
 
 # ---------------------------------------------------------------------------
 # Second-pass review — independent LLM validation of mappings
@@ -1179,49 +1762,50 @@ For unmapped rules, assess whether:
 """
 
 
-def run_review_pass(
-    client: anthropic.Anthropic,
-    run_dir: str,
+def build_review_request(
+    process_id: str,
+    report: dict,
     groups: list[dict],
-    coverage_reports: dict[str, dict],
     toc_classification: dict[str, list[str]],
-) -> dict:
-    """Run second-pass review on process forms."""
-    all_reviews = {}
+) -> dict | None:
+    """messages.create parameters reviewing a written process form (None if it has no file)."""
+    process_path = str(PROCESSES_DIR / f"{process_id}.json")
+    if not os.path.exists(process_path):
+        return None
 
-    for process_id, report in coverage_reports.items():
-        process_path = str(PROCESSES_DIR / f"{process_id}.json")
-        if not os.path.exists(process_path):
-            continue
+    with open(process_path) as f:
+        result = json.load(f)
 
-        with open(process_path) as f:
-            result = json.load(f)
+    text_nodes = gather_process_nodes(process_id, groups, toc_classification)
 
-        text_nodes = gather_process_nodes(process_id, groups, toc_classification)
+    nodes_text = ""
+    for tn in text_nodes:
+        prefix = f"[{tn['rule_code']}] " if tn["rule_code"] else ""
+        nodes_text += f"  {prefix}{tn['text']}\n"
 
-        nodes_text = ""
+    controls_text = ""
+    for ctrl in result.get("controls", []):
+        src = ", ".join(ctrl.get("source-rules", []))
+        conf = ctrl.get("mapping-confidence", "N/A")
+        controls_text += f"  {ctrl['id']} (group: {ctrl.get('group', '?')}): {ctrl['label']}\n"
+        controls_text += f"    source-rules: [{src}]\n"
+        controls_text += f"    mapping-confidence: {conf}\n"
+        controls_text += f"    correct-option: {ctrl.get('correct-option', '?')}\n\n"
+
+    unmapped_text = ""
+    if report["unmapped_codes"]:
+        # First node per rule code, built once rather than scanned per unmapped code
+        node_by_code: dict[str, dict] = {}
         for tn in text_nodes:
-            prefix = f"[{tn['rule_code']}] " if tn["rule_code"] else ""
-            nodes_text += f"  {prefix}{tn['text']}\n"
+            if tn.get("rule_code"):
+                node_by_code.setdefault(tn["rule_code"], tn)
+        unmapped_text = f"\n## Unmapped Rules ({len(report['unmapped_codes'])})\n"
+        for code in report["unmapped_codes"]:
+            matching = node_by_code.get(code)
+            text = matching["text"] if matching else "(text not found)"
+            unmapped_text += f"  [{code}] {text}\n"
 
-        controls_text = ""
-        for ctrl in result.get("controls", []):
-            src = ", ".join(ctrl.get("source-rules", []))
-            conf = ctrl.get("mapping-confidence", "N/A")
-            controls_text += f"  {ctrl['id']} (group: {ctrl.get('group', '?')}): {ctrl['label']}\n"
-            controls_text += f"    source-rules: [{src}]\n"
-            controls_text += f"    mapping-confidence: {conf}\n"
-            controls_text += f"    correct-option: {ctrl.get('correct-option', '?')}\n\n"
-
-        unmapped_text = ""
-        if report["unmapped_codes"]:
-            unmapped_text = f"\n## Unmapped Rules ({len(report['unmapped_codes'])})\n"
-            for code in report["unmapped_codes"]:
-                matching = [tn for tn in text_nodes if tn.get("rule_code") == code]
-                text = matching[0]["text"] if matching else "(text not found)"
-                unmapped_text += f"  [{code}] {text}\n"
-
-        user_msg = f"""## Review: {PROCESS_FORMS[process_id]['title']}
+    user_msg = f"""## Review: {PROCESS_FORMS[process_id]['title']}
 
 ## Original Regulatory Text ({len(text_nodes)} nodes)
 {nodes_text}
@@ -1233,44 +1817,99 @@ def run_review_pass(
 Review each control mapping and assess the unmapped rules.
 """
 
-        logger.info(f"  Reviewing {process_id}...")
+    return {
+        "model": MODEL_SMALL,
+        "max_tokens": 4096,
+        "system": cached_system(REVIEW_SYSTEM_PROMPT),
+        "messages": [{"role": "user", "content": user_msg}],
+        "tools": [REVIEW_TOOL],
+        "tool_choice": {"type": "tool", "name": "output_review"},
+    }
 
-        response = client.messages.create(
-            model=MODEL_SMALL,
-            max_tokens=4096,
-            system=REVIEW_SYSTEM_PROMPT,
-            messages=[{"role": "user", "content": user_msg}],
-            tools=[REVIEW_TOOL],
-            tool_choice={"type": "tool", "name": "output_review"},
-        )
 
-        for block in response.content:
-            if block.type == "tool_use" and block.name == "output_review":
-                review_data = block.input
-                all_reviews[process_id] = review_data
-
-                reviews = review_data.get("reviews", [])
-                quality_counts = defaultdict(int)
-                for r in reviews:
-                    quality_counts[r["quality"]] += 1
-                logger.info(
-                    f"  Review: {quality_counts.get('good', 0)} good, "
-                    f"{quality_counts.get('acceptable', 0)} acceptable, "
-                    f"{quality_counts.get('questionable', 0)} questionable, "
-                    f"{quality_counts.get('incorrect', 0)} incorrect"
-                )
+def parse_review_response(process_id: str, response) -> dict | None:
+    """Extract the output_review tool call from a response and log its verdicts."""
+    logger.info(f"  {process_id}: {format_usage(response.usage)}")
+
+    for block in response.content:
+        if block.type == "tool_use" and block.name == "output_review":
+            review_data = block.input
+
+            reviews = review_data.get("reviews", [])
+            quality_counts = defaultdict(int)
+            for r in reviews:
+                quality_counts[r["quality"]] += 1
+            logger.info(
+                f"  Review: {quality_counts.get('good', 0)} good, "
+                f"{quality_counts.get('acceptable', 0)} acceptable, "
+                f"{quality_counts.get('questionable', 0)} questionable, "
+                f"{quality_counts.get('incorrect', 0)} incorrect"
+            )
+
+            unmapped = review_data.get("unmapped_assessment", [])
+            should_map = [u for u in unmapped if u["reason"] == "should_be_mapped"]
+            if should_map:
+                logger.warning(f"  {len(should_map)} unmapped rules SHOULD have been mapped:")
+                for u in should_map:
+                    logger.warning(f"    {u['rule_code']}: {u.get('explanation', '')}")
+            return review_data
+
+    return None
+
+
+def review_one_process(
+    client: anthropic.Anthropic,
+    process_id: str,
+    report: dict,
+    groups: list[dict],
+    toc_classification: dict[str, list[str]],
+) -> dict | None:
+    """Review one written process form; None if it has no file or no review came back."""
+    request = build_review_request(process_id, report, groups, toc_classification)
+    if request is None:
+        return None
+    logger.info(f"  Reviewing {process_id}...")
+    try:
+        response = client.messages.create(**request)
+    except anthropic.AnthropicError as e:
+        logger.error(f"  Review of {process_id} failed: {e.__class__.__name__}: {e}")
+        return None
+    return parse_review_response(process_id, response)
+
 
-                unmapped = review_data.get("unmapped_assessment", [])
-                should_map = [u for u in unmapped if u["reason"] == "should_be_mapped"]
-                if should_map:
-                    logger.warning(f"  {len(should_map)} unmapped rules SHOULD have been mapped:")
-                    for u in should_map:
-                        logger.warning(f"    {u['rule_code']}: {u.get('explanation', '')}")
-                break
+def run_review_pass(
+    client: anthropic.Anthropic,
+    run_dir: str,
+    groups: list[dict],
+    coverage_reports: dict[str, dict],
+    toc_classification: dict[str, list[str]],
+    batch: bool = False,
+    concurrency: int = 1,
+) -> dict:
+    """Run second-pass review on process forms.
+
+    Reviews run *concurrency* at a time (paced by the client's limiter), or
+    as one Message Batch when *batch*. Results are keyed in report order.
+    """
+    if batch:
+        requests = {}
+        for process_id, report in coverage_reports.items():
+            request = build_review_request(process_id, report, groups, toc_classification)
+            if request is not None:
+                requests[process_id] = request
+        responses = run_message_batch(client, requests, os.path.join(run_dir, REVIEW_BATCH_STATE))
+        reviews = (
+            parse_review_response(pid, responses[pid]) if pid in responses else None for pid in requests
+        )
+        return {pid: r for pid, r in zip(requests, reviews) if r is not None}
 
-        time.sleep(0.5)
+    def review(process_id: str) -> dict | None:
+        return review_one_process(client, process_id, coverage_reports[process_id], groups, toc_classification)
 
-    return all_reviews
+    process_ids = list(coverage_reports)
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        reviews = list(pool.map(review, process_ids))
+    return {pid: r for pid, r in zip(process_ids, reviews) if r is not None}
 
 
 # ---------------------------------------------------------------------------
@@ -1324,6 +1963,82 @@ def validate_output(data: dict) -> list[str]:
     return warnings
 
 
+# ---------------------------------------------------------------------------
+# Streaming validation — give up on clearly malformed generations early
+# ---------------------------------------------------------------------------
+# call_process_architect streams the SectionData tool input. Each group or
+# control is checked as soon as it is complete (a later item or the next
+# top-level key has started); once STREAM_MAX_INVALID are invalid the call is
+# abandoned and re-issued, up to STREAM_REISSUES times. The last attempt is
+# never abandoned, so the worst case is today's strip_invalid_items cleanup.
+
+STREAM_MAX_INVALID = 3
+STREAM_REISSUES = 1
+STREAM_PROGRESS_EVERY = 10  # controls between progress log lines
+
+
+class MalformedOutputError(Exception):
+    """A streamed SectionData tool call went wrong early enough to abandon."""
+
+
+class StreamValidator:
+    """Callback for CachedClient.messages.create_streaming(on_tool_input=...)."""
+
+    def __init__(self, label: str, abort: bool = True):
+        self.label = label
+        self.abort = abort
+        self.invalid: list[str] = []
+        self._slugs: set[str] = set()
+        self._groups = 0
+        self._controls = 0
+        self._unchecked_refs: list[tuple[str, str | None]] = []
+
+    @staticmethod
+    def _completed(snapshot: dict, key: str) -> tuple[list, bool]:
+        """(completed items of *key*, whether the array is closed).
+
+        The last item may still be streaming unless a later key has begun;
+        the model may emit keys in any order, so "later" is the snapshot's own.
+        """
+        keys = list(snapshot)
+        items = snapshot.get(key) or []
+        closed = key in keys and keys.index(key) < len(keys) - 1
+        return (items if closed else items[:-1]), closed
+
+    def __call__(self, snapshot: dict):
+        groups_done, groups_closed = self._completed(snapshot, "groups")
+        controls_done, _ = self._completed(snapshot, "controls")
+
+        for group in groups_done[self._groups:]:
+            gid = group.get("id", "")
+            if SLUG_REGEX.match(gid):
+                self._slugs.add(gid)
+            else:
+                self.invalid.append(f"group id '{gid}'")
+        self._groups = len(groups_done)
+
+        for control in controls_done[self._controls:]:
+            cid = control.get("id", "")
+            if not ID_REGEX.match(cid):
+                self.invalid.append(f"control id '{cid}'")
+            else:
+                self._unchecked_refs.append((cid, control.get("group")))
+        # Group refs can only be checked once every group has been emitted
+        if groups_closed:
+            self.invalid.extend(f"control '{cid}' group '{group}'"
+                                for cid, group in self._unchecked_refs if group not in self._slugs)
+            self._unchecked_refs = []
+        if len(controls_done) // STREAM_PROGRESS_EVERY > self._controls // STREAM_PROGRESS_EVERY:
+            logger.info(f"  {self.label}: streaming… {self._groups} groups, {len(controls_done)} controls")
+        self._controls = len(controls_done)
+
+        if self.abort and len(self.invalid) >= STREAM_MAX_INVALID:
+            raise MalformedOutputError(
+                f"{len(self.invalid)} invalid items after {self._groups} groups / {self._controls} controls: "
+                + ", ".join(self.invalid[:STREAM_MAX_INVALID])
+            )
+
+
 def strip_invalid_items(data: dict) -> dict:
     """Remove controls with invalid IDs or missing group refs, groups with invalid slugs."""
     # Collect valid group slugs first
@@ -1372,7 +2087,50 @@ if __name__ == "__main__":
     parser.add_argument("--model", help="Override model for all groups")
     parser.add_argument("--review", action="store_true",
                         help="Run second-pass review after generation")
+    parser.add_argument("--concurrency", type=int, default=1,
+                        help="Process forms to generate in parallel (default: 1)")
+    parser.add_argument("--rate", type=float, default=API_RATE_PER_SEC,
+                        help=f"Max API requests started per second (default: {API_RATE_PER_SEC})")
+    parser.add_argument("--max-in-flight", type=int,
+                        help="Cap on concurrent API requests across forms, chunks and reviews (default: no cap)")
+    parser.add_argument("--route", choices=ROUTE_OBJECTIVES + ("fixed",), default="cost",
+                        help="Pick each form's model by measured cost or latency among models meeting the "
+                             "coverage bar for its size band, or 'fixed' for the node-count rule "
+                             "(default: cost; --model overrides)")
+    parser.add_argument("--batch", action="store_true",
+                        help="Send all calls (and --review) as Message Batches; resumes a persisted batch")
+    parser.add_argument("--chunk-tokens", type=int, default=CHUNK_INPUT_TOKENS,
+                        help=f"Split processes with more estimated tokens of text than this into "
+                             f"parallel calls by ToC section (default: {CHUNK_INPUT_TOKENS}; 0 disables)")
+    parser.add_argument("--force", action="store_true",
+                        help="Regenerate process forms even if their inputs are unchanged")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Bypass the LLM response cache (runs/.cache/llm)")
+    fixtures = parser.add_mutually_exclusive_group()
+    fixtures.add_argument("--record", metavar="DIR",
+                          help="Save every API exchange as a replay fixture in DIR")
+    fixtures.add_argument("--replay", metavar="DIR",
+                          help="Answer API calls from fixtures in DIR, offline (combine with --no-cache --force)")
+    parser.add_argument("--replay-latency", type=float, default=0.0,
+                        help="Simulated seconds per replayed call (default: 0)")
+    parser.add_argument("--replay-error-rate", type=float, default=0.0,
+                        help="Fraction of replayed calls answered 529 overloaded (default: 0)")
+    parser.add_argument("--refresh", action="store_true",
+                        help="Re-call the API and overwrite cached responses")
 
     args = parser.parse_args()
 
-    run_process_architect(args.run_dir, args.process, args.dry_run, args.model, args.review)
+    transport = None
+    if args.record:
+        transport = RecordingTransport(args.record)
+    elif args.replay:
+        os.environ.setdefault("ANTHROPIC_API_KEY", "offline-replay")
+        transport = ReplayTransport(args.replay, args.replay_latency, error_rate=args.replay_error_rate)
+
+    run_process_architect(
+        args.run_dir, args.process, args.dry_run, args.model, args.review,
+        concurrency=args.concurrency, rate=args.rate,
+        use_cache=not args.no_cache, refresh=args.refresh, batch=args.batch,
+        chunk_tokens=args.chunk_tokens, force=args.force, max_in_flight=args.max_in_flight,
+        route=args.route, transport=transport,
+    )
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks for the post-scrape pipeline stages.
+
+Times each stage over an existing nodes.json (best of --repeat runs), so
+heuristic changes can be checked against the full Rules document without
+re-scraping.
+
+Usage:
+    python benchmark.py runs/2/nodes.json
+    python benchmark.py runs/2/nodes.json --stage membership --repeat 10
+"""
+
+import argparse
+import json
+import logging
+import tempfile
+import time
+
+import main
+
+
+def _best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def bench_groups(nodes: list[dict], repeat: int) -> None:
+    elapsed = _best_of(lambda: main.build_groups(nodes), repeat)
+    print(f"build_groups            {elapsed * 1000:8.1f} ms  ({len(nodes)} nodes)")
+
+
+def bench_membership(nodes: list[dict], repeat: int) -> None:
+    """Group-membership counting: per-group prefix scan vs ancestor-chain lookup."""
+    group_ids = [g["id"] for g in main.build_groups(nodes)]
+    codes = [main._normalise_full(n["rule_code"]) for n in nodes if n.get("rule_code")]
+
+    def scan():
+        counts = {gid: 0 for gid in group_ids}
+        for full in codes:
+            for gid in counts:
+                if full == gid or full.startswith(gid + "_"):
+                    counts[gid] += 1
+        return counts
+
+    def chain():
+        counts = {gid: 0 for gid in group_ids}
+        for full in codes:
+            for prefix in main._ancestor_prefixes(full):
+                if prefix in counts:
+                    counts[prefix] += 1
+        return counts
+
+    assert scan() == chain()
+    t_scan = _best_of(scan, repeat)
+    t_chain = _best_of(chain, repeat)
+    print(f"membership (scan)       {t_scan * 1000:8.1f} ms  ({len(group_ids)} groups × {len(codes)} codes)")
+    print(f"membership (chain)      {t_chain * 1000:8.1f} ms  ({t_scan / t_chain:.0f}× faster)")
+
+
+def bench_enrich(nodes: list[dict], repeat: int) -> None:
+    groups = main.build_groups(nodes)
+    elapsed = _best_of(lambda: main.enrich_groups_with_nodes(nodes, groups), repeat)
+    full = json.dumps(main.enrich_groups_with_nodes(nodes, groups), indent=2)
+    compact = json.dumps(main.compact_enriched_groups(nodes, groups), separators=(",", ":"))
+    print(f"enrich_groups_with_nodes {elapsed * 1000:7.1f} ms  ({len(groups)} groups)")
+    print(f"groups_enriched.json    {len(full) / 1024:8.0f} KB  (compact: {len(compact) / 1024:.0f} KB)")
+
+
+def bench_svg(nodes: list[dict], repeat: int) -> None:
+    groups, spans = main.build_groups_with_spans(nodes)
+    with tempfile.TemporaryDirectory() as tmp:
+        elapsed = _best_of(lambda: main.build_svg(nodes, groups, tmp, spans), repeat)
+    print(f"build_svg               {elapsed * 1000:8.1f} ms  ({len(groups)} group spans)")
+
+
+BENCHMARKS = {
+    "groups": bench_groups,
+    "membership": bench_membership,
+    "enrich": bench_enrich,
+    "svg": bench_svg,
+}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark pipeline stages on an existing nodes.json.")
+    parser.add_argument("nodes_json", help="Path to nodes.json (e.g. runs/2/nodes.json)")
+    parser.add_argument("--stage", choices=BENCHMARKS, help="Run a single benchmark (default: all)")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per benchmark; best is reported")
+    args = parser.parse_args()
+
+    logging.getLogger("main").setLevel(logging.WARNING)
+    with open(args.nodes_json) as f:
+        nodes = json.load(f)
+
+    for name, bench in BENCHMARKS.items():
+        if args.stage in (None, name):
+            bench(nodes, args.repeat)
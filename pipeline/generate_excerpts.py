@@ -15,13 +15,14 @@ Usage:
 """
 
 import argparse
-import json
 import os
 from pathlib import Path
 
 import fitz  # PyMuPDF
 import pdfplumber
 
+from node_store import open_nodes
+
 NODES_PATH = "runs/1/nodes.json"
 INPUT_PDF = "chapter4.pdf"
 OUT_DIR = "runs/1/excerpts"
@@ -81,10 +82,8 @@ def main():
     parser.add_argument("--height", type=float, default=SNIPPET_HEIGHT, help="Snippet height in points")
     args = parser.parse_args()
 
-    with open(args.nodes) as f:
-        nodes = json.load(f)
-
-    rule_nodes = [n for n in nodes if n.get("rule_code") and n.get("uid")]
+    with open_nodes(args.nodes) as nodes:
+        rule_nodes = [n for n in nodes if n.get("rule_code") and n.get("uid")]
     print(f"Processing {len(rule_nodes)} rule nodes from {args.nodes}")
 
     out_dir = Path(args.out_dir)
@@ -0,0 +1,567 @@
+#!/usr/bin/env python3
+"""
+Shared Messages API plumbing for architect.py and toc_extractor.py.
+
+  TokenBucket     — thread-safe pacing of request starts
+  ResponseCache   — on-disk cache of responses in runs/.cache/llm, keyed by a
+                    hash of the full request (model, system prompt, messages,
+                    tool schema, tool_choice, max_tokens), LRU-evicted once it
+                    grows past max_bytes
+  CachedClient    — stands in for anthropic.Anthropic: answers repeated
+                    requests from the cache, paces the rest through a bucket
+                    and tallies token usage (incl. prompt-cache reads/writes)
+  RetryPolicy,
+  CircuitBreaker  — jittered exponential backoff (honouring retry-after) for
+                    429/529/5xx/connection errors, and a breaker that stops
+                    calling after repeated consecutive failures
+  cached_system   — system prompt block carrying a prompt-cache breakpoint
+  run_message_batch — send many requests as one Message Batch, resumable
+                    from a persisted batch id
+
+Usage:
+    from llm_client import CachedClient, ResponseCache, TokenBucket
+    client = CachedClient(anthropic.Anthropic(), ResponseCache(), TokenBucket(2.0))
+    client.messages.create(model=..., messages=[...])   # API call, then cached
+    client.messages.create(model=..., messages=[...])   # served from disk
+
+    ResponseCache(enabled=False)   # --no-cache: never read or write
+    ResponseCache(refresh=True)    # --refresh: always call, overwrite entry
+"""
+
+import email.utils
+import hashlib
+import json
+import logging
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+import anthropic
+
+logger = logging.getLogger(__name__)
+
+LLM_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "runs", ".cache", "llm")
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+EVICT_TO_FRACTION = 0.9  # eviction frees down to this share of max_bytes, so it rescans rarely
+
+
+# ---------------------------------------------------------------------------
+# Rate limiting
+# ---------------------------------------------------------------------------
+
+class TokenBucket:
+    """Thread-safe token bucket: up to *capacity* immediate acquisitions, refilled at *rate*/s."""
+
+    def __init__(self, rate: float, capacity: int = 1):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available, then take it."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+# ---------------------------------------------------------------------------
+# Retries and circuit breaking
+# ---------------------------------------------------------------------------
+# Transient failures (429 rate limits, 529 overloaded, 5xx, timeouts and
+# dropped connections) are retried with full-jitter exponential backoff,
+# never sooner than a retry-after header asks. Consecutive failures across
+# all threads trip a circuit breaker, so a run facing an outage stops after
+# a handful of calls instead of every worker backing off for minutes.
+
+RETRY_MAX_ATTEMPTS = 6
+RETRY_BASE_SECONDS = 1.0
+RETRY_MAX_SECONDS = 60.0
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504, 529}
+
+CIRCUIT_FAILURE_THRESHOLD = 5
+CIRCUIT_RESET_SECONDS = 60.0
+
+
+class CircuitOpenError(anthropic.AnthropicError):
+    """Raised instead of calling the API while the circuit breaker is open."""
+
+
+def _is_retryable(error: Exception) -> bool:
+    if isinstance(error, anthropic.APIConnectionError):  # includes APITimeoutError
+        return True
+    return isinstance(error, anthropic.APIStatusError) and error.status_code in RETRYABLE_STATUS
+
+
+def _retry_after_seconds(error: Exception) -> float | None:
+    """Delay requested by the response's retry-after(-ms) header, if any."""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    headers = response.headers
+    try:
+        if "retry-after-ms" in headers:
+            return float(headers["retry-after-ms"]) / 1000
+        if "retry-after" in headers:
+            value = headers["retry-after"]
+            try:
+                return float(value)
+            except ValueError:
+                return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        pass
+    return None
+
+
+class RetryPolicy:
+    """Which errors to retry, how many times, and how long to wait between attempts."""
+
+    def __init__(self, max_attempts: int | None = None, base: float | None = None, cap: float | None = None):
+        self.max_attempts = max_attempts or RETRY_MAX_ATTEMPTS
+        self.base = RETRY_BASE_SECONDS if base is None else base
+        self.cap = RETRY_MAX_SECONDS if cap is None else cap
+
+    def should_retry(self, attempt: int, error: Exception) -> bool:
+        return attempt < self.max_attempts and _is_retryable(error)
+
+    def delay(self, attempt: int, error: Exception) -> float:
+        """Full-jitter backoff for *attempt* (1-based), raised to any retry-after."""
+        backoff = random.uniform(0, min(self.cap, self.base * 2 ** (attempt - 1)))
+        retry_after = _retry_after_seconds(error)
+        return backoff if retry_after is None else max(backoff, retry_after)
+
+
+class CircuitBreaker:
+    """Opens after *threshold* consecutive failures; lets one probe through after *reset_seconds*."""
+
+    def __init__(self, threshold: int | None = None, reset_seconds: float | None = None):
+        self.threshold = threshold or CIRCUIT_FAILURE_THRESHOLD
+        self.reset_seconds = CIRCUIT_RESET_SECONDS if reset_seconds is None else reset_seconds
+        self._failures = 0
+        self._opened_at: float | None = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def before_call(self) -> bool:
+        """Admit a call or raise CircuitOpenError; True when the call is the half-open probe."""
+        with self._lock:
+            if self._opened_at is None:
+                return False
+            if self._probing or time.monotonic() - self._opened_at < self.reset_seconds:
+                raise CircuitOpenError(
+                    f"circuit open after {self._failures} consecutive API failures; not calling"
+                )
+            self._probing = True  # half-open: this call decides
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self, probe: bool = False):
+        """Count a failed call; *probe* marks the half-open probe, whose failure reopens at once."""
+        with self._lock:
+            self._failures += 1
+            if probe or self._failures >= self.threshold:
+                if self._opened_at is None or probe:
+                    logger.error(f"Circuit breaker open after {self._failures} consecutive API failures")
+                self._opened_at = time.monotonic()
+            if probe:
+                self._probing = False
+
+    def release_probe(self):
+        """End the probe when it recorded no outcome, so the next call may probe again.
+
+        Only the call before_call admitted as the probe may release it; a call
+        already in flight when the circuit opened must not.
+        """
+        with self._lock:
+            self._probing = False
+
+
+# ---------------------------------------------------------------------------
+# Response cache
+# ---------------------------------------------------------------------------
+
+def request_key(request: dict) -> str:
+    """Stable hash of a messages.create request."""
+    payload = json.dumps(request, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """Content-addressed store of Message responses with LRU size eviction."""
+
+    def __init__(self, cache_dir: str | None = None, max_bytes: int = DEFAULT_MAX_BYTES,
+                 enabled: bool = True, refresh: bool = False):
+        self.cache_dir = cache_dir or LLM_CACHE_DIR
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self.refresh = refresh
+        self.hits = 0
+        self.misses = 0
+        self._size: int | None = None  # total bytes on disk, scanned lazily
+        self._lock = threading.Lock()
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def get(self, key: str) -> anthropic.types.Message | None:
+        if not self.enabled or self.refresh:
+            return None
+        path = self.path(key)
+        try:
+            with open(path) as f:
+                message = anthropic.types.Message.model_validate_json(f.read())
+        except FileNotFoundError:
+            return None
+        except ValueError as e:
+            logger.warning(f"Discarding unreadable LLM cache entry {key[:12]}: {e}")
+            return None
+        os.utime(path)  # recency for eviction
+        return message
+
+    def put(self, key: str, message: anthropic.types.Message) -> None:
+        if not self.enabled:
+            return
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        data = message.model_dump_json()
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(data)
+        with self._lock:
+            old = os.path.getsize(path) if os.path.exists(path) else 0
+            os.replace(tmp_path, path)
+            if self._size is not None:
+                self._size += os.path.getsize(path) - old
+            self._evict()
+
+    def _entries(self) -> list[tuple[float, int, str]]:
+        entries = []
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if name.endswith(".json"):
+                    p = os.path.join(root, name)
+                    st = os.stat(p)
+                    entries.append((st.st_mtime, st.st_size, p))
+        return entries
+
+    def _evict(self) -> None:
+        """Once the cache grows past max_bytes, drop least recently used entries
+        until it is back under EVICT_TO_FRACTION of it.
+
+        The size is tracked across puts; the directory is scanned once per
+        instance and then only when an eviction is due.
+        """
+        if self._size is None:
+            self._size = sum(size for _, size, _ in self._entries())
+        if self._size <= self.max_bytes:
+            return
+        entries = sorted(self._entries())
+        self._size = sum(size for _, size, _ in entries)
+        target = self.max_bytes * EVICT_TO_FRACTION
+        for _, size, p in entries:
+            if self._size <= target:
+                break
+            os.remove(p)
+            self._size -= size
+            logger.info(f"Evicted LLM cache entry {os.path.basename(p)[:12]}")
+
+    def record(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+
+# ---------------------------------------------------------------------------
+# Prompt caching
+# ---------------------------------------------------------------------------
+# The API renders tools, then system, then messages. A breakpoint on the last
+# system block therefore caches the tool schemas and the system prompt as one
+# prefix; every call that shares both reads it back at a fraction of the input
+# price. Prefixes below the model's minimum cacheable length are simply not
+# cached (usage then shows no cache reads or writes).
+
+def cached_system(text: str) -> list[dict]:
+    """System prompt as a single text block ending in a cache breakpoint."""
+    return [{"type": "text", "text": text, "cache_control": {"type": "ephemeral"}}]
+
+
+def _cached_prefix_key(request: dict) -> str | None:
+    system = request.get("system")
+    if not isinstance(system, list) or not any("cache_control" in b for b in system):
+        return None
+    return request_key({k: request.get(k) for k in ("model", "tools", "system")})
+
+
+def format_usage(usage) -> str:
+    read = getattr(usage, "cache_read_input_tokens", None) or 0
+    write = getattr(usage, "cache_creation_input_tokens", None) or 0
+    return (f"{usage.input_tokens} in, {read} cache read, {write} cache write, "
+            f"{usage.output_tokens} out")
+
+
+class UsageTally:
+    """Token usage summed over the API calls a client actually made."""
+
+    def __init__(self):
+        self.calls = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.cache_read_tokens = 0
+        self.cache_write_tokens = 0
+        self._lock = threading.Lock()
+
+    def add(self, usage) -> None:
+        with self._lock:
+            self.calls += 1
+            self.input_tokens += usage.input_tokens
+            self.output_tokens += usage.output_tokens
+            self.cache_read_tokens += getattr(usage, "cache_read_input_tokens", None) or 0
+            self.cache_write_tokens += getattr(usage, "cache_creation_input_tokens", None) or 0
+
+    def __str__(self) -> str:
+        return (f"{self.calls} call(s): {self.input_tokens} in, {self.cache_read_tokens} cache read, "
+                f"{self.cache_write_tokens} cache write, {self.output_tokens} out")
+
+
+# ---------------------------------------------------------------------------
+# Client wrapper
+# ---------------------------------------------------------------------------
+
+class _CachedMessages:
+    def __init__(self, owner: "CachedClient"):
+        self._owner = owner
+
+    def create(self, **request) -> anthropic.types.Message:
+        return self._cached(request, lambda: self._owner.call(self._owner.client.messages.create, **request))
+
+    def create_streaming(self, on_tool_input=None, **request) -> anthropic.types.Message:
+        """messages.create over the streaming API; returns the final Message.
+
+        *on_tool_input* is called with the tool input parsed so far after
+        every input_json delta. An exception it raises closes the stream and
+        propagates (it is not retried, and nothing is cached). Cache hits
+        return at once, without callbacks.
+        """
+        def stream() -> anthropic.types.Message:
+            with self._owner.client.messages.stream(**request) as events:
+                for event in events:
+                    if event.type == "input_json" and on_tool_input is not None:
+                        on_tool_input(event.snapshot)
+                return events.get_final_message()
+
+        return self._cached(request, lambda: self._owner.call(stream))
+
+    def _cached(self, request: dict, call) -> anthropic.types.Message:
+        owner = self._owner
+        key = request_key(request)
+        message = owner.cache.get(key)
+        owner.cache.record(message is not None)
+        owner._local.cached = message is not None
+        if message is not None:
+            logger.info(f"LLM cache hit ({request.get('model')}, {key[:12]})")
+            return message
+        with owner._warm_prefix(_cached_prefix_key(request)):
+            message = call()
+        owner.usage.add(message.usage)
+        owner.cache.put(key, message)
+        return message
+
+
+class CachedClient:
+    """Stands in for anthropic.Anthropic where only messages.create is used
+    (plus messages.create_streaming, the same call over the streaming API).
+
+    Cache hits return immediately; only real API calls wait on *limiter*,
+    count against *max_in_flight* and go through the retry policy and
+    circuit breaker. The first call for each prompt-cached prefix runs
+    alone, so concurrent callers read the prefix it wrote instead of all
+    writing it at once.
+    """
+
+    def __init__(
+        self,
+        client,
+        cache: ResponseCache | None = None,
+        limiter: TokenBucket | None = None,
+        max_in_flight: int | None = None,
+        retry: RetryPolicy | None = None,
+        breaker: CircuitBreaker | None = None,
+    ):
+        if hasattr(client, "with_options"):
+            client = client.with_options(max_retries=0)  # retries happen in call()
+        self.client = client
+        self.cache = cache or ResponseCache(enabled=False)
+        self.limiter = limiter
+        self.retry = retry or RetryPolicy()
+        self.breaker = breaker or CircuitBreaker()
+        self._in_flight = threading.BoundedSemaphore(max_in_flight) if max_in_flight else None
+        self.usage = UsageTally()
+        self.messages = _CachedMessages(self)
+        self._warmed: dict[str, threading.Event] = {}
+        self._warm_lock = threading.Lock()
+        self._local = threading.local()
+
+    def served_from_cache(self) -> bool:
+        """Whether this thread's last messages.create was answered from the response cache."""
+        return getattr(self._local, "cached", False)
+
+    def call(self, fn, *args, paced: bool = True, **kwargs):
+        """Call *fn* against the API with retries, backoff and circuit breaking.
+
+        *paced* calls also wait on the rate limiter; batch bookkeeping
+        (create/retrieve/results) passes paced=False.
+        """
+        attempt = 0
+        while True:
+            attempt += 1
+            probe = self.breaker.before_call()
+            if paced and self.limiter:
+                self.limiter.acquire()
+            try:
+                if self._in_flight:
+                    with self._in_flight:
+                        result = fn(*args, **kwargs)
+                else:
+                    result = fn(*args, **kwargs)
+            except anthropic.AnthropicError as e:
+                if not _is_retryable(e):
+                    self.breaker.record_success()  # the API answered; the request itself was rejected
+                    raise
+                self.breaker.record_failure(probe)
+                if not self.retry.should_retry(attempt, e):
+                    raise
+                delay = self.retry.delay(attempt, e)
+                logger.warning(f"API call failed ({e.__class__.__name__}: {e}); "
+                               f"retry {attempt}/{self.retry.max_attempts - 1} in {delay:.1f}s")
+                time.sleep(delay)
+                continue
+            finally:
+                # Any other exception (e.g. a stream callback aborting) leaves no outcome
+                if probe:
+                    self.breaker.release_probe()
+            self.breaker.record_success()
+            return result
+
+    @contextmanager
+    def _warm_prefix(self, prefix: str | None):
+        if prefix is None:
+            yield
+            return
+        with self._warm_lock:
+            event = self._warmed.get(prefix)
+            first = event is None
+            if first:
+                event = self._warmed[prefix] = threading.Event()
+        if not first:
+            event.wait()
+        try:
+            yield
+        finally:
+            if first:
+                event.set()
+
+
+# ---------------------------------------------------------------------------
+# Message Batches
+# ---------------------------------------------------------------------------
+# Lifecycle: answer what the response cache already has, submit the rest as
+# one batch and persist its id, poll until it has ended, then stream the
+# results back (caching each). The state file is removed once the results
+# are consumed; while it exists, a rerun with the same requests resumes the
+# same batch instead of submitting (and paying for) a new one.
+
+BATCH_POLL_SECONDS = 30.0
+
+
+def _write_state(path: str, state: dict) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def run_message_batch(
+    client: CachedClient,
+    requests: dict[str, dict],
+    state_path: str,
+    poll_seconds: float | None = None,
+) -> dict[str, anthropic.types.Message]:
+    """Run *requests* (custom_id → messages.create params) as one Message Batch.
+
+    Returns custom_id → Message for every request that succeeded; errored,
+    canceled and expired requests are logged and left out.
+    """
+    results: dict[str, anthropic.types.Message] = {}
+    keys: dict[str, str] = {}
+    for custom_id, params in requests.items():
+        key = request_key(params)
+        message = client.cache.get(key)
+        client.cache.record(message is not None)
+        if message is not None:
+            results[custom_id] = message
+        else:
+            keys[custom_id] = key
+    if results:
+        logger.info(f"Batch: {len(results)} request(s) answered from the LLM cache")
+    if not keys:
+        if os.path.exists(state_path):
+            os.remove(state_path)
+        return results
+
+    batches = client.client.messages.batches
+    state = None
+    if os.path.exists(state_path):
+        with open(state_path) as f:
+            state = json.load(f)
+    if state and state.get("requests") == keys:
+        batch_id = state["batch_id"]
+        logger.info(f"Batch: resuming {batch_id} ({len(keys)} request(s))")
+    else:
+        if state:
+            logger.warning(f"Batch: inputs changed since {state.get('batch_id')} was submitted; submitting a new batch")
+        batch = client.call(batches.create, paced=False, requests=[
+            {"custom_id": custom_id, "params": requests[custom_id]} for custom_id in keys
+        ])
+        batch_id = batch.id
+        _write_state(state_path, {"batch_id": batch_id, "requests": keys})
+        logger.info(f"Batch: submitted {batch_id} ({len(keys)} request(s)) → {state_path}")
+
+    while True:
+        batch = client.call(batches.retrieve, batch_id, paced=False)
+        if batch.processing_status == "ended":
+            break
+        counts = batch.request_counts
+        logger.info(f"Batch: {batch_id} {batch.processing_status} "
+                    f"({counts.processing} processing, {counts.succeeded} succeeded, {counts.errored} errored)")
+        time.sleep(poll_seconds or BATCH_POLL_SECONDS)
+
+    for entry in client.call(batches.results, batch_id, paced=False):
+        if entry.custom_id not in keys:
+            continue
+        if entry.result.type != "succeeded":
+            logger.error(f"Batch: request {entry.custom_id} {entry.result.type}")
+            continue
+        message = entry.result.message
+        results[entry.custom_id] = message
+        client.usage.add(message.usage)
+        client.cache.put(keys[entry.custom_id], message)
+
+    os.remove(state_path)
+    return results
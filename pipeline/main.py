@@ -9,15 +9,21 @@ Usage:
 
 import argparse
 import hashlib
+import inspect
 import json
 import logging
 import os
 import re
+import shutil
 import sys
+from bisect import bisect_left
 from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 
-import fitz  # PyMuPDF
-import pdfplumber
+import pdf_backends
+from node_store import open_nodes, store_path_for, write_node_store
+from pdf_backends import BACKENDS, DEFAULT_BACKEND, open_pdf
 
 logging.basicConfig(
     level=logging.INFO,
@@ -27,6 +33,7 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 RUNS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "runs")
+CACHE_DIR = os.path.join(RUNS_DIR, ".cache")
 
 
 # ---------------------------------------------------------------------------
@@ -52,25 +59,34 @@ def generate_uid(text: str) -> str:
 # ---------------------------------------------------------------------------
 
 class PDFScraper:
-    def __init__(self, pdf_path: str, run_dir: str):
+    def __init__(self, pdf_path: str, run_dir: str, workers: int = 1,
+                 backend: str = DEFAULT_BACKEND):
         self.pdf_path = os.path.abspath(pdf_path)
         self.run_dir = run_dir
+        self.workers = workers
+        self.backend = backend
         self.results: list[dict] = []
-        self.pdf_doc = None
         self.boilerplate: set = set()
 
     # --- boilerplate (header/footer) detection --------------------------------
 
-    def build_boilerplate_map(self, sample_limit: int = 15):
-        """Identifies text that appears at the same vertical position across pages."""
+    def build_boilerplate_map(self, sample_limit: int = 15, pages: list | None = None):
+        """Identifies text that appears at the same vertical position across pages.
+
+        Pass the already-open document's ``pages`` to reuse its parsed page
+        objects; otherwise the PDF is opened just for sampling.
+        """
+        if pages is None:
+            with open_pdf(self.pdf_path, self.backend) as pdf:
+                return self.build_boilerplate_map(sample_limit, pdf.pages)
+
         y_text_map = Counter()
-        with pdfplumber.open(self.pdf_path) as pdf:
-            sample_pages = pdf.pages[:sample_limit]
-            for page in sample_pages:
-                words = page.extract_words()
-                for w in words:
-                    key = (w["text"].strip(), round(w["top"], 0))
-                    y_text_map[key] += 1
+        sample_pages = pages[:sample_limit]
+        for page in sample_pages:
+            words = page.extract_words()
+            for w in words:
+                key = (w["text"].strip(), round(w["top"], 0))
+                y_text_map[key] += 1
 
         threshold = len(sample_pages) * 0.4
         self.boilerplate = {k for k, c in y_text_map.items() if c >= threshold}
@@ -96,14 +112,53 @@ class PDFScraper:
 
     def scrape(self) -> list[dict]:
         logger.info("=== Starting PDF Scraper ===")
-        logger.info(f"Input PDF: {self.pdf_path}")
+        logger.info(f"Input PDF: {self.pdf_path} (backend: {self.backend})")
 
         if not os.path.exists(self.pdf_path):
             raise FileNotFoundError(self.pdf_path)
 
-        self.build_boilerplate_map()
-        self.pdf_doc = fitz.open(self.pdf_path)
+        # One parse of the document serves both boilerplate sampling and
+        # line extraction; the sampled pages keep their cached chars.
+        with open_pdf(self.pdf_path, self.backend) as pdf:
+            self.build_boilerplate_map(pages=pdf.pages)
+
+            if self.workers > 1:
+                lines = self._extract_lines_parallel(len(pdf.pages))
+            else:
+                lines = []
+                for page_num_1idx, page in enumerate(pdf.pages, start=1):
+                    lines.extend(_page_line_records(page, page_num_1idx, self.boilerplate))
+                    page.close()  # drop the page's cached layout objects
+
+        self._replay_lines(lines)
 
+        logger.info(f"Extracted {len(self.results)} text nodes.")
+        return self.results
+
+    def _extract_lines_parallel(self, page_count: int) -> list[dict]:
+        """Extract line records in a process pool, returned in page order.
+
+        Pages are split into contiguous chunks (a few per worker so that slow
+        pages don't stall the pool); ``executor.map`` preserves chunk order, so
+        concatenating the results gives the same stream as a serial walk.
+        """
+        n_chunks = min(page_count, self.workers * 4)
+        chunk_size = -(-page_count // n_chunks) if n_chunks else 1
+        starts = list(range(1, page_count + 1, chunk_size))
+        stops = [min(s + chunk_size, page_count + 1) for s in starts]
+        logger.info(f"Extracting {page_count} pages with {self.workers} workers ({len(starts)} chunks)")
+
+        lines: list[dict] = []
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            for chunk in pool.map(
+                _extract_page_range,
+                repeat(self.pdf_path), starts, stops, repeat(self.boilerplate), repeat(self.backend),
+            ):
+                lines.extend(chunk)
+        return lines
+
+    def _replay_lines(self, lines: list[dict]):
+        """Run the rule-code state machine over an ordered stream of line records."""
         # Hierarchical rule state & text-block buffer
         state = {"part": "", "main": "", "digit": "", "alpha": "", "roman": ""}
         buffer = {
@@ -146,74 +201,98 @@ class PDFScraper:
             buffer["text_parts"] = []
             buffer["bbox"] = None
 
-        with pdfplumber.open(self.pdf_path) as pdf:
-            for page_num_1idx, page in enumerate(pdf.pages, start=1):
-                h = page.height
-                lines = page.extract_text_lines(layout=True, strip=True)
-
-                for line in lines:
-                    text = line["text"].strip()
-                    if not text:
-                        continue
-
-                    # Boilerplate & margin filtering
-                    if (text, round(line["top"], 0)) in self.boilerplate:
-                        continue
-                    if line["top"] < (h * 0.05) or line["bottom"] > (h * 0.93):
-                        continue
-
-                    marker_level, marker_pat = self.is_rule_marker(text)
-
-                    is_note = text.lower().startswith("note:")
-                    is_new_sentence_block = text[0].isupper() and (
-                        not buffer["text_parts"]
-                        or buffer["text_parts"][-1].endswith((".", ";", ":"))
-                    )
-
-                    if marker_level or is_note or is_new_sentence_block:
-                        flush_buffer()
-
-                        buffer["page"] = page_num_1idx
-                        first_char = line["chars"][0] if line["chars"] else {}
-                        buffer["style"] = {
-                            "size": round(first_char.get("size", 0), 1),
-                            "bold": "bold" in first_char.get("fontname", "").lower(),
-                            "italic": "italic" in first_char.get("fontname", "").lower(),
-                        }
-
-                        if marker_level:
-                            match = re.match(marker_pat, text)
-                            m_val = match.group(0)
-                            levels = ["part", "main", "digit", "alpha", "roman"]
-                            start_idx = levels.index(marker_level)
-                            for lvl in levels[start_idx:]:
-                                state[lvl] = ""
-                            state[marker_level] = m_val
-
-                            code = state["main"] + state["digit"] + state["alpha"] + state["roman"]
-                            buffer["rule_code"] = code if code else state["part"]
-                            text = text[match.end():].strip()
-                        else:
-                            buffer["rule_code"] = ""
-
-                    # Accumulate text & expand bounding box
-                    buffer["text_parts"].append(text)
-                    l_bbox = [line["x0"], line["top"], line["x1"], line["bottom"]]
-                    if buffer["bbox"] is None:
-                        buffer["bbox"] = l_bbox
-                    else:
-                        buffer["bbox"] = [
-                            min(buffer["bbox"][0], l_bbox[0]),
-                            min(buffer["bbox"][1], l_bbox[1]),
-                            max(buffer["bbox"][2], l_bbox[2]),
-                            max(buffer["bbox"][3], l_bbox[3]),
-                        ]
-
-            flush_buffer()
-
-        self.pdf_doc.close()
-        logger.info(f"Extracted {len(self.results)} text nodes.")
-        return self.results
+        for line in lines:
+            text = line["text"]
+            marker_level, marker_pat = self.is_rule_marker(text)
+
+            is_note = text.lower().startswith("note:")
+            is_new_sentence_block = text[0].isupper() and (
+                not buffer["text_parts"]
+                or buffer["text_parts"][-1].endswith((".", ";", ":"))
+            )
+
+            if marker_level or is_note or is_new_sentence_block:
+                flush_buffer()
+
+                buffer["page"] = line["page"]
+                buffer["style"] = {
+                    "size": round(line["size"], 1),
+                    "bold": "bold" in line["fontname"].lower(),
+                    "italic": "italic" in line["fontname"].lower(),
+                }
+
+                if marker_level:
+                    match = re.match(marker_pat, text)
+                    m_val = match.group(0)
+                    levels = ["part", "main", "digit", "alpha", "roman"]
+                    start_idx = levels.index(marker_level)
+                    for lvl in levels[start_idx:]:
+                        state[lvl] = ""
+                    state[marker_level] = m_val
+
+                    code = state["main"] + state["digit"] + state["alpha"] + state["roman"]
+                    buffer["rule_code"] = code if code else state["part"]
+                    text = text[match.end():].strip()
+                else:
+                    buffer["rule_code"] = ""
+
+            # Accumulate text & expand bounding box
+            buffer["text_parts"].append(text)
+            l_bbox = [line["x0"], line["top"], line["x1"], line["bottom"]]
+            if buffer["bbox"] is None:
+                buffer["bbox"] = l_bbox
+            else:
+                buffer["bbox"] = [
+                    min(buffer["bbox"][0], l_bbox[0]),
+                    min(buffer["bbox"][1], l_bbox[1]),
+                    max(buffer["bbox"][2], l_bbox[2]),
+                    max(buffer["bbox"][3], l_bbox[3]),
+                ]
+
+        flush_buffer()
+
+
+def _page_line_records(page, page_num: int, boilerplate: set) -> list[dict]:
+    """Extract the text lines of one page as plain, picklable records.
+
+    Boilerplate and header/footer-margin lines are dropped here so that only
+    content lines cross the process boundary in parallel mode.
+    """
+    h = page.height
+    records = []
+    for line in page.extract_text_lines(layout=True, strip=True):
+        text = line["text"].strip()
+        if not text:
+            continue
+
+        # Boilerplate & margin filtering
+        if (text, round(line["top"], 0)) in boilerplate:
+            continue
+        if line["top"] < (h * 0.05) or line["bottom"] > (h * 0.93):
+            continue
+
+        first_char = line["chars"][0] if line["chars"] else {}
+        records.append({
+            "page": page_num,
+            "text": text,
+            "x0": line["x0"],
+            "top": line["top"],
+            "x1": line["x1"],
+            "bottom": line["bottom"],
+            "fontname": first_char.get("fontname", ""),
+            "size": first_char.get("size", 0),
+        })
+    return records
+
+
+def _extract_page_range(pdf_path: str, start: int, stop: int, boilerplate: set,
+                        backend: str = DEFAULT_BACKEND) -> list[dict]:
+    """Process-pool worker: line records for 1-indexed pages [start, stop)."""
+    records = []
+    with open_pdf(pdf_path, backend) as pdf:
+        for page_num in range(start, stop):
+            records.extend(_page_line_records(pdf.pages[page_num - 1], page_num, boilerplate))
+    return records
 
 
 # ---------------------------------------------------------------------------
@@ -248,25 +327,172 @@ def assign_top_level(nodes: list[dict], top_level_indent: float = 90.0, toleranc
 # Reference linker
 # ---------------------------------------------------------------------------
 
-REF_PATTERN = re.compile(r"(\d+(?:\.\d+)+(?:\([a-zA-Z0-9]+\))*|\([a-zA-Z0-9]+\))")
+# A full code ("4.4.3(5)(a)") or a bare bracket chain ("(a)", "(2)(b)") that
+# is not glued to a neighbouring word or number (the "(1)" in "s 5(1)", the
+# "2.1.2" in "2.1.2A").
+REF_PATTERN = re.compile(
+    r"(?<![\w.)])"
+    r"(\d+(?:\.\d+)+(?!\.?[A-Za-z0-9])(?:\([a-zA-Z0-9]+\))*|\([a-zA-Z0-9]+\)(?:\([a-zA-Z0-9]+\))*)"
+)
+# Text between two references that makes the second one a continuation of
+# the first: "4.3.2(1) and (2)", "4.9.1 to 4.9.3", "(1)–(7)".
+REF_LIST_SEP_RE = re.compile(r"^\s*(?:,|and|or|to|-|–)?\s*(?:and|or)?\s*$")
+REF_RANGE_SEP_RE = re.compile(r"^\s*(?:to|-|–)\s*$")
+REF_SEGMENT_RE = re.compile(r"\([A-Za-z0-9]+\)|[A-Za-z0-9]+")
+
 
+def _code_segments(code: str) -> tuple[str, ...]:
+    """'4.9.1(2)(a)' → ('4', '9', '1', '(2)', '(a)').
 
-def link_references(nodes: list[dict]):
-    """Find cross-references between nodes and store them on each node."""
-    # Build map: normalised rule_code -> uid
-    rule_map: dict[str, str] = {}
-    for n in nodes:
-        if n.get("rule_code"):
-            normalised = n["rule_code"].replace(".", "_").replace("(", "_").replace(")", "").strip("_")
-            rule_map[normalised] = n["uid"]
+    Bracketed segments keep their brackets so "(2)" never resolves to the
+    dotted sibling "4.1.2".
+    """
+    return tuple(REF_SEGMENT_RE.findall(code))
 
-    for node in nodes:
-        refs = set()
-        for match in REF_PATTERN.findall(node["text"]):
-            clean = match.replace(".", "_").replace("(", "_").replace(")", "").strip("_")
-            if clean in rule_map and rule_map[clean] != node["uid"]:
-                refs.add(rule_map[clean])
-        node["outgoing_references"] = list(refs)
+
+class _CodeTrieNode:
+    __slots__ = ("children", "target", "parent", "segments")
+
+    def __init__(self, parent=None, segments: tuple[str, ...] = ()):
+        self.children: dict[str, "_CodeTrieNode"] = {}  # insertion = document order
+        self.target: int | None = None  # position in nodes of the rule's first node
+        self.parent = parent
+        self.segments = segments
+
+
+class ReferenceIndex:
+    """Cross-reference graph over the nodes of one document.
+
+    Every rule code is compiled once into a segment trie, so each reference
+    in the text is resolved with one walk of its segments; the whole pass is
+    linear in the text. On top of exact codes it resolves:
+
+      * ranges — "4.9.1 to 4.9.3", "(1)–(7)" link every sibling in between;
+      * partial codes — "(a)" or "(2)(b)" relative to the code they continue
+        ("4.3.2(1) and (2)") or, failing that, to the node's own rule
+        (trying its own children first, then each ancestor's).
+
+    ``outgoing[i]`` / ``incoming[i]`` hold node positions (deterministic:
+    first-mention order and document order respectively).
+    """
+
+    def __init__(self, nodes: list[dict]):
+        self.nodes = nodes
+        self._root = _CodeTrieNode()
+        self._build_trie()
+        self.outgoing: list[list[int]] = [[] for _ in nodes]
+        self.incoming: list[list[int]] = [[] for _ in nodes]
+        self._link_all()
+
+    # --- rule map ---------------------------------------------------------
+
+    def _build_trie(self):
+        valid = _filter_sequential_rule_codes(self.nodes)
+        valid_target: set[int] = set()
+        for pos, n in enumerate(self.nodes):
+            rc = n.get("rule_code")
+            if not rc:
+                continue
+            trie_node = self._insert(_code_segments(rc))
+            is_valid = n["node_index"] in valid
+            # First occurrence wins (continuation paragraphs share the code),
+            # but an in-sequence occurrence beats a scraper false positive.
+            if trie_node.target is None or (is_valid and trie_node.target not in valid_target):
+                trie_node.target = pos
+                if is_valid:
+                    valid_target.add(pos)
+
+    def _insert(self, segments: tuple[str, ...]) -> _CodeTrieNode:
+        node = self._root
+        for i, seg in enumerate(segments):
+            child = node.children.get(seg)
+            if child is None:
+                child = node.children[seg] = _CodeTrieNode(node, segments[:i + 1])
+            node = child
+        return node
+
+    def _find(self, segments: tuple[str, ...], base: _CodeTrieNode | None = None) -> _CodeTrieNode | None:
+        node = base or self._root
+        for seg in segments:
+            node = node.children.get(seg)
+            if node is None:
+                return None
+        return node
+
+    def _find_relative(self, segments: tuple[str, ...], anchor: _CodeTrieNode | None) -> _CodeTrieNode | None:
+        """Resolve a bracket-only reference under *anchor* or its nearest ancestor."""
+        while anchor is not None and anchor is not self._root:
+            found = self._find(segments, anchor)
+            if found is not None and found.target is not None:
+                return found
+            anchor = anchor.parent
+        return None
+
+    # --- linking ------------------------------------------------------------
+
+    def _link_all(self):
+        context: _CodeTrieNode | None = None
+        for pos, n in enumerate(self.nodes):
+            if n.get("rule_code"):
+                context = self._find(_code_segments(n["rule_code"]))
+            targets: dict[int, None] = {}  # ordered set
+            prev: _CodeTrieNode | None = None
+            prev_end = 0
+            for m in REF_PATTERN.finditer(n["text"]):
+                code = m.group(1)
+                between = n["text"][prev_end:m.start()]
+                continues = prev is not None and REF_LIST_SEP_RE.match(between)
+                if code[0] == "(":
+                    anchor = prev if continues else context
+                    found = self._find_relative(_code_segments(code), anchor)
+                else:
+                    found = self._find(_code_segments(code))
+                if found is not None and found.target is not None:
+                    if continues and REF_RANGE_SEP_RE.match(between):
+                        for sibling in self._range(prev, found):
+                            targets[sibling] = None
+                    targets[found.target] = None
+                    prev = found
+                else:
+                    prev = None
+                prev_end = m.end()
+
+            targets.pop(pos, None)
+            self.outgoing[pos] = list(targets)
+        for pos, targets in enumerate(self.outgoing):
+            for t in targets:
+                self.incoming[t].append(pos)
+
+    @staticmethod
+    def _range(start: _CodeTrieNode, end: _CodeTrieNode) -> list[int]:
+        """Targets of the siblings from *start* to *end* inclusive (document order)."""
+        if start.parent is not end.parent:
+            return [start.target]
+        targets = sorted(s.target for s in start.parent.children.values() if s.target is not None)
+        i, j = targets.index(start.target), targets.index(end.target)
+        return targets[i:j + 1] if i <= j else [start.target]
+
+    def resolve(self, code: str, context: str = "") -> int | None:
+        """Position of the node a reference like '4.9.1' or '(a)' points at."""
+        if code.startswith("("):
+            found = self._find_relative(_code_segments(code), self._find(_code_segments(context)))
+        else:
+            found = self._find(_code_segments(code))
+        return found.target if found is not None else None
+
+
+def link_references(nodes: list[dict]) -> ReferenceIndex:
+    """Find cross-references between nodes and store them on each node.
+
+    Sets ``outgoing_references`` (uids in first-mention order) and
+    ``incoming_references`` (uids in document order) and returns the index.
+    """
+    index = ReferenceIndex(nodes)
+    for pos, node in enumerate(nodes):
+        # Nodes with identical text share a uid; keep each uid once, at its first position
+        node["outgoing_references"] = list(dict.fromkeys(nodes[t]["uid"] for t in index.outgoing[pos]))
+        node["incoming_references"] = list(dict.fromkeys(nodes[s]["uid"] for s in index.incoming[pos]))
+    return index
 
 
 # ---------------------------------------------------------------------------
@@ -278,6 +504,7 @@ RULE_CODE_RE = re.compile(
 )
 
 INDENT_TOLERANCE = 3.0  # px – x_indent values within this are treated as same level
+FWD_THRESHOLD = 3       # max stem ranks a rule_code can jump *ahead* and still count as in sequence
 
 
 def _normalise_group_id(dotted: str) -> str:
@@ -310,6 +537,13 @@ def _parse_rule_code(rule_code: str) -> tuple[str, list[str]]:
     return rc, brackets
 
 
+def _ancestor_prefixes(full_id: str) -> list[str]:
+    """'4_1_3_a' → ['4', '4_1', '4_1_3', '4_1_3_a']."""
+    prefixes = [full_id[:i] for i, ch in enumerate(full_id) if ch == "_"]
+    prefixes.append(full_id)
+    return prefixes
+
+
 def _indent_bucket(x: float, buckets: list[float]) -> int:
     """Return index of the closest bucket for *x*."""
     best = 0
@@ -376,7 +610,6 @@ def _filter_sequential_rule_codes(nodes: list[dict]) -> set[int]:
     # - A node is valid if  hwm <= rank <= hwm + FWD_THRESHOLD
     #   i.e. the stem hasn't gone backward and hasn't jumped too far forward.
     hwm = -1  # high-water-mark rank
-    FWD_THRESHOLD = 3  # max ranks a stem can jump *ahead*
 
     for n in nodes:
         rc = n.get("rule_code", "")
@@ -403,6 +636,16 @@ def build_groups(nodes: list[dict]) -> list[dict]:
     Returns a sorted list of group dicts ``{id, depth, first_node_index}``.
     No duplicate groups are created.
     """
+    return build_groups_with_spans(nodes)[0]
+
+
+def build_groups_with_spans(nodes: list[dict]) -> tuple[list[dict], dict[str, tuple[int, int]]]:
+    """build_groups() plus each group's member span for the SVG.
+
+    The span is the ``(first, last)`` node_index of the valid rule nodes
+    counted as the group's members in step 3; groups with no members have
+    no span.
+    """
 
     # --- 0. Filter out false-positive rule_codes from text references -------
     valid_nodes = _filter_sequential_rule_codes(nodes)
@@ -478,15 +721,20 @@ def build_groups(nodes: list[dict]) -> list[dict]:
     # Groups confirmed by indent structure are exempt — their children exist
     # but may have miscoded rule_codes (e.g. scraper flattening (b)(i) → (i))
     # so prefix-based membership counting would miss them.
+    # A node counts towards every group on its ancestor chain, i.e. every
+    # "_"-delimited prefix of its normalised code (plus the code itself).
     group_member_counts: dict[str, int] = {gid: 0 for gid in groups}
+    group_spans: dict[str, tuple[int, int]] = {}
     for node in nodes:
         rc = node.get("rule_code", "")
         if not rc or node["node_index"] not in valid_nodes:
             continue
         full = _normalise_full(rc)
-        for gid in group_member_counts:
-            if full == gid or full.startswith(gid + "_"):
-                group_member_counts[gid] += 1
+        ni = node["node_index"]
+        for prefix in _ancestor_prefixes(full):
+            if prefix in group_member_counts:
+                group_member_counts[prefix] += 1
+                group_spans[prefix] = (group_spans.get(prefix, (ni, ni))[0], ni)
 
     ROMAN_RE = re.compile(r"^[ivx]+$")
     for gid, count in list(group_member_counts.items()):
@@ -507,7 +755,41 @@ def build_groups(nodes: list[dict]) -> list[dict]:
     sorted_groups = sorted(groups.values(), key=lambda g: (g["first_node_index"], g["id"]))
 
     logger.info(f"Identified {len(sorted_groups)} JSON Forms groups.")
-    return sorted_groups
+    return sorted_groups, {gid: group_spans[gid] for gid in groups if gid in group_spans}
+
+
+def _text_node_record(node: dict) -> dict:
+    """The trimmed per-node fields carried into groups_enriched.json."""
+    return {
+        "node_index": node["node_index"],
+        "text": node["text"],
+        "rule_code": node.get("rule_code", ""),
+        "type": node.get("type", "TEXT"),
+        "is_bold": node.get("is_bold", False),
+        "is_italic": node.get("is_italic", False),
+    }
+
+
+def _group_node_ranges(nodes: list[dict], groups: list[dict]) -> list[tuple[int, int]]:
+    """Return a ``(start, end)`` slice of *nodes* for each group, in one pass.
+
+    A group's range ends at the first_node_index of the next group that is
+    not its descendant. Walking groups in order with a stack of open
+    ancestors finds every such boundary in O(G); node_index → position is
+    then a bisect, since nodes are ordered by node_index.
+    """
+    node_indices = [n["node_index"] for n in nodes]
+    ends = [len(nodes)] * len(groups)  # default: rest of document (as node_index)
+    open_groups: list[int] = []
+    for j, group in enumerate(groups):
+        while open_groups and not group["id"].startswith(groups[open_groups[-1]]["id"] + "_"):
+            ends[open_groups.pop()] = group["first_node_index"]
+        open_groups.append(j)
+
+    return [
+        (bisect_left(node_indices, g["first_node_index"]), bisect_left(node_indices, end))
+        for g, end in zip(groups, ends)
+    ]
 
 
 def enrich_groups_with_nodes(nodes: list[dict], groups: list[dict]) -> list[dict]:
@@ -518,46 +800,36 @@ def enrich_groups_with_nodes(nodes: list[dict], groups: list[dict]) -> list[dict
     first_node_index of the next group whose ID is NOT a descendant
     (i.e., doesn't start with group.id + "_").
 
-    Parent groups include ALL child nodes (including sub-groups).
+    Parent groups include ALL child nodes (including sub-groups). The node
+    records are built once and shared between the groups that contain them.
     """
+    records = [_text_node_record(n) for n in nodes]
     enriched = []
-    for i, group in enumerate(groups):
-        gid = group["id"]
-        start = group["first_node_index"]
-
-        # Find end boundary: first_node_index of next non-descendant group
-        end = len(nodes)  # default: rest of document
-        for j in range(i + 1, len(groups)):
-            next_gid = groups[j]["id"]
-            if not next_gid.startswith(gid + "_"):
-                end = groups[j]["first_node_index"]
-                break
-
-        # Collect nodes in range
-        text_nodes = []
-        for node in nodes:
-            ni = node["node_index"]
-            if ni < start:
-                continue
-            if ni >= end:
-                break
-            text_nodes.append({
-                "node_index": ni,
-                "text": node["text"],
-                "rule_code": node.get("rule_code", ""),
-                "type": node.get("type", "TEXT"),
-                "is_bold": node.get("is_bold", False),
-                "is_italic": node.get("is_italic", False),
-            })
-
+    for group, (start, end) in zip(groups, _group_node_ranges(nodes, groups)):
         enriched_group = dict(group)
-        enriched_group["text_nodes"] = text_nodes
+        enriched_group["text_nodes"] = records[start:end]
         enriched.append(enriched_group)
 
     logger.info(f"Enriched {len(enriched)} groups with text nodes.")
     return enriched
 
 
+def compact_enriched_groups(nodes: list[dict], groups: list[dict]) -> dict:
+    """Compact form of groups_enriched.json: one shared node table.
+
+    Each group carries ``node_range: [start, end)`` into ``nodes`` instead of
+    its own copy of the text. architect.load_enriched_groups() expands it.
+    """
+    ranges = _group_node_ranges(nodes, groups)
+    compact = {
+        "format": "compact",
+        "nodes": [_text_node_record(n) for n in nodes],
+        "groups": [dict(g, node_range=[start, end]) for g, (start, end) in zip(groups, ranges)],
+    }
+    logger.info(f"Enriched {len(groups)} groups with node ranges (compact).")
+    return compact
+
+
 def save_groups_json(groups: list[dict], run_dir: str) -> str:
     """Write groups.json to the run directory."""
     output_path = os.path.join(run_dir, "groups.json")
@@ -577,11 +849,16 @@ SVG_NODE_GAP = 2          # 1px line + 1px padding
 SVG_INDENT_SCALE = 1.0    # scale factor for x_indent in the node line area
 
 
-def build_svg(nodes: list[dict], groups: list[dict], run_dir: str) -> str:
-    """Create an SVG showing one horizontal line per node with group columns."""
+def build_svg(nodes: list[dict], groups: list[dict], run_dir: str,
+              group_spans: dict[str, tuple[int, int]] | None = None) -> str:
+    """Create an SVG showing one horizontal line per node with group columns.
 
-    # Filter out false-positive rule_codes (same filter used by build_groups)
-    valid_nodes = _filter_sequential_rule_codes(nodes)
+    *group_spans* comes from build_groups_with_spans(); when omitted (e.g. the
+    groups were loaded from groups.json) it is recomputed. Elements are
+    written to the file as they are generated.
+    """
+    if group_spans is None:
+        group_spans = build_groups_with_spans(nodes)[1]
 
     max_depth = max((g["depth"] for g in groups), default=0) + 1
     group_cols_width = SVG_LEFT_MARGIN + max_depth * SVG_COL_WIDTH + 10  # space for columns
@@ -592,26 +869,6 @@ def build_svg(nodes: list[dict], groups: list[dict], run_dir: str) -> str:
 
     total_height = len(nodes) * SVG_NODE_GAP + 20  # +20 for top/bottom padding
 
-    # Pre-compute: for each group, the y-range it spans (first_node_index … last_node_index)
-    group_spans: dict[str, tuple[int, int]] = {}
-    # A node belongs to a group if its rule_code starts with the group's prefix
-    for g in groups:
-        gid = g["id"]
-        first = None
-        last = None
-        for node in nodes:
-            rc = node.get("rule_code", "")
-            if not rc or node["node_index"] not in valid_nodes:
-                continue
-            full = _normalise_full(rc)
-            if full == gid or full.startswith(gid + "_"):
-                ni = node["node_index"]
-                if first is None:
-                    first = ni
-                last = ni
-        if first is not None:
-            group_spans[gid] = (first, last)
-
     def y_for(node_index: int) -> float:
         return 10 + node_index * SVG_NODE_GAP
 
@@ -621,136 +878,277 @@ def build_svg(nodes: list[dict], groups: list[dict], run_dir: str) -> str:
         "#3498db", "#9b59b6", "#1abc9c", "#e91e63",
     ]
 
-    lines: list[str] = []
-    lines.append(f'<svg xmlns="http://www.w3.org/2000/svg" width="{svg_width}" height="{total_height}">')
-    lines.append(f'<rect width="{svg_width}" height="{total_height}" fill="#1a1a2e"/>')
+    output_path = os.path.join(run_dir, "groups.svg")
+    with open(output_path, "w") as f:
+        f.write(f'<svg xmlns="http://www.w3.org/2000/svg" width="{svg_width}" height="{total_height}">')
+        f.write(f'\n<rect width="{svg_width}" height="{total_height}" fill="#1a1a2e"/>')
 
-    # --- Draw group vertical lines ---
-    for g in groups:
-        gid = g["id"]
-        if gid not in group_spans:
-            continue
-        first, last = group_spans[gid]
-        depth = g["depth"]
-        x = SVG_LEFT_MARGIN + depth * SVG_COL_WIDTH
-        y1 = y_for(first)
-        y2 = y_for(last) + 1
-        colour = depth_colours[depth % len(depth_colours)]
-        lines.append(
-            f'<line x1="{x}" y1="{y1}" x2="{x}" y2="{y2}" '
-            f'stroke="{colour}" stroke-width="2" opacity="0.8"/>'
-        )
-        # Small label at top of each group line
-        lines.append(
-            f'<text x="{x + 2}" y="{y1 - 1}" font-size="3" fill="{colour}" '
-            f'font-family="monospace" opacity="0.9">{gid}</text>'
-        )
+        # --- Draw group vertical lines ---
+        for g in groups:
+            gid = g["id"]
+            if gid not in group_spans:
+                continue
+            first, last = group_spans[gid]
+            depth = g["depth"]
+            x = SVG_LEFT_MARGIN + depth * SVG_COL_WIDTH
+            y1 = y_for(first)
+            y2 = y_for(last) + 1
+            colour = depth_colours[depth % len(depth_colours)]
+            f.write(
+                f'\n<line x1="{x}" y1="{y1}" x2="{x}" y2="{y2}" '
+                f'stroke="{colour}" stroke-width="2" opacity="0.8"/>'
+            )
+            # Small label at top of each group line
+            f.write(
+                f'\n<text x="{x + 2}" y="{y1 - 1}" font-size="3" fill="{colour}" '
+                f'font-family="monospace" opacity="0.9">{gid}</text>'
+            )
 
-    # --- Draw node horizontal lines ---
-    for node in nodes:
-        ni = node["node_index"]
-        y = y_for(ni)
-        x_start = group_cols_width + node["x_indent"] * SVG_INDENT_SCALE
-        x_end = x_start + 60  # fixed-width line to represent the node
-        colour = "#e0e0e0" if node["rule_code"] else "#666666"
-        lines.append(
-            f'<line x1="{x_start}" y1="{y}" x2="{x_end}" y2="{y}" '
-            f'stroke="{colour}" stroke-width="1"/>'
-        )
+        # --- Draw node horizontal lines ---
+        for node in nodes:
+            ni = node["node_index"]
+            y = y_for(ni)
+            x_start = group_cols_width + node["x_indent"] * SVG_INDENT_SCALE
+            x_end = x_start + 60  # fixed-width line to represent the node
+            colour = "#e0e0e0" if node["rule_code"] else "#666666"
+            f.write(
+                f'\n<line x1="{x_start}" y1="{y}" x2="{x_end}" y2="{y}" '
+                f'stroke="{colour}" stroke-width="1"/>'
+            )
 
-    lines.append("</svg>")
-    svg_content = "\n".join(lines)
+        f.write("\n</svg>")
 
-    output_path = os.path.join(run_dir, "groups.svg")
-    with open(output_path, "w") as f:
-        f.write(svg_content)
     logger.info(f"SVG visualisation → {output_path}")
     return output_path
 
 
+# ---------------------------------------------------------------------------
+# Stage cache
+# ---------------------------------------------------------------------------
+#
+# Each stage's output is stored under runs/.cache/<stage>/<key>.<ext>, where
+# key hashes the stage's input content, the source of the code that computes
+# it and its tuning parameters. Editing a heuristic or a constant therefore
+# invalidates exactly the stages downstream of it; re-running on an unchanged
+# PDF copies the cached artefacts into the new run directory.
+
+def file_sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _code_version(*code) -> str:
+    """Hash the source of the functions/classes/modules a stage depends on."""
+    h = hashlib.sha256()
+    for obj in code:
+        h.update(inspect.getsource(obj).encode("utf-8"))
+    return h.hexdigest()
+
+
+def stage_key(stage: str, input_hash: str, code: tuple, params: dict) -> str:
+    payload = json.dumps(
+        {"stage": stage, "input": input_hash, "code": _code_version(*code), "params": params},
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+class StageCache:
+    """Content-addressed store for stage outputs (a no-op when disabled)."""
+
+    def __init__(self, cache_dir: str | None = None, enabled: bool = True):
+        self.cache_dir = cache_dir or CACHE_DIR
+        self.enabled = enabled
+
+    def path(self, stage: str, key: str, ext: str = "json") -> str:
+        return os.path.join(self.cache_dir, stage, f"{key}.{ext}")
+
+    def load_json(self, stage: str, key: str):
+        path = self.path(stage, key)
+        if not self.enabled or not os.path.exists(path):
+            return None
+        with open(path) as f:
+            data = json.load(f)
+        logger.info(f"Cache hit: {stage} ({key})")
+        return data
+
+    def save_json(self, stage: str, key: str, data) -> None:
+        if not self.enabled:
+            return
+        path = self.path(stage, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+    def fetch_file(self, stage: str, key: str, ext: str, dest: str) -> bool:
+        """Copy a cached artefact to *dest*; False on a miss."""
+        path = self.path(stage, key, ext)
+        if not self.enabled or not os.path.exists(path):
+            return False
+        shutil.copyfile(path, dest)
+        logger.info(f"Cache hit: {stage} ({key})")
+        return True
+
+    def store_file(self, stage: str, key: str, ext: str, src: str) -> None:
+        if not self.enabled:
+            return
+        path = self.path(stage, key, ext)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        shutil.copyfile(src, f"{path}.tmp")
+        os.replace(f"{path}.tmp", path)
+
+
+# Code each stage's output depends on — a change to any of it is a cache miss.
+NODES_STAGE_CODE = (
+    PDFScraper, _page_line_records, _extract_page_range, generate_uid,
+    assign_parents, assign_top_level, link_references, ReferenceIndex, _CodeTrieNode,
+    _code_segments, _filter_sequential_rule_codes, pdf_backends,
+)
+GROUPS_STAGE_CODE = (
+    build_groups, build_groups_with_spans, _filter_sequential_rule_codes, _parse_rule_code, _normalise_group_id,
+    _parent_ids, _ancestor_prefixes, _indent_bucket, _normalise_full,
+)
+SVG_STAGE_CODE = (build_svg,)
+
+
+def _nodes_stage_params(backend: str) -> dict:
+    # workers is deliberately absent: parallel and serial scrapes are identical.
+    return {"backend": backend, "REF_PATTERN": REF_PATTERN.pattern,
+            "REF_LIST_SEP_RE": REF_LIST_SEP_RE.pattern, "REF_RANGE_SEP_RE": REF_RANGE_SEP_RE.pattern}
+
+
+def _groups_stage_params() -> dict:
+    return {
+        "INDENT_TOLERANCE": INDENT_TOLERANCE,
+        "FWD_THRESHOLD": FWD_THRESHOLD,
+    }
+
+
+def _svg_stage_params() -> dict:
+    return {
+        "SVG_LEFT_MARGIN": SVG_LEFT_MARGIN,
+        "SVG_COL_WIDTH": SVG_COL_WIDTH,
+        "SVG_NODE_GAP": SVG_NODE_GAP,
+        "SVG_INDENT_SCALE": SVG_INDENT_SCALE,
+    }
+
+
 # ---------------------------------------------------------------------------
 # Entry point
 # ---------------------------------------------------------------------------
 
-def run_pipeline(pdf_path: str):
+def run_pipeline(pdf_path: str, workers: int = 1, backend: str = DEFAULT_BACKEND,
+                 use_cache: bool = True, svg: bool = True):
     run_id = next_run_id()
     run_dir = os.path.join(RUNS_DIR, str(run_id))
     os.makedirs(run_dir, exist_ok=True)
     logger.info(f"Run {run_id} → {run_dir}")
 
-    # 1. Scrape
-    scraper = PDFScraper(pdf_path, run_dir)
-    nodes = scraper.scrape()
+    cache = StageCache(enabled=use_cache)
+    nodes_key = stage_key("nodes", file_sha256(pdf_path), NODES_STAGE_CODE,
+                          _nodes_stage_params(backend))
+    output_nodes = cache.load_json("nodes", nodes_key)
 
-    if not nodes:
-        logger.warning("No text nodes extracted — nothing to save.")
-        return
+    if output_nodes is None:
+        # 1. Scrape
+        scraper = PDFScraper(pdf_path, run_dir, workers=workers, backend=backend)
+        nodes = scraper.scrape()
 
-    # 2. Assign parent hierarchy via indentation
-    assign_parents(nodes)
+        if not nodes:
+            logger.warning("No text nodes extracted — nothing to save.")
+            return
 
-    # 3. Assign top-level grouping
-    assign_top_level(nodes)
+        # 2. Assign parent hierarchy via indentation
+        assign_parents(nodes)
 
-    # 4. Link cross-references
-    link_references(nodes)
+        # 3. Assign top-level grouping
+        assign_top_level(nodes)
 
-    # 5. Save JSON (drop bbox — not needed for named-destination links)
-    output_path = os.path.join(run_dir, "nodes.json")
-    output_nodes = []
-    for n in nodes:
-        out = dict(n)
-        out.pop("bbox", None)
-        output_nodes.append(out)
+        # 4. Link cross-references
+        link_references(nodes)
 
+        # Drop bbox — not needed for named-destination links
+        output_nodes = []
+        for n in nodes:
+            out = dict(n)
+            out.pop("bbox", None)
+            output_nodes.append(out)
+        cache.save_json("nodes", nodes_key, output_nodes)
+
+    # 5. Save JSON, plus the columnar store downstream stages load from
+    output_path = os.path.join(run_dir, "nodes.json")
     with open(output_path, "w") as f:
         json.dump(output_nodes, f, indent=2)
+    write_node_store(output_nodes, store_path_for(output_path), source=output_path)
 
     # 6. Identify JSON Forms groups
-    groups = build_groups(output_nodes)
+    groups_key = stage_key("groups", nodes_key, GROUPS_STAGE_CODE, _groups_stage_params())
+    cached = cache.load_json("groups", groups_key)
+    if cached is None:
+        groups, group_spans = build_groups_with_spans(output_nodes)
+        cache.save_json("groups", groups_key, {"groups": groups, "spans": group_spans})
+    else:
+        groups = cached["groups"]
+        group_spans = {gid: tuple(span) for gid, span in cached["spans"].items()}
     save_groups_json(groups, run_dir)
 
-    # 7. SVG visualisation
-    build_svg(output_nodes, groups, run_dir)
+    # 7. SVG visualisation (skipped for headless batch runs)
+    if svg:
+        svg_key = stage_key("svg", groups_key, SVG_STAGE_CODE, _svg_stage_params())
+        svg_path = os.path.join(run_dir, "groups.svg")
+        if not cache.fetch_file("svg", svg_key, "svg", svg_path):
+            build_svg(output_nodes, groups, run_dir, group_spans)
+            cache.store_file("svg", svg_key, "svg", svg_path)
 
     logger.info(f"Saved {len(output_nodes)} nodes → {output_path}")
     print(f"\nDone! Run {run_id}")
     print(f"  nodes.json : {output_path}")
 
 
-def run_groups(nodes_path: str):
+def run_groups(nodes_path: str, svg: bool = True):
     """Run only the group-identification and SVG steps on an existing nodes.json."""
-    with open(nodes_path) as f:
-        nodes = json.load(f)
     run_dir = os.path.dirname(os.path.abspath(nodes_path))
+    with open_nodes(nodes_path) as nodes:
+        groups, group_spans = build_groups_with_spans(nodes)
+        groups_path = save_groups_json(groups, run_dir)
 
-    groups = build_groups(nodes)
-    groups_path = save_groups_json(groups, run_dir)
-    svg_path = build_svg(nodes, groups, run_dir)
+        print(f"\nDone!")
+        print(f"  groups.json : {groups_path}")
+        if svg:
+            svg_path = build_svg(nodes, groups, run_dir, group_spans)
+            print(f"  groups.svg  : {svg_path}")
 
-    print(f"\nDone!")
-    print(f"  groups.json : {groups_path}")
-    print(f"  groups.svg  : {svg_path}")
 
-
-def run_enrich(nodes_path: str, groups_path: str):
+def run_enrich(nodes_path: str, groups_path: str, compact: bool = False):
     """Enrich groups with their text nodes and save to groups_enriched.json."""
-    with open(nodes_path) as f:
-        nodes = json.load(f)
     with open(groups_path) as f:
         groups = json.load(f)
 
-    enriched = enrich_groups_with_nodes(nodes, groups)
-
     run_dir = os.path.dirname(os.path.abspath(groups_path))
     output_path = os.path.join(run_dir, "groups_enriched.json")
-    with open(output_path, "w") as f:
-        json.dump(enriched, f, indent=2)
+
+    with open_nodes(nodes_path) as nodes:
+        if compact:
+            enriched = compact_enriched_groups(nodes, groups)
+            with open(output_path, "w") as f:
+                json.dump(enriched, f, separators=(",", ":"))
+            total_nodes = sum(end - start for start, end in (g["node_range"] for g in enriched["groups"]))
+            n_groups = len(enriched["groups"])
+        else:
+            enriched = enrich_groups_with_nodes(nodes, groups)
+            with open(output_path, "w") as f:
+                json.dump(enriched, f, indent=2)
+            total_nodes = sum(len(g["text_nodes"]) for g in enriched)
+            n_groups = len(enriched)
 
     print(f"\nDone!")
     print(f"  groups_enriched.json : {output_path}")
-    print(f"  Groups enriched: {len(enriched)}")
-    total_nodes = sum(len(g["text_nodes"]) for g in enriched)
+    print(f"  Groups enriched: {n_groups}")
     print(f"  Total text nodes assigned: {total_nodes}")
 
 
@@ -760,44 +1158,100 @@ if __name__ == "__main__":
 
     # Step 0: ToC extraction and classification
     toc_p = sub.add_parser("toc", help="Step 0: Extract and classify Table of Contents")
-    toc_p.add_argument("pdf", help="Path to the PDF file")
-    toc_p.add_argument("run_dir", help="Run directory (e.g. runs/1)")
+    toc_p.add_argument("pdf", nargs="?", help="Path to the PDF file")
+    toc_p.add_argument("run_dir", nargs="?", help="Run directory (e.g. runs/1)")
     toc_p.add_argument(
         "--step",
         choices=["0a", "0b", "0c"],
         help="Run only a specific sub-step (default: all)",
     )
+    toc_p.add_argument("--backend", choices=BACKENDS, default=DEFAULT_BACKEND,
+                       help="PDF text-extraction backend")
+    toc_p.add_argument("--no-cache", action="store_true",
+                       help="Bypass the LLM response cache (runs/.cache/llm)")
+    toc_p.add_argument("--refresh", action="store_true",
+                       help="Re-call the API and overwrite cached responses")
+    toc_p.add_argument("--no-outline", action="store_true",
+                       help="Ignore the PDF outline; derive the ToC from its text (steps 0a + 0b)")
+    toc_p.add_argument("--headless", action="store_true",
+                       help="Never prompt: use the approvals file, write *.pending.json for anything unapproved")
+    toc_p.add_argument("--approvals", default=None,
+                       help="Approvals JSON keyed by PDF stem (default: <regulation>/toc_approvals.json)")
+    toc_p.add_argument("--all", nargs="?", const="runs/toc", metavar="RUNS_ROOT",
+                       help="Headless run over every data/regulations/*/documents/**/*.pdf, "
+                            "into RUNS_ROOT/<regulation>/<path under documents> (default: runs/toc)")
+    toc_p.add_argument("--workers", type=int, default=4,
+                       help="Documents processed at once with --all (default: 4)")
 
     # Default: full pipeline
     scrape_p = sub.add_parser("scrape", help="Full PDF scrape pipeline")
     scrape_p.add_argument("pdf", nargs="?", default="chapter4.pdf", help="Path to the PDF file")
+    scrape_p.add_argument(
+        "--workers", type=int, default=1,
+        help="Extract pages in a process pool of this size (default: 1, serial)",
+    )
+    scrape_p.add_argument("--backend", choices=BACKENDS, default=DEFAULT_BACKEND,
+                          help="PDF text-extraction backend (fitz is faster)")
+    scrape_p.add_argument("--no-cache", action="store_true",
+                          help="Recompute every stage instead of reusing runs/.cache")
+    scrape_p.add_argument("--no-svg", action="store_true",
+                          help="Skip the groups.svg visualisation (headless batch runs)")
 
     # Groups-only on existing nodes.json
     groups_p = sub.add_parser("groups", help="Identify groups from an existing nodes.json")
     groups_p.add_argument("nodes_json", help="Path to nodes.json")
+    groups_p.add_argument("--no-svg", action="store_true", help="Skip the groups.svg visualisation")
 
     # Enrich groups with text nodes
     enrich_p = sub.add_parser("enrich", help="Enrich groups with their text nodes")
     enrich_p.add_argument("nodes_json", help="Path to nodes.json")
     enrich_p.add_argument("groups_json", help="Path to groups.json")
+    enrich_p.add_argument("--compact", action="store_true",
+                          help="Store node ranges into a shared node table instead of per-group copies")
 
     args = parser.parse_args()
     if args.command == "toc":
-        from toc_extractor import run_all as toc_run_all, step_0a, step_0b, step_0c
+        from toc_extractor import (
+            PendingReview, default_approvals_path, document_key, find_documents, load_approvals,
+            run_all as toc_run_all, run_batch as toc_run_batch, step_0a, step_0b, step_0c,
+        )
+        llm_cache = {"use_cache": not args.no_cache, "refresh": args.refresh}
+        if args.all:
+            results = toc_run_batch(find_documents(), os.path.abspath(args.all), args.approvals, args.workers,
+                                    args.backend, use_outline=not args.no_outline, **llm_cache)
+            statuses = {r["status"] for r in results}
+            sys.exit(1 if not results or "failed" in statuses else 2 if "pending" in statuses else 0)
+        if not args.pdf or not args.run_dir:
+            toc_p.error("pdf and run_dir are required unless --all is given")
         pdf_path = os.path.abspath(args.pdf)
         run_dir = os.path.abspath(args.run_dir)
         os.makedirs(run_dir, exist_ok=True)
-        if args.step == "0a":
-            step_0a(pdf_path, run_dir)
-        elif args.step == "0b":
-            step_0b(pdf_path, run_dir)
-        elif args.step == "0c":
-            step_0c(run_dir)
-        else:
-            toc_run_all(pdf_path, run_dir)
+        review = {
+            "approvals": load_approvals(args.approvals or default_approvals_path(pdf_path), pdf_path),
+            "headless": args.headless,
+        }
+        try:
+            if args.step == "0a":
+                step_0a(pdf_path, run_dir, backend=args.backend, **llm_cache, **review)
+            elif args.step == "0b":
+                step_0b(pdf_path, run_dir, backend=args.backend)
+            elif args.step == "0c":
+                step_0c(run_dir, document=document_key(pdf_path), **llm_cache, **review)
+            else:
+                toc_run_all(pdf_path, run_dir, backend=args.backend, use_outline=not args.no_outline,
+                            **llm_cache, **review)
+        except PendingReview as e:
+            logger.warning(str(e))
+            sys.exit(2)
     elif args.command == "groups":
-        run_groups(args.nodes_json)
+        run_groups(args.nodes_json, svg=not args.no_svg)
     elif args.command == "enrich":
-        run_enrich(args.nodes_json, args.groups_json)
+        run_enrich(args.nodes_json, args.groups_json, compact=args.compact)
     else:
-        run_pipeline(getattr(args, "pdf", "chapter4.pdf"))
+        run_pipeline(
+            getattr(args, "pdf", "chapter4.pdf"),
+            getattr(args, "workers", 1),
+            getattr(args, "backend", DEFAULT_BACKEND),
+            use_cache=not getattr(args, "no_cache", False),
+            svg=not getattr(args, "no_svg", False),
+        )
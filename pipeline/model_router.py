@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Adaptive model routing for architect.py.
+
+Every process form generated through the API appends one record to
+runs/.cache/model_stats.jsonl: model, size band, tokens, estimated cost,
+wall time, and the quality signals of the result (coverage_pct,
+low-confidence controls, validate_output warnings, and — when --review
+runs — the review's quality counts).
+
+ModelRouter picks, per size band, the cheapest (or fastest) candidate model
+whose recent records meet the coverage bar. Until a model has enough
+records in a band it is never routed to, so the fixed rule (MODEL_LARGE at
+>= TEXT_NODE_THRESHOLD nodes) stays in charge; forms generated with
+--model <id> are recorded too, which is how a cheaper model earns its way in.
+
+Usage:
+    python model_router.py                  # per-band summary of the stats file
+    python model_router.py --objective latency
+"""
+
+import argparse
+import json
+import os
+import threading
+import time
+
+from llm_client import LLM_CACHE_DIR
+
+MODEL_STATS_PATH = os.path.join(os.path.dirname(LLM_CACHE_DIR), "model_stats.jsonl")
+
+# (lowest node count, band name), ascending; medium starts at architect.TEXT_NODE_THRESHOLD
+SIZE_BANDS = ((0, "small"), (50, "medium"), (200, "large"))
+
+# USD per million input / output tokens, matched by model id prefix.
+# Prompt-cache reads bill at 0.1× input, writes at 1.25× input.
+MODEL_PRICES = {
+    "claude-haiku-4-5": (1.0, 5.0),
+    "claude-sonnet-4-5": (3.0, 15.0),
+    "claude-opus-4-5": (5.0, 25.0),
+}
+
+USAGE_FIELDS = ("input_tokens", "output_tokens", "cache_read_input_tokens", "cache_creation_input_tokens")
+
+ROUTE_OBJECTIVES = ("cost", "latency")
+ROUTE_MIN_COVERAGE_PCT = 95.0
+ROUTE_MAX_INCORRECT_PCT = 10.0   # of reviewed controls rated "incorrect"
+ROUTE_MIN_SAMPLES = 3
+ROUTE_WINDOW = 20                # most recent records per (band, model) considered
+
+
+def size_band(node_count: int) -> str:
+    band = SIZE_BANDS[0][1]
+    for lowest, name in SIZE_BANDS:
+        if node_count >= lowest:
+            band = name
+    return band
+
+
+def estimate_cost(model: str, usage: dict) -> float | None:
+    """Estimated USD for *usage* (token counts as recorded), or None for an unpriced model."""
+    for prefix, (price_in, price_out) in MODEL_PRICES.items():
+        if model.startswith(prefix):
+            return (
+                usage.get("input_tokens", 0) * price_in
+                + usage.get("cache_read_input_tokens", 0) * price_in * 0.1
+                + usage.get("cache_creation_input_tokens", 0) * price_in * 1.25
+                + usage.get("output_tokens", 0) * price_out
+            ) / 1_000_000
+    return None
+
+
+def _mean(values: list) -> float | None:
+    values = [v for v in values if v is not None]
+    return sum(values) / len(values) if values else None
+
+
+# ---------------------------------------------------------------------------
+# Stats file
+# ---------------------------------------------------------------------------
+
+class ModelStats:
+    """Append-only JSONL of per-form generation and review records."""
+
+    def __init__(self, path: str | None = None):
+        self.path = path or MODEL_STATS_PATH
+        self._lock = threading.Lock()
+        self._forms: dict[str, tuple[str, str]] = {}   # process_id → (model, band) recorded this run
+
+    def _append(self, record: dict) -> None:
+        record["ts"] = round(time.time(), 3)
+        line = json.dumps(record, sort_keys=True) + "\n"
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path, "a") as f:
+                f.write(line)
+
+    def load(self) -> list[dict]:
+        if not os.path.exists(self.path):
+            return []
+        records = []
+        with open(self.path) as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue  # torn write from an interrupted run
+        return records
+
+    def record_form(self, process_id: str, model: str, node_count: int, calls: list[dict],
+                    latency_s: float, report: dict) -> None:
+        """Record one generated form. *calls* holds one {"usage", "warnings"} per API call.
+
+        Forms answered (even partly) from the response cache are not
+        recorded: their tokens and wall time say nothing about the model.
+        """
+        if not calls or any(c.get("cached") for c in calls):
+            return
+        usage = {field: sum(getattr(c["usage"], field, None) or 0 for c in calls) for field in USAGE_FIELDS}
+        band = size_band(node_count)
+        self._forms[process_id] = (model, band)
+        self._append({
+            "kind": "form",
+            "process_id": process_id,
+            "model": model,
+            "band": band,
+            "nodes": node_count,
+            "calls": len(calls),
+            "usage": usage,
+            "cost_usd": estimate_cost(model, usage),
+            "latency_s": round(latency_s, 3),
+            "coverage_pct": report["coverage_pct"],
+            "low_confidence": len(report["low_confidence"]),
+            "warnings": sum(c["warnings"] for c in calls),
+        })
+
+    def record_review(self, process_id: str, review: dict) -> None:
+        """Record review quality counts against the model that generated the form this run."""
+        if process_id not in self._forms:
+            return
+        model, band = self._forms[process_id]
+        quality = {}
+        for r in review.get("reviews", []):
+            quality[r["quality"]] = quality.get(r["quality"], 0) + 1
+        self._append({"kind": "review", "process_id": process_id, "model": model, "band": band,
+                      "quality": quality})
+
+
+# ---------------------------------------------------------------------------
+# Routing
+# ---------------------------------------------------------------------------
+
+class ModelRouter:
+    """Chooses a model per size band from the stats file's history."""
+
+    def __init__(self, stats: ModelStats, candidates: tuple[str, ...], objective: str = "cost",
+                 min_coverage: float | None = None, min_samples: int | None = None):
+        if objective not in ROUTE_OBJECTIVES:
+            raise ValueError(f"objective must be one of {ROUTE_OBJECTIVES}, not {objective!r}")
+        self.stats = stats
+        self.candidates = candidates
+        self.objective = objective
+        self.min_coverage = ROUTE_MIN_COVERAGE_PCT if min_coverage is None else min_coverage
+        self.min_samples = min_samples or ROUTE_MIN_SAMPLES
+        self._records = stats.load()   # history as of the start of the run
+
+    def summary(self, band: str) -> dict[str, dict]:
+        """model → aggregated signals over its recent records in *band*."""
+        result = {}
+        for model in self.candidates:
+            forms = [r for r in self._records
+                     if r.get("kind") == "form" and r["band"] == band and r["model"] == model][-ROUTE_WINDOW:]
+            if not forms:
+                continue
+            reviews = [r for r in self._records
+                       if r.get("kind") == "review" and r["band"] == band and r["model"] == model][-ROUTE_WINDOW:]
+            reviewed = sum(sum(r["quality"].values()) for r in reviews)
+            incorrect = sum(r["quality"].get("incorrect", 0) for r in reviews)
+            result[model] = {
+                "samples": len(forms),
+                "coverage_pct": _mean([r["coverage_pct"] for r in forms]),
+                "low_confidence": _mean([r["low_confidence"] for r in forms]),
+                "warnings": _mean([r["warnings"] for r in forms]),
+                "incorrect_pct": 100 * incorrect / reviewed if reviewed else None,
+                "cost_usd": _mean([r["cost_usd"] for r in forms]),
+                "latency_s": _mean([r["latency_s"] for r in forms]),
+            }
+        return result
+
+    def qualifies(self, signals: dict) -> bool:
+        return (
+            signals["samples"] >= self.min_samples
+            and signals["coverage_pct"] >= self.min_coverage
+            and (signals["incorrect_pct"] is None or signals["incorrect_pct"] <= ROUTE_MAX_INCORRECT_PCT)
+        )
+
+    def choose(self, node_count: int, default: str) -> tuple[str, str]:
+        """(model, reason) for a form of *node_count* text nodes; *default* unless history says otherwise."""
+        band = size_band(node_count)
+        qualified = {m: s for m, s in self.summary(band).items() if self.qualifies(s)}
+        if not qualified:
+            return default, f"{band} band: no model with {self.min_samples}+ runs at "\
+                            f">= {self.min_coverage:g}% coverage yet"
+
+        def score(model: str) -> float:
+            value = qualified[model]["cost_usd" if self.objective == "cost" else "latency_s"]
+            return float("inf") if value is None else value
+
+        model = min(qualified, key=lambda m: (score(m), m != default))
+        s = qualified[model]
+        return model, (f"{band} band: {s['samples']} runs, {s['coverage_pct']:.1f}% coverage, "
+                       f"{_format_cost(s['cost_usd'])}/form, {s['latency_s']:.1f}s")
+
+
+def _format_cost(cost: float | None) -> str:
+    return "$?" if cost is None else f"${cost:.4f}"
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+if __name__ == "__main__":
+    from architect import MODEL_LARGE, MODEL_SMALL, TEXT_NODE_THRESHOLD
+
+    parser = argparse.ArgumentParser(description="Summarise model routing stats per size band.")
+    parser.add_argument("--stats", default=MODEL_STATS_PATH, help=f"Stats file (default: {MODEL_STATS_PATH})")
+    parser.add_argument("--objective", choices=ROUTE_OBJECTIVES, default="cost")
+    args = parser.parse_args()
+
+    router = ModelRouter(ModelStats(args.stats), (MODEL_SMALL, MODEL_LARGE), args.objective)
+    for lowest, band in SIZE_BANDS:
+        summary = router.summary(band)
+        print(f"{band} (>= {lowest} nodes)")
+        for model, s in summary.items():
+            incorrect = "-" if s["incorrect_pct"] is None else f"{s['incorrect_pct']:.0f}%"
+            print(f"  {model:32} {s['samples']:3} runs  {s['coverage_pct']:5.1f}% cov  "
+                  f"{s['low_confidence']:.1f} low-conf  {s['warnings']:.1f} warn  {incorrect} incorrect  "
+                  f"{_format_cost(s['cost_usd'])}  {s['latency_s']:.1f}s"
+                  f"{'  ✓' if router.qualifies(s) else ''}")
+        default = MODEL_LARGE if lowest >= TEXT_NODE_THRESHOLD else MODEL_SMALL
+        print(f"  → {router.choose(lowest, default)[0]}")
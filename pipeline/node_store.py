@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+Columnar, memory-mappable store for nodes.json.
+
+run_pipeline writes nodes.bin next to nodes.json (the store of X.json is
+X.bin), recording the JSON's size and mtime so a rewritten or different
+JSON is never served from it. Opening it maps the file and reads a small
+header; node dicts are only built when they are indexed,
+so stages that touch a few columns (or a few nodes) skip the full json.load.
+
+Layout (native byte order, recorded in the header):
+
+    MAGIC | u32 header length | header JSON | columns, each 8-byte aligned
+
+  node_index, page           int32
+  x_indent, font_size        float64
+  flags                      uint8   (1 = bold, 2 = italic)
+  type                       uint8   → header["types"]
+  uid, parent_uid,
+  top_level_uid, rule_code   uint32  → header["strings"] (interned; NONE = no value)
+  ref_offsets / refs         uint32  CSR list of outgoing_references string ids
+  in_ref_offsets / in_refs   uint32  same for incoming_references (when present)
+  text_offsets / text        uint64 offsets into one UTF-8 blob
+
+Usage:
+    from node_store import open_nodes
+    with open_nodes("runs/2/nodes.json") as nodes:   # NodeStore if nodes.bin matches it
+        nodes[10]["text"], nodes.x_indent[10]
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from collections.abc import Iterator, Sequence
+from contextlib import contextmanager
+
+MAGIC = b"NODESTORE\x01"
+NONE = 0xFFFFFFFF
+
+BOLD = 1
+ITALIC = 2
+
+# column name → array typecode, in file order
+COLUMNS = {
+    "node_index": "i",
+    "page": "i",
+    "x_indent": "d",
+    "font_size": "d",
+    "flags": "B",
+    "type": "B",
+    "uid": "I",
+    "parent_uid": "I",
+    "top_level_uid": "I",
+    "rule_code": "I",
+    "ref_offsets": "I",
+    "refs": "I",
+    "in_ref_offsets": "I",
+    "in_refs": "I",
+    "text_offsets": "Q",
+    "text": "B",
+}
+
+
+def store_path_for(nodes_json_path: str) -> str:
+    """runs/2/nodes.json → runs/2/nodes.bin, nodes_alt.json → nodes_alt.bin."""
+    return os.path.splitext(os.path.abspath(nodes_json_path))[0] + ".bin"
+
+
+def _source_stamp(nodes_json_path: str) -> dict:
+    st = os.stat(nodes_json_path)
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+# ---------------------------------------------------------------------------
+# Writer
+# ---------------------------------------------------------------------------
+
+def write_node_store(nodes: list[dict], path: str, source: str | None = None) -> str:
+    """Serialise *nodes* (nodes.json records) to a columnar store at *path*.
+
+    *source* is the nodes.json they were saved to; load_nodes only uses the
+    store while that file's size and mtime still match.
+    """
+    strings: list[str] = []
+    string_ids: dict[str, int] = {}
+    types: list[str] = []
+
+    def intern(value: str | None) -> int:
+        if value is None:
+            return NONE
+        sid = string_ids.get(value)
+        if sid is None:
+            sid = string_ids[value] = len(strings)
+            strings.append(value)
+        return sid
+
+    has_incoming = any("incoming_references" in n for n in nodes)
+    cols = {name: array(code) for name, code in COLUMNS.items()}
+    cols["ref_offsets"].append(0)
+    cols["in_ref_offsets"].append(0)
+    cols["text_offsets"].append(0)
+    text = bytearray()
+
+    for n in nodes:
+        cols["node_index"].append(n["node_index"])
+        cols["page"].append(n["page"])
+        cols["x_indent"].append(n["x_indent"])
+        cols["font_size"].append(n["font_size"])
+        cols["flags"].append((BOLD if n["is_bold"] else 0) | (ITALIC if n["is_italic"] else 0))
+        if n["type"] not in types:
+            types.append(n["type"])
+        cols["type"].append(types.index(n["type"]))
+        cols["uid"].append(intern(n["uid"]))
+        cols["parent_uid"].append(intern(n.get("parent_uid")))
+        cols["top_level_uid"].append(intern(n.get("top_level_uid")))
+        cols["rule_code"].append(intern(n.get("rule_code", "")))
+        cols["refs"].extend(intern(r) for r in n.get("outgoing_references", []))
+        cols["ref_offsets"].append(len(cols["refs"]))
+        cols["in_refs"].extend(intern(r) for r in n.get("incoming_references", []))
+        cols["in_ref_offsets"].append(len(cols["in_refs"]))
+        text += n["text"].encode("utf-8")
+        cols["text_offsets"].append(len(text))
+    cols["text"] = array("B", text)
+
+    layout = {}
+    offset = 0
+    for name, col in cols.items():
+        offset = (offset + 7) & ~7
+        nbytes = len(col) * col.itemsize
+        layout[name] = [COLUMNS[name], offset, nbytes]
+        offset += nbytes
+
+    header = json.dumps({
+        "version": 1,
+        "count": len(nodes),
+        "byteorder": sys.byteorder,
+        "has_incoming": has_incoming,
+        "source": _source_stamp(source) if source else None,
+        "types": types,
+        "strings": strings,
+        "columns": layout,
+    }).encode("utf-8")
+    data_start = (len(MAGIC) + 4 + len(header) + 7) & ~7
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<I", len(header)))
+        f.write(header)
+        for name, col in cols.items():
+            f.write(b"\0" * (data_start + layout[name][1] - f.tell()))
+            col.tofile(f)
+    os.replace(tmp_path, path)
+    return path
+
+
+# ---------------------------------------------------------------------------
+# Reader
+# ---------------------------------------------------------------------------
+
+class NodeStore(Sequence):
+    """Read-only, lazily materialised view of a nodes.bin file.
+
+    Indexing returns the same dict shape as nodes.json (built on first
+    access, then reused). Numeric columns are exposed directly as typed
+    memoryviews: ``store.page``, ``store.x_indent``, ``store.font_size``,
+    ``store.node_index``.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[:len(MAGIC)] != MAGIC:
+            self._mm.close()
+            raise ValueError(f"{path} is not a node store")
+        (header_len,) = struct.unpack_from("<I", self._mm, len(MAGIC))
+        header_start = len(MAGIC) + 4
+        header = json.loads(self._mm[header_start:header_start + header_len])
+        if header["byteorder"] != sys.byteorder:
+            self._mm.close()
+            raise ValueError(f"{path} was written on a {header['byteorder']}-endian machine")
+        data_start = (header_start + header_len + 7) & ~7
+
+        self._count = header["count"]
+        self._strings = header["strings"]
+        self._types = header["types"]
+        self._has_incoming = header.get("has_incoming", False)
+        self.source = header.get("source")
+        self._buf = memoryview(self._mm)
+        self._cols = {
+            name: self._buf[data_start + off:data_start + off + nbytes].cast(code)
+            for name, (code, off, nbytes) in header["columns"].items()
+        }
+        self._cache: list[dict | None] = [None] * self._count
+
+        self.node_index = self._cols["node_index"]
+        self.page = self._cols["page"]
+        self.x_indent = self._cols["x_indent"]
+        self.font_size = self._cols["font_size"]
+
+    def _string(self, sid: int) -> str | None:
+        return None if sid == NONE else self._strings[sid]
+
+    def text(self, i: int) -> str:
+        offsets = self._cols["text_offsets"]
+        return self._cols["text"][offsets[i]:offsets[i + 1]].tobytes().decode("utf-8")
+
+    def rule_code(self, i: int) -> str:
+        return self._strings[self._cols["rule_code"][i]]
+
+    def uid(self, i: int) -> str:
+        return self._strings[self._cols["uid"][i]]
+
+    def _ref_list(self, offsets: str, refs: str, i: int) -> list[str]:
+        c = self._cols
+        return [self._strings[sid] for sid in c[refs][c[offsets][i]:c[offsets][i + 1]]]
+
+    def _materialise(self, i: int) -> dict:
+        c = self._cols
+        flags = c["flags"][i]
+        node = {
+            "uid": self.uid(i),
+            "node_index": c["node_index"][i],
+            "page": c["page"][i],
+            "x_indent": c["x_indent"][i],
+            "text": self.text(i),
+            "rule_code": self.rule_code(i),
+            "font_size": c["font_size"][i],
+            "is_bold": bool(flags & BOLD),
+            "is_italic": bool(flags & ITALIC),
+            "type": self._types[c["type"][i]],
+            "parent_uid": self._string(c["parent_uid"][i]),
+            "top_level_uid": self._string(c["top_level_uid"][i]),
+            "outgoing_references": self._ref_list("ref_offsets", "refs", i),
+        }
+        if self._has_incoming:
+            node["incoming_references"] = self._ref_list("in_ref_offsets", "in_refs", i)
+        return node
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(self._count))]
+        if i < 0:
+            i += self._count
+        if not 0 <= i < self._count:
+            raise IndexError("node index out of range")
+        node = self._cache[i]
+        if node is None:
+            node = self._cache[i] = self._materialise(i)
+        return node
+
+    def close(self):
+        for col in self._cols.values():
+            col.release()
+        self._cols = {}
+        self.node_index = self.page = self.x_indent = self.font_size = None
+        self._buf.release()
+        self._mm.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+def load_nodes(nodes_json_path: str) -> Sequence[dict]:
+    """Load nodes for *nodes_json_path*, via its store when it was built from that file.
+
+    Falls back to json.load when there is no store, or when the JSON's size
+    or mtime differ from those recorded in the store's header. A returned
+    NodeStore holds the file mapped until its close(); open_nodes does that
+    on exit.
+    """
+    store_path = store_path_for(nodes_json_path)
+    if os.path.exists(store_path):
+        store = NodeStore(store_path)
+        if store.source == _source_stamp(nodes_json_path):
+            return store
+        store.close()
+    with open(nodes_json_path) as f:
+        return json.load(f)
+
+
+@contextmanager
+def open_nodes(nodes_json_path: str) -> Iterator[Sequence[dict]]:
+    """load_nodes as a context manager: a NodeStore is closed on exit."""
+    nodes = load_nodes(nodes_json_path)
+    try:
+        yield nodes
+    finally:
+        if isinstance(nodes, NodeStore):
+            nodes.close()
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Selectable PDF text-extraction backends.
+
+Both backends expose the small slice of pdfplumber's Page API the pipeline
+uses (``height``, ``extract_words()``, ``extract_text_lines()``,
+``extract_text()``, ``close()``), so PDFScraper, build_boilerplate_map and the
+ToC extractor are written once against pdfplumber semantics:
+
+  pdfplumber  pdfminer-based layout analysis (reference behaviour)
+  fitz        PyMuPDF ``rawdict`` spans regrouped into pdfplumber-style
+              words and lines — several times faster on large documents
+
+fitz reproduces pdfplumber's nodes exactly on chapter4.pdf. MuPDF accumulates
+nested ``cm`` offsets in float32, though, so on some PDFs an x position that
+sits on a 0.05pt rounding tie lands on the other side of it (19 of 4178 nodes
+in the full AML/CTF Rules), which can re-parent the siblings that follow.
+pdfplumber therefore stays the default.
+
+Usage:
+    with open_pdf("chapter4.pdf", backend="fitz") as pdf:
+        for page in pdf.pages:
+            lines = page.extract_text_lines(layout=True, strip=True)
+"""
+
+import struct
+from functools import lru_cache
+
+import fitz  # PyMuPDF
+import pdfplumber
+
+BACKENDS = ("pdfplumber", "fitz")
+DEFAULT_BACKEND = "pdfplumber"
+
+# pdfplumber's defaults for word and line grouping
+X_TOLERANCE = 3
+Y_TOLERANCE = 3
+
+FITZ_FONTNAME_MAX = 24
+
+_F32 = struct.Struct("f")
+
+LIGATURES = {
+    "ﬀ": "ff",
+    "ﬃ": "ffi",
+    "ﬄ": "ffl",
+    "ﬁ": "fi",
+    "ﬂ": "fl",
+    "ﬆ": "st",
+    "ﬅ": "st",
+}
+
+# Keep ligatures as single glyphs (expanded below, as pdfplumber does) and
+# stop MuPDF from synthesising spaces that pdfplumber would not see.
+_FITZ_TEXT_FLAGS = (
+    fitz.TEXT_PRESERVE_LIGATURES
+    | fitz.TEXT_PRESERVE_WHITESPACE
+    | fitz.TEXT_MEDIABOX_CLIP
+    | fitz.TEXT_INHIBIT_SPACES
+)
+
+
+def open_pdf(pdf_path: str, backend: str = DEFAULT_BACKEND):
+    """Open *pdf_path* with the named backend; usable as a context manager."""
+    if backend == "pdfplumber":
+        return pdfplumber.open(pdf_path)
+    if backend == "fitz":
+        return FitzDocument(pdf_path)
+    raise ValueError(f"Unknown PDF backend {backend!r} (expected one of {', '.join(BACKENDS)})")
+
+
+# ---------------------------------------------------------------------------
+# pdfplumber-style grouping helpers
+# ---------------------------------------------------------------------------
+
+def _cluster_by_top(objs: list[dict], tolerance: float = Y_TOLERANCE) -> list[list[dict]]:
+    """Group objects whose ``top`` values chain within *tolerance*.
+
+    Mirrors pdfplumber's ``cluster_objects``: clusters are ordered by top and
+    objects keep their input order inside a cluster.
+    """
+    tops = sorted({o["top"] for o in objs})
+    cluster_of: dict[float, int] = {}
+    idx = -1
+    last = None
+    for t in tops:
+        if last is None or t > last + tolerance:
+            idx += 1
+        cluster_of[t] = idx
+        last = t
+
+    clusters: list[list[dict]] = [[] for _ in range(idx + 1)]
+    for o in objs:
+        clusters[cluster_of[o["top"]]].append(o)
+    return clusters
+
+
+def _bbox_of(chars: list[dict]) -> dict:
+    return {
+        "x0": min(c["x0"] for c in chars),
+        "top": min(c["top"] for c in chars),
+        "x1": max(c["x1"] for c in chars),
+        "bottom": max(c["bottom"] for c in chars),
+    }
+
+
+def _chars_to_words(chars: list[dict]) -> list[list[dict]]:
+    """Split chars into words the way pdfplumber's WordExtractor does."""
+    words: list[list[dict]] = []
+    for line in _cluster_by_top(chars):
+        current: list[dict] = []
+        for c in sorted(line, key=lambda c: c["x0"]):
+            if c["text"].isspace():
+                if current:
+                    words.append(current)
+                current = []
+                continue
+            if current:
+                prev = current[-1]
+                if (
+                    c["x0"] < prev["x0"]
+                    or c["x0"] > prev["x1"] + X_TOLERANCE
+                    or abs(c["top"] - prev["top"]) > Y_TOLERANCE
+                ):
+                    words.append(current)
+                    current = []
+            current.append(c)
+        if current:
+            words.append(current)
+    return words
+
+
+@lru_cache(maxsize=65536)
+def _f32_literal(v: float) -> float:
+    """Shortest decimal that MuPDF's float32 *v* came from.
+
+    155.85 arrives as 155.850006 and would round to 155.9 where pdfplumber's
+    float64 coordinate rounds to 155.8.
+    """
+    for digits in (6, 7, 8):
+        d = float(f"{v:.{digits}g}")
+        if _F32.unpack(_F32.pack(d))[0] == v:
+            return d
+    return v
+
+
+def _word_text(chars: list[dict]) -> str:
+    return "".join(LIGATURES.get(c["text"], c["text"]) for c in chars)
+
+
+# ---------------------------------------------------------------------------
+# PyMuPDF adapter
+# ---------------------------------------------------------------------------
+
+class FitzPage:
+    """A PyMuPDF page presented through pdfplumber's extraction API."""
+
+    def __init__(self, page: "fitz.Page", page_number: int):
+        self._page = page
+        self.page_number = page_number
+        self.width = page.rect.width
+        self.height = page.rect.height
+        self._chars: list[dict] | None = None
+        self._words: list[list[dict]] | None = None
+
+    @property
+    def chars(self) -> list[dict]:
+        """Upright chars with pdfplumber geometry (top = baseline box bottom - size)."""
+        if self._chars is None:
+            chars = []
+            fontnames = self._full_fontnames()
+            raw = self._page.get_text("rawdict", flags=_FITZ_TEXT_FLAGS)
+            for block in raw["blocks"]:
+                for line in block.get("lines", []):
+                    if line["dir"] != (1.0, 0.0):
+                        continue
+                    for span in line["spans"]:
+                        size = span["size"]
+                        fontname = fontnames.get(span["font"], span["font"])
+                        for ch in span["chars"]:
+                            x0, _, x1, bottom = (_f32_literal(v) for v in ch["bbox"])
+                            chars.append({
+                                "text": ch["c"],
+                                "x0": x0,
+                                "x1": x1,
+                                "top": bottom - size,
+                                "bottom": bottom,
+                                "size": size,
+                                "fontname": fontname,
+                            })
+            self._chars = chars
+        return self._chars
+
+    def _full_fontnames(self) -> dict[str, str]:
+        """Map MuPDF span font names to the PDF BaseFont pdfplumber reports.
+
+        MuPDF drops the subset prefix and truncates names to 24 characters
+        ("TimesNewRomanPS-BoldItal"), which would hide the italic flag.
+        """
+        names = {}
+        for font in self._page.get_fonts():
+            basefont = font[3]
+            short = basefont.split("+", 1)[-1][:FITZ_FONTNAME_MAX]
+            names.setdefault(short, basefont)
+        return names
+
+    def _word_chars(self) -> list[list[dict]]:
+        if self._words is None:
+            self._words = _chars_to_words(self.chars)
+        return self._words
+
+    def extract_words(self) -> list[dict]:
+        return [
+            {"text": _word_text(w), **_bbox_of(w)}
+            for w in self._word_chars()
+        ]
+
+    def extract_text_lines(self, layout: bool = False, strip: bool = True) -> list[dict]:
+        """One record per text row, words sorted left to right.
+
+        Words are joined with single spaces; pdfplumber's ``layout=True``
+        pads with extra spaces instead, which callers normalise away.
+        """
+        words = [{"top": min(c["top"] for c in w), "x0": w[0]["x0"], "chars": w} for w in self._word_chars()]
+        lines = []
+        for row in _cluster_by_top(sorted(words, key=lambda w: w["top"])):
+            row = sorted(row, key=lambda w: w["x0"])
+            chars = [c for w in row for c in w["chars"]]
+            lines.append({
+                "text": " ".join(_word_text(w["chars"]) for w in row),
+                **_bbox_of(chars),
+                "chars": chars,
+            })
+        return lines
+
+    def extract_text(self) -> str:
+        return "\n".join(line["text"] for line in self.extract_text_lines())
+
+    def close(self):
+        self._chars = None
+        self._words = None
+
+
+class FitzDocument:
+    """Context-managed PyMuPDF document with a pdfplumber-like ``pages`` list."""
+
+    def __init__(self, pdf_path: str):
+        self._doc = fitz.open(pdf_path)
+        self.pages = [FitzPage(self._doc[i], i + 1) for i in range(len(self._doc))]
+
+    def close(self):
+        self._doc.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
@@ -27,26 +27,25 @@ class ReferenceLinker:
         with get_session() as session:
             nodes = session.query(TextNode).filter_by(run_id=self.run_id).all()
             
-            # Map normalized codes (e.g., '4_4_3_5') to UIDs
-            rule_map = {n.rule_code: n.uid for n in nodes if n.rule_code}
-            
+            # Map normalized codes (e.g., '4_4_3_5') to the nodes themselves, so
+            # linking needs no per-match query.
+            rule_map = {n.rule_code: n for n in nodes if n.rule_code}
+            ref_re = re.compile(self.ref_pattern)
+
             links_created = 0
 
             for node in nodes:
-                matches = re.findall(self.ref_pattern, node.text)
-                unique_matches = set(matches)
-                
-                for match in unique_matches:
+                linked = {target.uid for target in node.outgoing_references}
+
+                for match in set(ref_re.findall(node.text)):
                     # Normalize: "4.4.3(5)" -> "4_4_3_5"
                     clean_match = match.replace('.', '_').replace('(', '_').replace(')', '').strip('_')
+                    target_node = rule_map.get(clean_match)
 
-                    if clean_match in rule_map and rule_map[clean_match] != node.uid:
-                        target_uid = rule_map[clean_match]
-                        target_node = session.query(TextNode).get(target_uid)
-                        
-                        if target_node not in node.outgoing_references:
-                            node.outgoing_references.append(target_node)
-                            links_created += 1
+                    if target_node is not None and target_node.uid != node.uid and target_node.uid not in linked:
+                        node.outgoing_references.append(target_node)
+                        linked.add(target_node.uid)
+                        links_created += 1
             
             session.commit()
             logger.info(f"Linking complete. Created {links_created} cross-references.")
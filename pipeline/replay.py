@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Record/replay of Messages API traffic, for offline regression runs and
+benchmarks of the architect pipeline.
+
+  RecordingTransport — httpx transport that forwards to the real API and
+                       saves each successful /v1/messages exchange as a
+                       fixture (<request hash>.json) in a directory
+  ReplayTransport    — answers /v1/messages from those fixtures with no
+                       network, adding simulated latency and injected
+                       errors (429/529) from a seeded RNG
+
+Both sit below the SDK, so retries, streaming, the response cache and the
+model router behave exactly as against the live API. Message Batches are
+not recorded; replay answers them 404.
+
+Usage:
+    python architect.py runs/1 --record fixtures/runs1 --force --no-cache --route fixed --review
+    python architect.py runs/1 --replay fixtures/runs1 --force --no-cache --review
+    python replay.py runs/1 fixtures/runs1 --concurrency 1 2 4 --latency 2.0 --error-rate 0.05
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import httpx
+
+from llm_client import request_key
+
+logger = logging.getLogger(__name__)
+
+MESSAGES_PATH = "/v1/messages"
+
+
+def _fixture_path(fixtures_dir: str, request: dict) -> str:
+    return os.path.join(fixtures_dir, f"{request_key(request)}.json")
+
+
+def _error_response(status: int, error_type: str, message: str, request: httpx.Request,
+                    headers: dict | None = None) -> httpx.Response:
+    body = {"type": "error", "error": {"type": error_type, "message": message}}
+    return httpx.Response(status, headers=headers, json=body, request=request)
+
+
+class RecordingTransport(httpx.BaseTransport):
+    """Forwards to *inner* and saves each 2xx POST /v1/messages exchange to *fixtures_dir*."""
+
+    def __init__(self, fixtures_dir: str, inner: httpx.BaseTransport | None = None):
+        self.fixtures_dir = fixtures_dir
+        self.inner = inner or httpx.HTTPTransport()
+        self.recorded = 0
+        os.makedirs(fixtures_dir, exist_ok=True)
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        response = self.inner.handle_request(request)
+        if request.method != "POST" or request.url.path != MESSAGES_PATH or not 200 <= response.status_code < 300:
+            return response
+        body = response.read()  # streams included: the SSE text is replayed verbatim
+        response.close()
+        payload = json.loads(request.content)
+        content_type = response.headers.get("content-type", "application/json")
+        fixture = {
+            "request": payload,
+            "status": response.status_code,
+            "content_type": content_type,
+            "body": body.decode("utf-8"),
+        }
+        path = _fixture_path(self.fixtures_dir, payload)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(fixture, f, indent=1, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        self.recorded += 1
+        return httpx.Response(response.status_code, headers={"content-type": content_type},
+                              content=body, request=request)
+
+    def close(self):
+        self.inner.close()
+
+
+class ReplayTransport(httpx.BaseTransport):
+    """Serves recorded fixtures, with simulated latency and errors.
+
+    Each request sleeps *latency* seconds (± *jitter*), then fails with
+    *error_status* at *error_rate*; errors carry retry-after: 0 so the
+    client's backoff, not the header, sets the pace. A request with no
+    fixture gets a 404. Latency and errors come from one RNG seeded with
+    *seed*, so a serial run is exactly reproducible.
+    """
+
+    def __init__(self, fixtures_dir: str, latency: float = 0.0, jitter: float = 0.0,
+                 error_rate: float = 0.0, error_status: int = 529, seed: int = 0):
+        if not os.path.isdir(fixtures_dir):
+            raise FileNotFoundError(f"no replay fixtures at {fixtures_dir}")
+        self.fixtures_dir = fixtures_dir
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.requests = 0
+        self.errors = 0
+        self.misses = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        if request.method != "POST" or request.url.path != MESSAGES_PATH:
+            return _error_response(404, "not_found_error", f"replay: {request.url.path} is not recorded", request)
+
+        with self._lock:
+            self.requests += 1
+            delay = max(0.0, self.latency + self._rng.uniform(-self.jitter, self.jitter))
+            fail = self._rng.random() < self.error_rate
+            self.errors += fail
+        time.sleep(delay)
+        if fail:
+            error_type = "rate_limit_error" if self.error_status == 429 else "overloaded_error"
+            return _error_response(self.error_status, error_type, "replay: injected error", request,
+                                   {"retry-after": "0"})
+
+        payload = json.loads(request.content)
+        path = _fixture_path(self.fixtures_dir, payload)
+        if not os.path.exists(path):
+            with self._lock:
+                self.misses += 1
+            return _error_response(404, "not_found_error",
+                                   f"replay: no fixture for this request ({os.path.basename(path)})", request)
+        with open(path) as f:
+            fixture = json.load(f)
+        return httpx.Response(fixture["status"], headers={"content-type": fixture["content_type"]},
+                              content=fixture["body"].encode("utf-8"), request=request)
+
+
+# ---------------------------------------------------------------------------
+# Offline benchmark
+# ---------------------------------------------------------------------------
+
+def benchmark(run_dir: str, fixtures_dir: str, concurrency_levels: list[int], latency: float,
+              jitter: float, error_rate: float, review: bool, seed: int) -> list[dict]:
+    """Run the whole architect (and review) pipeline per concurrency level against replayed fixtures.
+
+    Outputs go to a scratch directory; the response cache is bypassed and
+    every form regenerated, so each level makes the full set of calls.
+    """
+    import architect
+
+    os.environ.setdefault("ANTHROPIC_API_KEY", "offline-replay")
+    results = []
+    real_processes_dir = architect.PROCESSES_DIR
+    scratch = tempfile.mkdtemp(prefix="replay-bench-")
+    try:
+        for concurrency in concurrency_levels:
+            architect.PROCESSES_DIR = Path(scratch) / f"c{concurrency}"
+            transport = ReplayTransport(fixtures_dir, latency, jitter, error_rate, seed=seed)
+            started = time.perf_counter()
+            try:
+                architect.run_process_architect(
+                    run_dir, run_review=review, concurrency=concurrency, rate=1000.0,
+                    use_cache=False, force=True, route="fixed", transport=transport,
+                )
+                ok = True
+            except SystemExit:
+                ok = False
+            elapsed = time.perf_counter() - started
+            results.append({"concurrency": concurrency, "seconds": elapsed, "requests": transport.requests,
+                            "errors": transport.errors, "misses": transport.misses, "ok": ok})
+    finally:
+        architect.PROCESSES_DIR = real_processes_dir
+        shutil.rmtree(scratch, ignore_errors=True)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the architect pipeline offline against recorded fixtures.")
+    parser.add_argument("run_dir", help="Run directory the fixtures were recorded from (e.g. runs/1)")
+    parser.add_argument("fixtures_dir", help="Directory written by architect.py --record")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4],
+                        help="Concurrency levels to compare (default: 1 2 4)")
+    parser.add_argument("--latency", type=float, default=1.0, help="Simulated seconds per call (default: 1.0)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="± seconds of uniform latency jitter")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of calls answered 529 (default: 0)")
+    parser.add_argument("--review", action="store_true", help="Include the review pass")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    logging.getLogger("architect").setLevel(logging.WARNING)
+    rows = benchmark(args.run_dir, args.fixtures_dir, args.concurrency, args.latency, args.jitter,
+                     args.error_rate, args.review, args.seed)
+    baseline = rows[0]["seconds"]
+    for row in rows:
+        status = "" if row["ok"] and not row["misses"] else f"  ({row['misses']} missing fixture(s))"
+        print(f"concurrency {row['concurrency']:2}  {row['seconds']:7.2f} s  {row['requests']:4} requests  "
+              f"{row['errors']:3} injected errors  {baseline / row['seconds']:4.1f}×{status}")
@@ -10,6 +10,10 @@ from architect import (
     extract_input_rule_codes,
     extract_output_rule_codes,
     compute_coverage_report,
+    load_enriched_groups,
+    chunk_process_nodes,
+    estimate_node_tokens,
+    merge_chunk_results,
     ID_REGEX,
     SLUG_REGEX,
     PROCESS_FORMS,
@@ -17,7 +21,7 @@ from architect import (
 )
 
 try:
-    from main import enrich_groups_with_nodes
+    from main import compact_enriched_groups, enrich_groups_with_nodes
     HAS_MAIN = True
 except Exception:
     HAS_MAIN = False
@@ -107,6 +111,36 @@ class TestEnrichGroupsWithNodes:
         enriched = enrich_groups_with_nodes(nodes, groups)
         assert enriched[0]["text_nodes"] == []
 
+    def test_interleaved_subtrees_end_at_first_non_descendant(self, sample_nodes):
+        """4_1 ends where 4_2 starts even though a later 4_1_x group follows."""
+        groups = [
+            {"id": "4_1", "depth": 1, "first_node_index": 0, "x_indent": 90.0},
+            {"id": "4_1_2", "depth": 2, "first_node_index": 2, "x_indent": 90.0},
+            {"id": "4_2", "depth": 1, "first_node_index": 5, "x_indent": 90.0},
+            {"id": "4_1_3", "depth": 2, "first_node_index": 8, "x_indent": 90.0},
+        ]
+        enriched = {g["id"]: [tn["node_index"] for tn in g["text_nodes"]]
+                    for g in enrich_groups_with_nodes(sample_nodes, groups)}
+        assert enriched == {
+            "4_1": [0, 1, 2, 3, 4],
+            "4_1_2": [2, 3, 4],
+            "4_2": [5, 6, 7],
+            "4_1_3": [8, 9],
+        }
+
+    def test_compact_round_trips_to_full_form(self, sample_nodes, sample_groups, tmp_path):
+        """load_enriched_groups() expands the compact form to the full one."""
+        path = tmp_path / "groups_enriched.json"
+        path.write_text(json.dumps(compact_enriched_groups(sample_nodes, sample_groups)))
+        assert load_enriched_groups(str(path)) == enrich_groups_with_nodes(sample_nodes, sample_groups)
+
+    def test_compact_stores_each_node_once(self, sample_nodes, sample_groups):
+        compact = compact_enriched_groups(sample_nodes, sample_groups)
+        assert len(compact["nodes"]) == len(sample_nodes)
+        ranges = {g["id"]: g["node_range"] for g in compact["groups"]}
+        assert ranges["4_1_2"] == [2, 5]
+        assert "text_nodes" not in compact["groups"][0]
+
 
 # ---------------------------------------------------------------------------
 # Validation tests
@@ -424,6 +458,74 @@ class TestGatherProcessNodes:
         assert indices == [8, 9]
 
 
+class TestChunking:
+    @staticmethod
+    def _node(code: str, text: str = "x" * 40) -> dict:
+        return {"node_index": 0, "text": text, "rule_code": code, "is_bold": False, "is_italic": False}
+
+    @pytest.fixture
+    def groups(self):
+        return [
+            {"id": "4_2", "text_nodes": [self._node("4.2.1"), self._node("4.2.2")]},
+            {"id": "4_3", "text_nodes": [self._node("4.3.1")]},
+            {"id": "4_4", "text_nodes": [
+                self._node("4.4.1"), self._node("4.4.1(1)"), self._node(""),
+                self._node("4.4.2"), self._node("4.4.2(1)"),
+                self._node("4.4.3"),
+            ]},
+        ]
+
+    def test_small_process_is_one_chunk(self, groups):
+        toc = {"p": ["4_2", "4_3"]}
+        assert chunk_process_nodes("p", groups, toc) == [gather_process_nodes("p", groups, toc)]
+        assert chunk_process_nodes("p", groups, toc, max_tokens=0) == [gather_process_nodes("p", groups, toc)]
+        assert chunk_process_nodes("missing", groups, toc) == []
+
+    def test_packs_whole_sections(self, groups):
+        toc = {"p": ["4_2", "4_3"]}
+        section = estimate_node_tokens(groups[0]["text_nodes"])
+        chunks = chunk_process_nodes("p", groups, toc, max_tokens=section)
+        assert chunks == [groups[0]["text_nodes"], groups[1]["text_nodes"]]
+
+    def test_oversized_section_splits_between_rules(self, groups):
+        toc = {"p": ["4_2", "4_4"]}
+        budget = estimate_node_tokens(groups[2]["text_nodes"][3:])  # 4.4.2 + 4.4.3
+        chunks = chunk_process_nodes("p", groups, toc, max_tokens=budget)
+        codes = [[n["rule_code"] for n in c] for c in chunks]
+        # 4_2 fits whole; 4.4.1 keeps its paragraph and note; 4.4.2 + 4.4.3 pack together
+        assert codes == [["4.2.1", "4.2.2"], ["4.4.1", "4.4.1(1)", ""], ["4.4.2", "4.4.2(1)", "4.4.3"]]
+        assert [n for c in chunks for n in c] == gather_process_nodes("p", groups, toc)
+
+    def test_oversized_rule_splits_between_paragraphs(self, groups):
+        toc = {"p": ["4_4"]}
+        one = estimate_node_tokens([self._node("4.4.1(1)")])
+        chunks = chunk_process_nodes("p", groups, toc, max_tokens=one)
+        assert [[n["rule_code"] for n in c] for c in chunks] == [
+            ["4.4.1"], ["4.4.1(1)", ""], ["4.4.2"], ["4.4.2(1)"], ["4.4.3"],
+        ]
+
+    def test_merge_dedupes_groups_controls_and_rules(self):
+        rule = {"target": "4_2_1", "scope": "x", "effect": "SHOW", "schema": {"const": "Yes"}}
+        a = {
+            "groups": [{"id": "kyc", "title": "KYC"}],
+            "controls": [{"id": "4_2_1", "group": "kyc", "source-rules": ["4.2.1"]}],
+            "rules": [rule],
+        }
+        b = {
+            "groups": [{"id": "kyc", "title": "KYC (dup)"}, {"id": "verify", "title": "Verify"}],
+            "controls": [
+                {"id": "4_2_1", "group": "kyc", "source-rules": ["4.2.1", "4.2.2"]},
+                {"id": "4_3_1", "group": "verify", "source-rules": ["4.3.1"]},
+            ],
+            "rules": [dict(rule)],
+        }
+        merged = merge_chunk_results([a, b])
+        assert [g["title"] for g in merged["groups"]] == ["KYC", "Verify"]
+        assert [c["id"] for c in merged["controls"]] == ["4_2_1", "4_3_1"]
+        assert merged["controls"][0]["source-rules"] == ["4.2.1", "4.2.2"]
+        assert merged["rules"] == [rule]
+
+
 class TestProcessOutput:
     def test_process_output_with_source_rules(self):
         """Process output controls should accept source-rules field."""
@@ -611,3 +713,825 @@ class TestReviewTool:
     def test_unmapped_reason_enum(self):
         unmapped_props = REVIEW_TOOL["input_schema"]["properties"]["unmapped_assessment"]["items"]["properties"]
         assert set(unmapped_props["reason"]["enum"]) == {"correctly_omitted", "should_be_mapped", "already_covered"}
+
+
+# ---------------------------------------------------------------------------
+# Concurrent architect runs against a local stub of the Messages API
+# ---------------------------------------------------------------------------
+
+class _StubMessagesAPI:
+    """Minimal Messages API server: /v1/messages and /v1/messages/batches.
+
+    Answers with one tool call matching the request's tool_choice. Earlier
+    requests are answered more slowly, so concurrent calls complete out of
+    order; peak in-flight requests are recorded. Request payloads are kept
+    in ``payloads``, and prompt caching is simulated: a cache_control prefix
+    is written by the first response that completes with it and read by
+    every later request.
+
+    ``events`` logs (tool name, "start"/"end") for every /v1/messages call.
+    Batches end after ``batch_polls`` retrievals; while ``retrieve_error``
+    is set, retrieving a batch fails with HTTP 400.
+
+    Faults: each /v1/messages call first pops ``faults`` — (status, headers)
+    pairs answered as API errors — and once ``fail_after`` calls have
+    succeeded, every further call is answered 529 overloaded. ``faulted``
+    counts the error responses.
+
+    Requests with "stream": true are answered as server-sent events, the
+    tool input split into small input_json deltas. The next ``malformed``
+    architect calls answer with numeric group ids.
+    """
+
+    PREFIX_TOKENS = 1000
+
+    def __init__(self, delays=(0.3, 0.2, 0.1), batch_polls: int = 2):
+        import http.server
+        import threading
+
+        self.delays = list(delays)
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.payloads = []
+        self.events = []
+        self.cached_prefixes = set()
+        self.batch_polls = batch_polls
+        self.batches = {}
+        self.retrieve_error = False
+        self.faults = []
+        self.fail_after = None
+        self.faulted = 0
+        self.malformed = 0
+        lock = threading.Lock()
+        stub = self
+
+        def cache_prefix(payload):
+            if any("cache_control" in b for b in payload.get("system") or [] if isinstance(b, dict)):
+                return json.dumps([payload["model"], payload.get("tools"), payload["system"]], sort_keys=True)
+            return None
+
+        def usage_for(prefix, hit):
+            usage = {"input_tokens": 10, "output_tokens": 5}
+            if prefix is not None:
+                usage["cache_read_input_tokens" if hit else "cache_creation_input_tokens"] = stub.PREFIX_TOKENS
+            return usage
+
+        def batch_json(batch_id):
+            batch = stub.batches[batch_id]
+            ended = batch["polls"] >= stub.batch_polls
+            n = len(batch["results"])
+            return {
+                "id": batch_id,
+                "type": "message_batch",
+                "processing_status": "ended" if ended else "in_progress",
+                "request_counts": {"processing": 0 if ended else n, "succeeded": n if ended else 0,
+                                   "errored": 0, "canceled": 0, "expired": 0},
+                "created_at": "2025-01-01T00:00:00Z",
+                "expires_at": "2025-01-02T00:00:00Z",
+                "ended_at": "2025-01-01T00:01:00Z" if ended else None,
+                "archived_at": None,
+                "cancel_initiated_at": None,
+                "results_url": f"{stub.url}/v1/messages/batches/{batch_id}/results" if ended else None,
+            }
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def _send(self, status, body: bytes, content_type="application/json", headers=None):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                import time
+                payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                if self.path.startswith("/v1/messages/batches"):
+                    with lock:
+                        batch_id = f"msgbatch_{len(stub.batches) + 1}"
+                        results = []
+                        for req in payload["requests"]:
+                            stub.payloads.append(req["params"])
+                            prefix = cache_prefix(req["params"])
+                            results.append({"custom_id": req["custom_id"], "result": {
+                                "type": "succeeded",
+                                "message": _stub_message(req["params"], usage_for(prefix, prefix in stub.cached_prefixes)),
+                            }})
+                            stub.cached_prefixes.add(prefix)
+                        stub.batches[batch_id] = {"polls": 0, "results": results}
+                        body = batch_json(batch_id)
+                    return self._send(200, json.dumps(body).encode())
+
+                with lock:
+                    fault = stub.faults.pop(0) if stub.faults else None
+                    if fault is None and stub.fail_after is not None and stub.requests >= stub.fail_after:
+                        fault = (529, {})
+                    if fault is not None:
+                        stub.faulted += 1
+                if fault is not None:
+                    status, headers = fault
+                    return self._send(status, json.dumps({"type": "error", "error": {
+                        "type": "overloaded_error" if status == 529 else "api_error",
+                        "message": f"stub: injected {status}"}}).encode(), headers=headers)
+
+                prefix = cache_prefix(payload)
+                with lock:
+                    malformed = stub.malformed > 0 and payload["tool_choice"]["name"] == "output_section_data"
+                    stub.malformed -= malformed
+                    delay = stub.delays[stub.requests % len(stub.delays)]
+                    stub.requests += 1
+                    stub.payloads.append(payload)
+                    stub.events.append((payload["tool_choice"]["name"], "start"))
+                    stub.in_flight += 1
+                    stub.max_in_flight = max(stub.max_in_flight, stub.in_flight)
+                    hit = prefix in stub.cached_prefixes
+                time.sleep(delay)
+                with lock:
+                    stub.events.append((payload["tool_choice"]["name"], "end"))
+                    stub.in_flight -= 1
+                    if prefix is not None:
+                        stub.cached_prefixes.add(prefix)
+                message = _stub_message(payload, usage_for(prefix, hit), malformed)
+                if not payload.get("stream"):
+                    return self._send(200, json.dumps(message).encode())
+                self._send(200, _stub_event_stream(message), "text/event-stream")
+
+            def do_GET(self):
+                parts = self.path.split("?")[0].strip("/").split("/")
+                batch_id = parts[3]
+                if parts[-1] == "results":
+                    lines = [json.dumps(r) for r in reversed(stub.batches[batch_id]["results"])]
+                    return self._send(200, "\n".join(lines).encode(), "application/binary")
+                if stub.retrieve_error:
+                    return self._send(400, json.dumps({"type": "error", "error": {
+                        "type": "invalid_request_error", "message": "stub: retrieval disabled"}}).encode())
+                with lock:
+                    body = batch_json(batch_id)
+                    stub.batches[batch_id]["polls"] += 1
+                self._send(200, json.dumps(body).encode())
+
+            def log_message(self, *args):
+                pass
+
+        self.server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def _stub_message(payload: dict, usage: dict, malformed: bool = False) -> dict:
+    tool = payload["tool_choice"]["name"]
+    # Keys follow OUTPUT_TOOL's property order (controls, groups, rules), as the model emits them
+    if malformed:
+        tool_input = {
+            "controls": [{"id": "4_1_1", "group": "4_1", "label": "Q?"}],
+            "groups": [{"id": f"4_{i}", "title": "Numbered", "variant": "main"} for i in range(1, 6)],
+            "rules": [],
+        }
+    elif tool == "output_review":
+        tool_input = {"reviews": [{"control_id": "4_2_1", "quality": "good"}], "unmapped_assessment": []}
+    else:
+        tool_input = {
+            "controls": [{
+                "id": "4_2_1",
+                "group": "stub-group",
+                "label": "Q?",
+                "detail-required": False,
+                "correct-option": "Yes",
+                "source-rules": ["4.2.1"],
+                "mapping-confidence": 0.9,
+            }],
+            "groups": [{"id": slug, "title": "Stub", "variant": "main"}
+                       for slug in ("stub-group", "stub-extra", "stub-more")],
+            "rules": [],
+        }
+    return {
+        "id": "msg_stub",
+        "type": "message",
+        "role": "assistant",
+        "model": payload["model"],
+        "content": [{"type": "tool_use", "id": "toolu_stub", "name": tool, "input": tool_input}],
+        "stop_reason": "tool_use",
+        "stop_sequence": None,
+        "usage": usage,
+    }
+
+
+def _stub_event_stream(message: dict) -> bytes:
+    """*message* as Messages API server-sent events."""
+    block = message["content"][0]
+    usage = message["usage"]
+    events = [("message_start", {"type": "message_start", "message": {
+        **message, "content": [], "stop_reason": None, "usage": {**usage, "output_tokens": 0}}})]
+    events.append(("content_block_start", {"type": "content_block_start", "index": 0,
+                                           "content_block": {**block, "input": {}}}))
+    tool_json = json.dumps(block["input"])
+    for i in range(0, len(tool_json), 16):
+        events.append(("content_block_delta", {"type": "content_block_delta", "index": 0, "delta": {
+            "type": "input_json_delta", "partial_json": tool_json[i:i + 16]}}))
+    events.append(("content_block_stop", {"type": "content_block_stop", "index": 0}))
+    events.append(("message_delta", {"type": "message_delta", "usage": {"output_tokens": usage["output_tokens"]},
+                                     "delta": {"stop_reason": message["stop_reason"], "stop_sequence": None}}))
+    events.append(("message_stop", {"type": "message_stop"}))
+    return "".join(f"event: {name}\ndata: {json.dumps(data)}\n\n" for name, data in events).encode()
+
+
+class TestConcurrentArchitect:
+    PROCESS_IDS = list(PROCESS_FORMS)[:3]
+
+    @pytest.fixture
+    def run_dir(self, tmp_path):
+        run_dir = tmp_path / "run"
+        run_dir.mkdir()
+        groups = []
+        toc = {}
+        for i, pid in enumerate(self.PROCESS_IDS):
+            gid = f"4_{i + 2}"
+            groups.append({
+                "id": gid,
+                "text_nodes": [
+                    {"node_index": j, "text": f"Rule {j}", "rule_code": f"4.{i + 2}.{j}",
+                     "is_bold": False, "is_italic": False}
+                    for j in range(1, i + 3)
+                ],
+            })
+            toc[pid] = [gid]
+        (run_dir / "groups_enriched.json").write_text(json.dumps(groups))
+        (run_dir / "toc_classified.json").write_text(json.dumps({"process_to_sections": toc}))
+        return run_dir
+
+    def _run(self, monkeypatch, tmp_path, run_dir, name, concurrency, stub=None, **kwargs):
+        """Run the architect into tmp_path/<name> against *stub* (a fresh stub by default)."""
+        import contextlib
+        import architect
+        import llm_client
+        import model_router
+        out = tmp_path / name
+        monkeypatch.setattr(llm_client, "LLM_CACHE_DIR", str(tmp_path / "llm-cache"))
+        monkeypatch.setattr(model_router, "MODEL_STATS_PATH", str(tmp_path / "model_stats.jsonl"))
+        monkeypatch.setattr(llm_client, "BATCH_POLL_SECONDS", 0.01)
+        monkeypatch.setattr(llm_client, "RETRY_BASE_SECONDS", 0.01)
+        monkeypatch.setattr(architect, "PROCESSES_DIR", out)
+        monkeypatch.setattr(architect, "FEEDBACK_DIR_PATH", tmp_path / "no-feedback")
+        monkeypatch.setattr(architect, "PROCESS_FORMS", {pid: PROCESS_FORMS[pid] for pid in self.PROCESS_IDS})
+        with (_StubMessagesAPI() if stub is None else contextlib.nullcontext(stub)) as stub:
+            monkeypatch.setenv("ANTHROPIC_BASE_URL", stub.url)
+            monkeypatch.setenv("ANTHROPIC_API_KEY", "test-key")
+            architect.run_process_architect(str(run_dir), concurrency=concurrency, rate=100.0, **kwargs)
+        return out, stub
+
+    def test_concurrent_output_matches_serial(self, monkeypatch, tmp_path, run_dir):
+        serial_dir, serial_stub = self._run(monkeypatch, tmp_path, run_dir, "serial", 1, use_cache=False)
+        conc_dir, conc_stub = self._run(monkeypatch, tmp_path, run_dir, "concurrent", 3, use_cache=False)
+
+        assert serial_stub.max_in_flight == 1
+        assert conc_stub.max_in_flight > 1
+        names = sorted(p.name for p in serial_dir.iterdir())
+        assert names == sorted([f"{pid}.json" for pid in self.PROCESS_IDS] + ["_coverage_audit.json"])
+        assert sorted(p.name for p in conc_dir.iterdir()) == names
+        for name in names:
+            assert (conc_dir / name).read_bytes() == (serial_dir / name).read_bytes()
+
+        audit = json.loads((conc_dir / "_coverage_audit.json").read_text())
+        assert list(audit["processes"]) == self.PROCESS_IDS
+        assert audit["summary"]["total_input_rules"] == 2 + 3 + 4
+
+    def test_rerun_is_served_from_response_cache(self, monkeypatch, tmp_path, run_dir):
+        first_dir, first_stub = self._run(monkeypatch, tmp_path, run_dir, "first", 1)
+        second_dir, second_stub = self._run(monkeypatch, tmp_path, run_dir, "second", 1)
+        refresh_dir, refresh_stub = self._run(monkeypatch, tmp_path, run_dir, "refresh", 1, refresh=True)
+
+        assert first_stub.requests == len(self.PROCESS_IDS)
+        assert second_stub.requests == 0
+        assert refresh_stub.requests == len(self.PROCESS_IDS)
+        for p in first_dir.iterdir():
+            assert (second_dir / p.name).read_bytes() == p.read_bytes()
+
+    def test_static_prefix_is_prompt_cached_once(self, monkeypatch, tmp_path, run_dir, caplog):
+        from architect import OUTPUT_TOOL, PROCESS_SYSTEM_PROMPT
+        with caplog.at_level("INFO", logger="architect"):
+            _, stub = self._run(monkeypatch, tmp_path, run_dir, "out", 3, use_cache=False)
+
+        assert len(stub.payloads) == len(self.PROCESS_IDS)
+        for payload in stub.payloads:
+            assert payload["system"] == [{"type": "text", "text": PROCESS_SYSTEM_PROMPT,
+                                          "cache_control": {"type": "ephemeral"}}]
+            assert payload["tools"] == [OUTPUT_TOOL]
+        assert len({p["messages"][0]["content"] for p in stub.payloads}) == len(self.PROCESS_IDS)
+
+        # First call writes the prefix alone; the other two read it
+        n = len(self.PROCESS_IDS)
+        assert f"0 cache read, {stub.PREFIX_TOKENS} cache write" in caplog.text
+        assert (f"API usage: {n} call(s): {10 * n} in, {stub.PREFIX_TOKENS * (n - 1)} cache read, "
+                f"{stub.PREFIX_TOKENS} cache write") in caplog.text
+
+    def test_batch_mode_matches_serial(self, monkeypatch, tmp_path, run_dir):
+        serial_dir, _ = self._run(monkeypatch, tmp_path, run_dir, "serial", 1, use_cache=False, run_review=True)
+        batch_dir, stub = self._run(monkeypatch, tmp_path, run_dir, "batch", 1,
+                                    use_cache=False, run_review=True, batch=True)
+
+        assert stub.requests == 0  # nothing went through /v1/messages
+        assert len(stub.batches) == 2  # one architect batch, one review batch
+        for p in serial_dir.iterdir():
+            assert (batch_dir / p.name).read_bytes() == p.read_bytes()
+        review = json.loads((batch_dir / "_review_results.json").read_text())
+        assert list(review) == self.PROCESS_IDS
+        assert not (run_dir / "architect_batch.json").exists()
+        assert not (run_dir / "review_batch.json").exists()
+
+    def test_batch_resumes_from_persisted_id(self, monkeypatch, tmp_path, run_dir):
+        import anthropic
+        with _StubMessagesAPI() as stub:
+            stub.retrieve_error = True  # run is "interrupted" after submission
+            with pytest.raises(anthropic.APIStatusError):
+                self._run(monkeypatch, tmp_path, run_dir, "out", 1, stub=stub, batch=True)
+            state = json.loads((run_dir / "architect_batch.json").read_text())
+            assert state["batch_id"] == "msgbatch_1"
+            assert sorted(state["requests"]) == sorted(self.PROCESS_IDS)
+
+            stub.retrieve_error = False
+            out, _ = self._run(monkeypatch, tmp_path, run_dir, "out", 1, stub=stub, batch=True)
+
+        assert list(stub.batches) == ["msgbatch_1"]  # resumed, not resubmitted
+        assert sorted(p.name for p in out.iterdir()) == sorted(
+            [f"{pid}.json" for pid in self.PROCESS_IDS] + ["_coverage_audit.json"])
+        assert not (run_dir / "architect_batch.json").exists()
+
+    def test_oversized_processes_are_chunked_and_merged(self, monkeypatch, tmp_path, run_dir):
+        out, stub = self._run(monkeypatch, tmp_path, run_dir, "out", 2, use_cache=False, chunk_tokens=5)
+
+        # every rule node is over budget alone → one call per node (2 + 3 + 4)
+        assert stub.requests == 9
+        assert all("## Partial Input (part" in p["messages"][0]["content"] for p in stub.payloads)
+        first = json.loads((out / f"{self.PROCESS_IDS[0]}.json").read_text())
+        assert [c["id"] for c in first["controls"]] == ["process-exists", "4_2_1"]
+        audit = json.loads((out / "_coverage_audit.json").read_text())
+        assert audit["processes"][self.PROCESS_IDS[0]]["total_input"] == 2
+        assert audit["summary"]["total_input_rules"] == 2 + 3 + 4
+
+    def test_unchanged_processes_are_skipped(self, monkeypatch, tmp_path, run_dir):
+        out, first = self._run(monkeypatch, tmp_path, run_dir, "out", 1, use_cache=False)
+        audit = (out / "_coverage_audit.json").read_bytes()
+        fingerprints = {pid: json.loads((out / f"{pid}.json").read_text())["_fingerprint"]
+                        for pid in self.PROCESS_IDS}
+        assert first.requests == len(self.PROCESS_IDS)
+
+        _, second = self._run(monkeypatch, tmp_path, run_dir, "out", 1, use_cache=False)
+        assert second.requests == 0
+        assert (out / "_coverage_audit.json").read_bytes() == audit
+
+        # An SME edits one feedback file: exactly that form is regenerated
+        edited = self.PROCESS_IDS[1]
+        feedback_dir = tmp_path / "no-feedback"
+        feedback_dir.mkdir()
+        (feedback_dir / f"{edited}.json").write_text(json.dumps({"notes": ["Tighten wording"]}))
+        _, third = self._run(monkeypatch, tmp_path, run_dir, "out", 1, use_cache=False)
+        assert third.requests == 1
+        assert "Tighten wording" in third.payloads[0]["messages"][0]["content"]
+        for pid in self.PROCESS_IDS:
+            fp = json.loads((out / f"{pid}.json").read_text())["_fingerprint"]
+            assert (fp != fingerprints[pid]) == (pid == edited)
+
+        _, forced = self._run(monkeypatch, tmp_path, run_dir, "out", 1, use_cache=False, force=True)
+        assert forced.requests == len(self.PROCESS_IDS)
+
+    def test_review_is_pipelined_with_generation(self, monkeypatch, tmp_path, run_dir):
+        serial_dir, _ = self._run(monkeypatch, tmp_path, run_dir, "serial", 1, use_cache=False)
+        out, stub = self._run(monkeypatch, tmp_path, run_dir, "out", 2, use_cache=False, run_review=True)
+
+        # The first form's review starts before the last form has been generated
+        first_review = stub.events.index(("output_review", "start"))
+        last_generation = max(i for i, e in enumerate(stub.events) if e == ("output_section_data", "end"))
+        assert first_review < last_generation
+
+        review = json.loads((out / "_review_results.json").read_text())
+        assert list(review) == self.PROCESS_IDS
+        for p in serial_dir.iterdir():
+            assert (out / p.name).read_bytes() == p.read_bytes()
+
+    def test_transient_errors_are_retried(self, monkeypatch, tmp_path, run_dir):
+        clean_dir, _ = self._run(monkeypatch, tmp_path, run_dir, "clean", 1, use_cache=False)
+        stub = _StubMessagesAPI()
+        stub.faults = [(429, {"retry-after": "0"}), (529, {}), (500, {}), (503, {"retry-after-ms": "10"})]
+        with stub:
+            out, _ = self._run(monkeypatch, tmp_path, run_dir, "out", 2, stub=stub, use_cache=False)
+
+        assert stub.faulted == 4
+        assert stub.requests == len(self.PROCESS_IDS)
+        for p in clean_dir.iterdir():
+            assert (out / p.name).read_bytes() == p.read_bytes()
+
+    def test_circuit_breaker_stops_run_and_rerun_resumes(self, monkeypatch, tmp_path, run_dir):
+        import llm_client
+        monkeypatch.setattr(llm_client, "CIRCUIT_FAILURE_THRESHOLD", 3)
+        stub = _StubMessagesAPI()
+        stub.fail_after = 1
+        with stub, pytest.raises(SystemExit):
+            self._run(monkeypatch, tmp_path, run_dir, "out", 1, stub=stub, use_cache=False)
+
+        # The first form is checkpointed; the breaker opened on the second,
+        # so the third never reached the server.
+        out = tmp_path / "out"
+        first, *rest = self.PROCESS_IDS
+        assert (out / f"{first}.json").exists()
+        assert not any((out / f"{pid}.json").exists() for pid in rest)
+        assert stub.faulted == 3
+
+        _, resumed = self._run(monkeypatch, tmp_path, run_dir, "out", 1, use_cache=False)
+        assert resumed.requests == len(rest)
+        audit = json.loads((out / "_coverage_audit.json").read_text())
+        assert list(audit["processes"]) == self.PROCESS_IDS
+
+    def test_router_records_stats_and_routes_regenerated_forms(self, monkeypatch, tmp_path, run_dir):
+        from architect import MODEL_LARGE, MODEL_SMALL
+        from model_router import ModelStats
+
+        out, _ = self._run(monkeypatch, tmp_path, run_dir, "out", 1, run_review=True)
+        fingerprints = {p.name: json.loads(p.read_text())["_fingerprint"]
+                        for p in out.glob("*.json") if p.stem in self.PROCESS_IDS}
+        stats = ModelStats(str(tmp_path / "model_stats.jsonl"))
+        forms = [r for r in stats.load() if r["kind"] == "form"]
+        reviews = [r for r in stats.load() if r["kind"] == "review"]
+        assert [r["process_id"] for r in forms] == self.PROCESS_IDS
+        assert {r["model"] for r in forms} == {MODEL_SMALL}
+        assert all(r["band"] == "small" and r["cost_usd"] > 0 for r in forms)
+        assert [r["process_id"] for r in reviews] == self.PROCESS_IDS
+
+        # Answered from the response cache: nothing new is recorded
+        self._run(monkeypatch, tmp_path, run_dir, "cached", 1)
+        assert len(stats.load()) == len(forms) + len(reviews)
+
+        # History says the large model covers small forms fully, and faster.
+        # Unchanged forms are kept; regenerated ones go to the routed model.
+        for r in forms:
+            stats._append({**r, "model": MODEL_LARGE, "coverage_pct": 100.0, "latency_s": r["latency_s"] / 10})
+        _, kept = self._run(monkeypatch, tmp_path, run_dir, "out", 1, route="latency")
+        assert kept.requests == 0
+        _, forced = self._run(monkeypatch, tmp_path, run_dir, "out", 1, route="latency", force=True,
+                              use_cache=False)
+        assert {p["model"] for p in forced.payloads} == {MODEL_LARGE}
+        # Regenerated forms carry the large model's fingerprint, not the one they replaced
+        assert all(json.loads((out / name).read_text())["_fingerprint"] != fp for name, fp in fingerprints.items())
+        _, rerun = self._run(monkeypatch, tmp_path, run_dir, "out", 1, route="latency")
+        assert rerun.requests == 0
+
+    def test_review_pool_shut_down_when_generation_raises(self, monkeypatch, tmp_path, run_dir):
+        import architect
+
+        pools = []
+
+        class TrackedPool(architect.ThreadPoolExecutor):
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, **kwargs)
+                self.shut_down = False
+                pools.append(self)
+
+            def shutdown(self, *args, **kwargs):
+                self.shut_down = True
+                super().shutdown(*args, **kwargs)
+
+        real_one = architect.architect_one_process
+
+        def fail_second(client, run_dir, process_id, *args):
+            if process_id == self.PROCESS_IDS[1]:
+                raise RuntimeError("unexpected")
+            return real_one(client, run_dir, process_id, *args)
+
+        monkeypatch.setattr(architect, "ThreadPoolExecutor", TrackedPool)
+        monkeypatch.setattr(architect, "architect_one_process", fail_second)
+        with pytest.raises(RuntimeError):
+            self._run(monkeypatch, tmp_path, run_dir, "out", 1, run_review=True, use_cache=False)
+        assert pools and all(p.shut_down for p in pools)
+
+    def test_malformed_stream_is_abandoned_and_reissued(self, monkeypatch, tmp_path, run_dir, caplog):
+        clean_dir, _ = self._run(monkeypatch, tmp_path, run_dir, "clean", 1, use_cache=False)
+        stub = _StubMessagesAPI()
+        stub.malformed = 1
+        with stub, caplog.at_level("WARNING", logger="architect"):
+            out, _ = self._run(monkeypatch, tmp_path, run_dir, "out", 1, stub=stub, use_cache=False)
+
+        assert stub.requests == len(self.PROCESS_IDS) + 1
+        assert all(p.get("stream") for p in stub.payloads)
+        assert "abandoned malformed output" in caplog.text
+        for p in clean_dir.iterdir():
+            assert (out / p.name).read_bytes() == p.read_bytes()
+
+    def test_record_then_replay_offline(self, monkeypatch, tmp_path, run_dir):
+        from replay import RecordingTransport, ReplayTransport
+        fixtures = tmp_path / "fixtures"
+        recorded, stub = self._run(monkeypatch, tmp_path, run_dir, "recorded", 2, use_cache=False, route="fixed",
+                                   run_review=True, transport=RecordingTransport(str(fixtures)))
+        assert len(list(fixtures.iterdir())) == stub.requests == 2 * len(self.PROCESS_IDS)
+
+        # No server behind the replay: latency and 529s are simulated, retries absorb the errors
+        offline = _StubMessagesAPI()
+        replay = ReplayTransport(str(fixtures), latency=0.02, error_rate=0.3, seed=1)
+        out, _ = self._run(monkeypatch, tmp_path, run_dir, "replayed", 2, stub=offline, use_cache=False,
+                           run_review=True, transport=replay)
+        offline.server.server_close()
+        assert offline.requests == 0
+        assert replay.errors > 0 and replay.misses == 0
+        for p in recorded.iterdir():
+            assert (out / p.name).read_bytes() == p.read_bytes()
+
+        # A request with no fixture fails its form rather than reaching the network
+        generation = [f for f in sorted(fixtures.iterdir())
+                      if json.loads(f.read_text())["request"]["tool_choice"]["name"] == "output_section_data"]
+        generation[0].unlink()
+        replay = ReplayTransport(str(fixtures))
+        with pytest.raises(SystemExit):
+            self._run(monkeypatch, tmp_path, run_dir, "missing", 1, stub=offline, use_cache=False, transport=replay)
+        assert replay.misses == 1
+
+    def test_token_bucket_paces_requests(self):
+        import time
+        from llm_client import TokenBucket
+
+        bucket = TokenBucket(rate=20.0, capacity=2)
+        t0 = time.monotonic()
+        for _ in range(4):
+            bucket.acquire()
+        # two immediate, then two more at 1/20 s apart
+        assert time.monotonic() - t0 >= 0.09
+
+
+class TestResponseCache:
+    def _message(self, text: str):
+        import anthropic
+        return anthropic.types.Message.model_validate({
+            "id": "msg_1", "type": "message", "role": "assistant", "model": "stub",
+            "content": [{"type": "text", "text": text}],
+            "stop_reason": "end_turn", "stop_sequence": None,
+            "usage": {"input_tokens": 1, "output_tokens": 1},
+        })
+
+    def test_key_covers_whole_request(self):
+        from llm_client import request_key
+        base = {"model": "m", "system": "s", "messages": [{"role": "user", "content": "u"}],
+                "tools": [{"name": "t"}], "max_tokens": 10}
+        assert request_key(base) == request_key(dict(reversed(list(base.items()))))
+        for field, value in [("model", "m2"), ("system", "s2"), ("tools", [{"name": "t2"}]),
+                             ("messages", [{"role": "user", "content": "u2"}])]:
+            assert request_key({**base, field: value}) != request_key(base)
+
+    def test_round_trip_refresh_and_disabled(self, tmp_path):
+        from llm_client import ResponseCache
+        cache = ResponseCache(str(tmp_path))
+        cache.put("ab" * 32, self._message("hello"))
+        assert cache.get("ab" * 32).content[0].text == "hello"
+        assert ResponseCache(str(tmp_path), refresh=True).get("ab" * 32) is None
+        disabled = ResponseCache(str(tmp_path), enabled=False)
+        assert disabled.get("ab" * 32) is None
+        disabled.put("cd" * 32, self._message("x"))
+        assert not (tmp_path / "cd").exists()
+
+    def test_evicts_least_recently_used(self, tmp_path, monkeypatch):
+        import os
+        from llm_client import ResponseCache
+        entry_size = len(self._message("x").model_dump_json())
+        cache = ResponseCache(str(tmp_path), max_bytes=entry_size * 5 // 2)
+        scans = []
+        real_entries = cache._entries
+        monkeypatch.setattr(cache, "_entries", lambda: scans.append(1) or real_entries())
+        keys = [c * 64 for c in "abc"]
+        cache.put(keys[0], self._message("x"))
+        cache.put(keys[1], self._message("x"))
+        assert len(scans) == 1  # the initial size scan only; puts under the limit don't rescan
+        os.utime(cache.path(keys[0]), (1, 1))
+        os.utime(cache.path(keys[1]), (2, 2))
+        cache.get(keys[0])  # touch: keys[1] is now the oldest
+        cache.put(keys[2], self._message("x"))
+        assert os.path.exists(cache.path(keys[0]))
+        assert not os.path.exists(cache.path(keys[1]))
+        assert os.path.exists(cache.path(keys[2]))
+
+    def test_cached_client_only_calls_api_on_miss(self, tmp_path):
+        from llm_client import CachedClient, ResponseCache
+        calls = []
+        message = self._message("hi")
+
+        class FakeMessages:
+            def create(self, **request):
+                calls.append(request)
+                return message
+
+        class FakeClient:
+            messages = FakeMessages()
+
+        client = CachedClient(FakeClient(), ResponseCache(str(tmp_path)))
+        for _ in range(3):
+            assert client.messages.create(model="m", messages=[]).content[0].text == "hi"
+        assert len(calls) == 1
+        assert (client.cache.hits, client.cache.misses) == (2, 1)
+
+
+class TestRetries:
+    def _error(self, status: int, headers: dict):
+        import anthropic
+        import httpx
+        response = httpx.Response(status, headers=headers, request=httpx.Request("POST", "http://stub/v1/messages"))
+        return anthropic.APIStatusError(f"HTTP {status}", response=response, body=None)
+
+    def test_backoff_honours_retry_after(self):
+        from email.utils import formatdate
+        import time
+        from llm_client import RetryPolicy
+
+        policy = RetryPolicy(max_attempts=3, base=0.0)
+        assert policy.delay(1, self._error(429, {"retry-after": "7"})) == 7.0
+        assert policy.delay(1, self._error(529, {"retry-after-ms": "250"})) == 0.25
+        assert 25 < policy.delay(1, self._error(503, {"retry-after": formatdate(time.time() + 30, usegmt=True)})) <= 30
+        jittered = RetryPolicy(base=1.0, cap=4.0)
+        assert all(0 <= jittered.delay(10, self._error(500, {})) <= 4.0 for _ in range(20))
+
+        assert policy.should_retry(1, self._error(529, {}))
+        assert not policy.should_retry(3, self._error(529, {}))
+        assert not policy.should_retry(1, self._error(400, {}))
+
+    def test_circuit_breaker_opens_and_half_opens(self):
+        import time
+        from llm_client import CircuitBreaker, CircuitOpenError
+
+        breaker = CircuitBreaker(threshold=2, reset_seconds=0.05)
+        breaker.record_failure()
+        breaker.before_call()
+        breaker.record_failure()
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call()
+
+        time.sleep(0.06)
+        breaker.before_call()  # the single half-open probe
+        with pytest.raises(CircuitOpenError):
+            breaker.before_call()
+        breaker.record_success()
+        breaker.before_call()
+
+    def test_failed_probe_does_not_wedge_the_breaker(self):
+        """A probe answered with a non-retryable error (or aborted locally) must not leave the circuit stuck."""
+        import anthropic
+        from llm_client import CachedClient, CircuitBreaker, RetryPolicy
+
+        outcomes = [self._error(529, {}), self._error(529, {}), self._error(400, {}), "ok",
+                    self._error(529, {}), self._error(529, {}), ValueError("stream aborted"), "ok"]
+
+        class FakeMessages:
+            def create(self, **request):
+                outcome = outcomes.pop(0)
+                if isinstance(outcome, Exception):
+                    raise outcome
+                return outcome
+
+        class FakeClient:
+            messages = FakeMessages()
+
+        client = CachedClient(FakeClient(), retry=RetryPolicy(max_attempts=5, base=0.0),
+                              breaker=CircuitBreaker(threshold=2, reset_seconds=0.0))
+        with pytest.raises(anthropic.APIStatusError):
+            client.call(client.client.messages.create)  # 529, 529 opens the circuit; the probe gets a 400
+        assert client.call(client.client.messages.create) == "ok"
+        with pytest.raises(ValueError):
+            client.call(client.client.messages.create)  # 529, 529, then the probe raises locally
+        assert client.call(client.client.messages.create) == "ok"
+        assert not outcomes
+
+
+    def test_call_in_flight_before_opening_does_not_release_the_probe(self):
+        """A call admitted while closed that ends after the circuit opened leaves the probe slot alone."""
+        import threading
+        import anthropic
+        from llm_client import CachedClient, CircuitBreaker, CircuitOpenError, RetryPolicy
+
+        stale_started, stale_go, probe_started, probe_go = (threading.Event() for _ in range(4))
+
+        def stale():
+            stale_started.set()
+            stale_go.wait(5)
+            raise ValueError("stream aborted")
+
+        def failing():
+            raise self._error(529, {})
+
+        def probe():
+            probe_started.set()
+            probe_go.wait(5)
+            return "ok"
+
+        client = CachedClient(object(), retry=RetryPolicy(max_attempts=1, base=0.0),
+                              breaker=CircuitBreaker(threshold=1, reset_seconds=0.0))
+        results = []
+
+        def run(fn):
+            try:
+                results.append(client.call(fn))
+            except Exception as e:
+                results.append(type(e).__name__)
+
+        threads = [threading.Thread(target=run, args=(stale,))]
+        threads[0].start()
+        assert stale_started.wait(5)
+        with pytest.raises(anthropic.APIStatusError):
+            client.call(failing)  # opens the circuit
+        threads.append(threading.Thread(target=run, args=(probe,)))
+        threads[1].start()
+        assert probe_started.wait(5)
+
+        stale_go.set()
+        threads[0].join(5)
+        with pytest.raises(CircuitOpenError):
+            client.breaker.before_call()  # the probe is still in flight
+        probe_go.set()
+        threads[1].join(5)
+        assert results == ["ValueError", "ok"]
+        assert client.breaker.before_call() is False
+
+class TestModelRouter:
+    SMALL, LARGE = "claude-haiku-4-5-20251001", "claude-sonnet-4-5-20250929"
+
+    @pytest.fixture
+    def stats(self, tmp_path):
+        from model_router import ModelStats
+        return ModelStats(str(tmp_path / "stats.jsonl"))
+
+    def _form(self, stats, model, nodes, coverage, latency=10.0, tokens=(1000, 1000)):
+        usage = type("Usage", (), {"input_tokens": tokens[0], "output_tokens": tokens[1]})()
+        report = {"coverage_pct": coverage, "low_confidence": []}
+        stats.record_form(f"p{len(stats.load())}", model, nodes, [{"usage": usage, "warnings": 0}], latency, report)
+
+    def test_size_bands_and_cost(self):
+        from model_router import estimate_cost, size_band
+        assert [size_band(n) for n in (0, 49, 50, 199, 200)] == ["small", "small", "medium", "medium", "large"]
+        assert estimate_cost(self.LARGE, {"input_tokens": 1_000_000, "output_tokens": 100_000}) == 4.5
+        assert estimate_cost("unknown-model", {"input_tokens": 1}) is None
+
+    def test_routes_to_cheapest_qualifying_model(self, stats):
+        from model_router import ModelRouter
+        for _ in range(3):
+            self._form(stats, self.LARGE, 120, 99.0)
+        for coverage in (100.0, 98.0):
+            self._form(stats, self.SMALL, 120, coverage)
+
+        # Two small-model runs are not enough evidence yet
+        router = ModelRouter(stats, (self.SMALL, self.LARGE))
+        assert router.choose(120, self.LARGE)[0] == self.LARGE
+
+        self._form(stats, self.SMALL, 120, 97.0)
+        router = ModelRouter(stats, (self.SMALL, self.LARGE))
+        assert router.choose(120, self.LARGE)[0] == self.SMALL
+        assert router.choose(300, self.LARGE)[0] == self.LARGE   # no history in the large band
+        assert ModelRouter(stats, (self.SMALL, self.LARGE), "latency").choose(120, self.SMALL)[0] == self.SMALL
+
+    def test_low_coverage_or_bad_reviews_disqualify(self, stats):
+        from model_router import ModelRouter
+        for coverage in (99.0, 80.0, 90.0):
+            self._form(stats, self.SMALL, 10, coverage)
+        assert ModelRouter(stats, (self.SMALL, self.LARGE)).choose(10, self.LARGE)[0] == self.LARGE
+
+        for _ in range(3):
+            self._form(stats, self.SMALL, 60, 100.0)
+            pid = f"p{len(stats.load()) - 1}"
+            stats.record_review(pid, {"reviews": [{"quality": "incorrect"}, {"quality": "good"}]})
+        assert ModelRouter(stats, (self.SMALL, self.LARGE)).choose(60, self.LARGE)[0] == self.LARGE
+
+
+class TestStreamValidator:
+    def test_checks_only_completed_items(self):
+        from architect import StreamValidator
+        v = StreamValidator("p")
+        v({"groups": [{"id": "ok-group"}, {"id": "4"}]})      # last group may still be streaming
+        assert v.invalid == []
+        v({"groups": [{"id": "ok-group"}, {"id": "4_2"}], "controls": [{"id": "4"}]})
+        assert v.invalid == ["group id '4_2'"]
+        v({"groups": [{"id": "ok-group"}, {"id": "4_2"}],
+           "controls": [{"id": "4_2_1", "group": "ok-group"}, {"id": "4_2_2", "group": "4_2"}], "rules": []})
+        assert v.invalid == ["group id '4_2'", "control '4_2_2' group '4_2'"]
+
+    def test_controls_first_waits_for_each_group_to_finish(self):
+        """Schema order: a group still streaming (no id yet) is not judged, refs wait for the last group."""
+        from architect import StreamValidator
+        v = StreamValidator("p")
+        controls = [{"id": "4_2_1", "group": "kyc"}, {"id": "4_2_2", "group": "unknown"}]
+        v({"controls": controls[:1]})
+        v({"controls": controls, "groups": [{}]})
+        v({"controls": controls, "groups": [{"id": "kyc"}, {}]})
+        v({"controls": controls, "groups": [{"id": "kyc"}, {"id": "verify"}, {"id": "re"}]})
+        assert v.invalid == []
+        v({"controls": controls, "groups": [{"id": "kyc"}, {"id": "verify"}, {"id": "report"}], "rules": []})
+        assert v.invalid == ["control '4_2_2' group 'unknown'"]
+
+    def test_aborts_once_clearly_malformed(self):
+        from architect import MalformedOutputError, StreamValidator
+        snapshot = {"groups": [{"id": f"4_{i}"} for i in range(4)], "controls": []}
+        with pytest.raises(MalformedOutputError, match="invalid items"):
+            StreamValidator("p")(snapshot)
+        lenient = StreamValidator("p", abort=False)
+        lenient(snapshot)
+        assert len(lenient.invalid) == 4
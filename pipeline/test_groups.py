@@ -6,10 +6,12 @@ import sys
 
 sys.path.insert(0, ".")
 from main import (
+    _ancestor_prefixes,
     _filter_sequential_rule_codes,
     _normalise_full,
     _parse_rule_code,
     build_groups,
+    build_groups_with_spans,
 )
 
 NODES_PATH = "runs/1/nodes.json"
@@ -165,6 +167,38 @@ def test_roman_numeral_chain_groups_removed():
     assert "4_1_3_b" in ids, "4_1_3_b should exist (indent-confirmed)"
 
 
+def test_ancestor_prefixes_split_on_segment_boundaries():
+    assert _ancestor_prefixes("4_1_3_a") == ["4", "4_1", "4_1_3", "4_1_3_a"]
+    assert _ancestor_prefixes("4") == ["4"]
+
+
+def test_membership_does_not_match_partial_segments():
+    """4.1.10(x) members must not count towards group 4_1_1."""
+    nodes = [
+        {"node_index": 0, "rule_code": "4.1.1(1)", "x_indent": 125.8},
+        {"node_index": 1, "rule_code": "4.1.10(1)", "x_indent": 125.8},
+        {"node_index": 2, "rule_code": "4.1.10(2)", "x_indent": 125.8},
+    ]
+    ids = {g["id"] for g in build_groups(nodes)}
+    assert "4_1_10" in ids
+    assert "4_1_1" not in ids, "4_1_1 has one real member and should be removed"
+
+
+def test_group_spans_cover_first_and_last_member():
+    nodes = [
+        {"node_index": 0, "rule_code": "4.1.3", "x_indent": 89.8},
+        {"node_index": 1, "rule_code": "4.1.3(1)", "x_indent": 125.8},
+        {"node_index": 2, "rule_code": "", "x_indent": 125.8},
+        {"node_index": 3, "rule_code": "4.1.3(2)", "x_indent": 125.8},
+        {"node_index": 4, "rule_code": "4.1.4", "x_indent": 89.8},
+    ]
+    groups, spans = build_groups_with_spans(nodes)
+    assert groups == build_groups(nodes)
+    assert spans["4_1_3"] == (0, 3)
+    assert spans["4_1"] == (0, 4)
+    assert set(spans) <= {g["id"] for g in groups}
+
+
 # ---------------------------------------------------------------------------
 # Integration tests on real data
 # ---------------------------------------------------------------------------
@@ -370,3 +370,628 @@ class TestServeSmoke:
         # Must NOT appear in pipeline/runs/
         runs_path = PIPELINE_DIR / "runs" / "1" / "feedback" / "dir-check-form.json"
         assert not runs_path.exists(), f"File was incorrectly written to {runs_path}"
+
+
+# ---------------------------------------------------------------------------
+# Page-parallel scrape — must reproduce the serial nodes.json exactly
+# ---------------------------------------------------------------------------
+
+def _scrape_to_nodes(pdf_path: Path, **scraper_kwargs) -> list[dict]:
+    """Run the scrape → parents → top-level → references stages like run_pipeline."""
+    from main import PDFScraper, assign_parents, assign_top_level, link_references
+
+    nodes = PDFScraper(str(pdf_path), str(PIPELINE_DIR), **scraper_kwargs).scrape()
+    assign_parents(nodes)
+    assign_top_level(nodes)
+    link_references(nodes)
+    return [{k: v for k, v in n.items() if k != "bbox"} for n in nodes]
+
+
+@pytest.fixture(scope="module")
+def reference_nodes():
+    """runs/1/nodes.json: the serial pdfplumber scrape of chapter4.pdf."""
+    with open(PIPELINE_DIR / "runs" / "1" / "nodes.json") as f:
+        return json.load(f)
+
+
+def _write_tiny_pdf(pdf_path: Path, pages: int = 3) -> Path:
+    """A throwaway PDF with one rule per page: 4.1.1, 4.1.2, …"""
+    import fitz
+
+    doc = fitz.open()
+    for i in range(pages):
+        page = doc.new_page()
+        page.insert_text((90, 200), f"4.1.{i + 1} Rule text on page {i + 1}.")
+    doc.save(pdf_path)
+    doc.close()
+    return pdf_path
+
+
+class TestParallelScrape:
+    def test_parallel_scrape_matches_run_1(self, reference_nodes):
+        """A 2-worker scrape of chapter4.pdf reproduces runs/1/nodes.json."""
+        nodes = _scrape_to_nodes(PIPELINE_DIR / "chapter4.pdf", workers=2)
+        assert nodes == reference_nodes
+
+    def test_parallel_chunks_cover_every_page_once(self, monkeypatch):
+        """Chunk boundaries must tile the page range with no gaps or overlaps."""
+        import main
+
+        seen: list[tuple[int, int]] = []
+
+        class InlinePool:
+            def __init__(self, max_workers):
+                pass
+
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc):
+                return False
+
+            def map(self, fn, *iterables):
+                for args in zip(*iterables):
+                    seen.append((args[1], args[2]))
+                    yield []
+
+        monkeypatch.setattr(main, "ProcessPoolExecutor", InlinePool)
+        scraper = main.PDFScraper(str(PIPELINE_DIR / "chapter4.pdf"), str(PIPELINE_DIR), workers=3)
+        scraper._extract_lines_parallel(41)
+
+        covered = [p for start, stop in seen for p in range(start, stop)]
+        assert covered == list(range(1, 42))
+
+
+class TestFitzBackend:
+    def test_fitz_scrape_matches_run_1(self, reference_nodes):
+        """The PyMuPDF backend yields the same nodes as pdfplumber on chapter4.pdf."""
+        nodes = _scrape_to_nodes(PIPELINE_DIR / "chapter4.pdf", backend="fitz")
+        assert nodes == reference_nodes
+
+    def test_unknown_backend_rejected(self):
+        from pdf_backends import open_pdf
+
+        with pytest.raises(ValueError, match="Unknown PDF backend"):
+            open_pdf(str(PIPELINE_DIR / "chapter4.pdf"), backend="poppler")
+
+
+class TestSinglePassOpen:
+    def test_scrape_parses_pdf_once(self, tmp_path, monkeypatch):
+        """Boilerplate sampling and extraction share one pdfplumber document."""
+        import main
+        import pdf_backends
+
+        pdf_path = _write_tiny_pdf(tmp_path / "tiny.pdf")
+
+        opens = []
+        real_open = pdf_backends.pdfplumber.open
+
+        def counting_open(path, *args, **kwargs):
+            opens.append(path)
+            return real_open(path, *args, **kwargs)
+
+        monkeypatch.setattr(pdf_backends.pdfplumber, "open", counting_open)
+        nodes = main.PDFScraper(str(pdf_path), str(tmp_path)).scrape()
+
+        assert len(opens) == 1
+        assert [n["rule_code"] for n in nodes] == ["4.1.1", "4.1.2", "4.1.3"]
+
+
+def _write_toc_pdf(pdf_path: Path, cover_pages: int = 1) -> Path:
+    """Cover page(s), a one-page Contents, then one page per rule under Part 4.1 / 4.2."""
+    import fitz
+
+    doc = fitz.open()
+    for _ in range(cover_pages):
+        doc.new_page().insert_text((90, 200), "Anti-Money Laundering Rules")
+    toc = doc.new_page()
+    toc.insert_text((90, 100), "Contents")
+    lines = ["Part 4.1 Introduction 1", "4.1.1 Purpose 1", "Part 4.2 Customers 2", "4.2.1 Identification 2"]
+    for i, line in enumerate(lines):
+        toc.insert_text((90, 140 + 20 * i), line)
+    for code, title in [("4.1.1", "Purpose"), ("4.2.1", "Identification")]:
+        doc.new_page().insert_text((90, 200), f"{code} {title} rule text.")
+    doc.save(pdf_path)
+    doc.close()
+    return pdf_path
+
+
+class TestTocDocument:
+    CONFIG = {"toc_pages": [], "entry_pattern": r"^Part \d+\.\d+", "sub_entry_patterns": [r"^\d+\.\d+\.\d+"]}
+
+    def test_steps_0a_0b_share_one_parse(self, tmp_path, monkeypatch):
+        """ToC discovery, extraction and offset detection open the PDF once and extract each page once."""
+        import pdf_backends
+        import toc_extractor
+
+        pdf_path = _write_toc_pdf(tmp_path / "toc.pdf")
+        opens = []
+        real_open = pdf_backends.pdfplumber.open
+        monkeypatch.setattr(pdf_backends.pdfplumber, "open",
+                            lambda path, *a, **kw: opens.append(path) or real_open(path, *a, **kw))
+        extracted = []
+        real_page_text = toc_extractor.TocDocument.page_text
+        monkeypatch.setattr(toc_extractor.TocDocument, "page_text",
+                            lambda self, pn: (extracted.append(pn) if pn not in self._text else None)
+                            or real_page_text(self, pn))
+
+        with toc_extractor.TocDocument(str(pdf_path)) as doc:
+            start = toc_extractor._scan_for_toc_start(doc)
+            end = toc_extractor._scan_for_toc_end(doc, start)
+            doc.extract_text(list(range(start, end + 1)))
+            entries = toc_extractor.step_0b(str(pdf_path), str(tmp_path),
+                                            {**self.CONFIG, "toc_pages": [start]}, doc=doc)
+
+        assert (start, end) == (2, 2)
+        assert len(opens) == 1
+        assert len(extracted) == len(set(extracted))
+        assert [e["code"] for e in entries] == ["4_1", "4_1_1", "4_2", "4_2_1"]
+        assert all(e["pdf_page"] is not None for e in entries)
+
+    def test_pdf_pages_resolved_per_entry(self, tmp_path):
+        """Numbering shifts mid-document; an entry missing from the index borrows its neighbour's offset."""
+        import fitz
+        import toc_extractor
+
+        doc = fitz.open()
+        toc = doc.new_page()
+        toc.insert_text((90, 100), "Contents")
+        toc_lines = ["4.1.1 Purpose 1", "4.1.2 Scope 2", "4.2.1 Identification 5", "4.2.2 Verification 6"]
+        for i, line in enumerate(toc_lines):
+            toc.insert_text((90, 140 + 20 * i), line)
+        body = ["4.1.1 Purpose text.", "See 4.1.1 and 4.1.2 Scope text.", "Unnumbered schedule.",
+                "4.2.1 Identification text.", "Verification, without its code at line start."]
+        for text in body:
+            doc.new_page().insert_text((90, 200), text)
+        pdf_path = tmp_path / "shifted.pdf"
+        doc.save(pdf_path)
+        doc.close()
+
+        with toc_extractor.TocDocument(str(pdf_path), backend="fitz") as toc_doc:
+            entries = toc_extractor.step_0b(str(pdf_path), str(tmp_path), {**self.CONFIG, "toc_pages": [1]},
+                                            doc=toc_doc)
+        assert [(e["code"], e["pdf_page"]) for e in entries] == [
+            ("4_1_1", 2), ("4_1_2", 3), ("4_2_1", 5), ("4_2_2", 6),
+        ]
+
+    def test_outline_builds_toc_without_text_parsing(self, tmp_path):
+        """Coded bookmarks become toc.json entries with exact PDF pages; a PDF without an outline falls back."""
+        import fitz
+        import toc_extractor
+
+        pdf_path = _write_toc_pdf(tmp_path / "outline.pdf")
+        doc = fitz.open(pdf_path)
+        doc.set_page_labels([{"startpage": 2, "prefix": "", "style": "D", "firstpagenum": 1}])
+        doc.set_toc([[1, "Contents", 2], [1, "Chapter 4—Customer identification", 3],
+                     [2, "Part 4.1—Introduction", 3], [3, "4.1.1  Purpose", 3],
+                     [2, "Part 4.2—Customers", 4], [3, "Division 1—Individuals", 4],
+                     [4, "4.2.1  Identification", 4], [1, "Endnotes", 4]])
+        doc.saveIncr()
+        doc.close()
+
+        entries = toc_extractor.step_outline(str(pdf_path), str(tmp_path))
+        assert [(e["code"], e["raw_code"], e["title"], e["pdf_page"], e["doc_page"], e["depth"])
+                for e in entries] == [
+            ("CHAPTER_4", "Chapter 4", "Customer identification", 3, 1, 0),
+            ("4_1", "Part 4.1", "Introduction", 3, 1, 1),
+            ("4_1_1", "4.1.1", "Purpose", 3, 1, 2),
+            ("4_2", "Part 4.2", "Customers", 4, 2, 1),
+            ("DIVISION_1", "Division 1", "Individuals", 4, 2, 2),
+            ("4_2_1", "4.2.1", "Identification", 4, 2, 3),
+        ]
+        assert json.loads((tmp_path / "toc.json").read_text()) == entries
+
+        assert toc_extractor.step_outline(str(_write_toc_pdf(tmp_path / "plain.pdf")), str(tmp_path)) is None
+
+    def test_heading_search_is_limited_to_front_matter(self, tmp_path):
+        import toc_extractor
+
+        pdf_path = _write_toc_pdf(tmp_path / "late.pdf", cover_pages=4)
+        with toc_extractor.TocDocument(str(pdf_path), backend="fitz") as doc:
+            assert toc_extractor._scan_for_toc_start(doc, max_pages=3) is None
+            assert doc.find_heading(toc_extractor.TOC_HEADER_RE) == 5
+            assert sorted(doc._text) == [1, 2, 3, 4, 5]
+
+
+class TestHeadlessToc:
+    APPROVALS = {
+        "toc_pages": [2],
+        "entry_pattern": r"^Part \d+\.\d+",
+        "sub_entry_patterns": [r"^\d+\.\d+\.\d+"],
+        "classification_overrides": {"4_1": None, "4_1_1": None, "4_2": "cdd-individuals",
+                                     "4_2_1": "cdd-individuals"},
+    }
+
+    @pytest.fixture
+    def toc_extractor(self, tmp_path, monkeypatch):
+        import builtins
+
+        import toc_extractor
+
+        monkeypatch.setattr(builtins, "input", lambda *a: pytest.fail("headless run prompted"))
+        monkeypatch.setattr(toc_extractor, "TOC_CODE_MAP_DIR", str(tmp_path / "cache" / "toc_code_maps"))
+        return toc_extractor
+
+    def test_approved_document_needs_no_prompt_or_llm(self, toc_extractor, tmp_path, monkeypatch):
+        monkeypatch.setattr(toc_extractor, "_llm_client", lambda *a: pytest.fail("approved run called the LLM"))
+        pdf_path = _write_toc_pdf(tmp_path / "rules.pdf")
+
+        toc_extractor.run_all(str(pdf_path), str(tmp_path), use_outline=False,
+                              approvals=self.APPROVALS, headless=True)
+
+        classified = json.loads((tmp_path / "toc_classified.json").read_text())
+        assert classified["process_to_sections"] == {"cdd-individuals": ["4_2", "4_2_1"]}
+        assert json.loads((tmp_path / "toc_config.json").read_text())["entry_pattern"] == r"^Part \d+\.\d+"
+
+    def test_batch_runs_nested_documents_in_worker_processes(self, toc_extractor, tmp_path, monkeypatch, capsys):
+        """Primary and secondary PDFs run in a real process pool; unapproved ones are left pending, not prompted."""
+        import multiprocessing
+        from types import SimpleNamespace
+
+        if multiprocessing.get_start_method() != "fork":
+            pytest.skip("workers must inherit this test's monkeypatches")
+        documents = tmp_path / "regulations" / "rules-a" / "documents"
+        for sub, stem in (("primary", "approved"), ("secondary", "new")):
+            (documents / sub).mkdir(parents=True)
+            _write_toc_pdf(documents / sub / f"{stem}.pdf")
+        (documents.parent / "toc_approvals.json").write_text(json.dumps({"approved": self.APPROVALS}))
+
+        discovered = {"entry_pattern": r"^Part \d+\.\d+", "sub_entry_patterns": [], "example_matches": []}
+        response = SimpleNamespace(content=[SimpleNamespace(text=json.dumps(discovered))])
+        monkeypatch.setattr(toc_extractor, "_llm_client",
+                            lambda *a: SimpleNamespace(messages=SimpleNamespace(create=lambda **kw: response)))
+
+        pdf_paths = toc_extractor.find_documents(tmp_path / "regulations")
+        assert [Path(p).relative_to(documents).as_posix() for p in pdf_paths] == [
+            "primary/approved.pdf", "secondary/new.pdf",
+        ]
+        assert toc_extractor.default_approvals_path(pdf_paths[1]) == str(documents.parent / "toc_approvals.json")
+        results = toc_extractor.run_batch(pdf_paths, str(tmp_path / "runs"), workers=2, use_outline=False)
+
+        assert [(Path(r["pdf"]).stem, r["status"]) for r in results] == [("approved", "done"), ("new", "pending")]
+        run_dirs = [Path(r["run_dir"]) for r in results]
+        assert run_dirs == [tmp_path / "runs" / "rules-a" / "primary" / "approved",
+                            tmp_path / "runs" / "rules-a" / "secondary" / "new"]
+        assert (run_dirs[0] / "toc_classified.json").exists()
+        assert json.loads((run_dirs[1] / "toc_config.pending.json").read_text())["toc_pages"] == [2]
+        assert not (run_dirs[1] / "toc_config.json").exists()
+        # Each worker's console output lands in its document's toc.log, not the parent's stdout
+        assert "STEP 0a" in (run_dirs[1] / "toc.log").read_text()
+        assert "STEP 0a" not in capsys.readouterr().out
+
+    def test_batch_with_no_documents_reports_nothing_done(self, toc_extractor, tmp_path):
+        assert toc_extractor.find_documents(tmp_path) == []
+        assert toc_extractor.run_batch([], str(tmp_path / "runs")) == []
+
+
+class TestTocPreclassifier:
+    PROCESS_META = {"cdd-individuals": {"title": "CDD individuals", "description": ""},
+                    "record-keeping": {"title": "Record keeping", "description": ""}}
+    # Shaped like step 0b output: chapters keep their word, their Parts do not
+    TOC = [
+        {"code": "1", "title": "Name of Instrument", "depth": 0},
+        {"code": "CHAPTER_4", "title": "Customer identification", "depth": 1},
+        {"code": "4_1", "title": "Introduction", "depth": 1},
+        {"code": "4_2", "title": "Applicable customer identification procedure with respect", "depth": 1},
+        {"code": "4_2_1", "title": "Verification", "depth": 2},
+        {"code": "4_2_2", "title": "Safe harbour", "depth": 2},
+        {"code": "CHAPTER_7", "title": "Reporting", "depth": 1},
+        {"code": "7_1", "title": "Annual report", "depth": 1},
+        {"code": "CHAPTER_9", "title": "Exemptions", "depth": 1},
+        {"code": "9_1", "title": "Record keeping exemption", "depth": 1},
+    ]
+    ANSWER = {"entries": [{"code": "CHAPTER_4", "process_id": None},
+                          {"code": "CHAPTER_7", "process_id": "record-keeping"},
+                          {"code": "CHAPTER_9", "process_id": None},
+                          {"code": "9_1", "process_id": "record-keeping"}]}
+
+    @pytest.fixture
+    def toc_extractor(self, tmp_path, monkeypatch):
+        import toc_extractor
+
+        monkeypatch.setattr(toc_extractor, "TOC_CODE_MAP_DIR", str(tmp_path / "cache" / "toc_code_maps"))
+        return toc_extractor
+
+    def _fake_llm(self, toc_extractor, monkeypatch):
+        """Answer every request with ANSWER; returns the prompts sent."""
+        from types import SimpleNamespace
+
+        prompts = []
+
+        def create(**request):
+            prompts.append(request["messages"][0]["content"])
+            return SimpleNamespace(content=[SimpleNamespace(text=json.dumps(self.ANSWER))])
+
+        monkeypatch.setattr(toc_extractor, "_llm_client",
+                            lambda *a: SimpleNamespace(messages=SimpleNamespace(create=create)))
+        return prompts
+
+    def test_only_undecided_entries_reach_the_llm(self, toc_extractor, tmp_path, monkeypatch):
+        """Learned codes (titles may be truncated) and their children skip the LLM; chapters are asked first."""
+        toc_extractor.learn_code_map([
+            {"code": "1", "title": "Name of Instrument", "process_id": None},
+            {"code": "4_1", "title": "Introduction", "process_id": None},
+            {"code": "4_2", "title": "Applicable customer identification procedure with respect to individuals",
+             "process_id": "cdd-individuals"},
+        ], "rules--primary-rules")
+        prompts = self._fake_llm(toc_extractor, monkeypatch)
+
+        result = toc_extractor.step_0c(str(tmp_path), self.TOC, self.PROCESS_META,
+                                       approvals={"approve_classification": True}, headless=True,
+                                       document="rules--primary-rules")
+
+        assert [(e["code"], e["process_id"], e["source"]) for e in result["entries"]] == [
+            ("1", None, "learned"),
+            ("CHAPTER_4", None, "llm"),
+            ("4_1", None, "learned"),
+            ("4_2", "cdd-individuals", "learned"),
+            ("4_2_1", "cdd-individuals", "inherited"),
+            ("4_2_2", "cdd-individuals", "inherited"),
+            ("CHAPTER_7", "record-keeping", "llm"),
+            ("7_1", "record-keeping", "inherited"),
+            ("CHAPTER_9", None, "llm"),
+            ("9_1", "record-keeping", "llm"),
+        ]
+        # The chapters, then only the Part of the chapter left unmapped
+        assert len(prompts) == 2
+        assert "Reporting" in prompts[0] and "Exemptions" in prompts[0]
+        assert "Annual report" not in prompts[0] and "Verification" not in prompts[0]
+        assert "Record keeping exemption" in prompts[1]
+        assert "Annual report" not in prompts[1] and "Reporting" not in prompts[1]
+
+        # The approved result is learned: a rerun needs no LLM call at all
+        monkeypatch.setattr(toc_extractor, "_llm_client", lambda *a: pytest.fail("rerun called the LLM"))
+        rerun = toc_extractor.step_0c(str(tmp_path), self.TOC, self.PROCESS_META,
+                                      approvals={"approve_classification": True}, headless=True,
+                                      document="rules--primary-rules")
+        assert rerun["process_to_sections"] == result["process_to_sections"]
+
+        # ...but another document's codes are its own
+        assert toc_extractor.load_code_map("rules--secondary-other") == {}
+
+    def test_existing_approval_seeds_the_map(self, toc_extractor, tmp_path, monkeypatch):
+        """A run approved before the document had a map is not sent to the LLM again."""
+        approved = [{"code": e["code"], "title": e["title"], "process_id": None} for e in self.TOC]
+        (tmp_path / "toc_classified.json").write_text(json.dumps({"entries": approved}))
+        monkeypatch.setattr(toc_extractor, "_llm_client", lambda *a: pytest.fail("seeded run called the LLM"))
+
+        result = toc_extractor.step_0c(str(tmp_path), self.TOC, self.PROCESS_META,
+                                       approvals={"approve_classification": True}, headless=True,
+                                       document="rules--primary-rules")
+
+        assert {e["source"] for e in result["entries"]} == {"learned"}
+        assert set(toc_extractor.load_code_map("rules--primary-rules")) == {e["code"] for e in self.TOC}
+
+    def test_parts_inherit_their_chapter_on_a_real_toc(self, toc_extractor):
+        """runs/2: with only the CHAPTER_n entries decided, Parts n_m inherit the approved process."""
+        run_dir = Path(__file__).parent / "runs" / "2"
+        toc = json.loads((run_dir / "toc.json").read_text())
+        approved = json.loads((run_dir / "toc_classified.json").read_text())["entries"]
+        approved_pid = {e["code"]: e["process_id"] for e in approved}
+        chapters = {code: pid for code, pid in approved_pid.items() if code.startswith("CHAPTER_")}
+        process_meta = {pid: {} for pid in approved_pid.values() if pid}
+
+        decided = toc_extractor._preclassify(toc, chapters, {}, process_meta)
+
+        inherited = {code: d["process_id"] for code, d in decided.items() if d["source"] == "inherited"}
+        assert len(inherited) == 7
+        assert inherited == {code: approved_pid[code] for code in inherited}
+
+    def test_real_approval_covers_its_whole_toc(self, toc_extractor):
+        """runs/2's approved classification, as seed, decides every entry of its toc.json (LLM-tidied titles too)."""
+        run_dir = Path(__file__).parent / "runs" / "2"
+        toc = json.loads((run_dir / "toc.json").read_text())
+        approved = json.loads((run_dir / "toc_classified.json").read_text())["entries"]
+        process_meta = {e["process_id"]: {} for e in approved if e["process_id"]}
+
+        decided = toc_extractor._preclassify(toc, {}, toc_extractor.load_code_map(None, str(run_dir)), process_meta)
+
+        assert set(decided) == {e["code"] for e in toc}
+        assert {d["source"] for d in decided.values()} == {"learned"}
+
+    def test_document_key_names_the_regulation_and_path(self, toc_extractor):
+        pdf = "/data/regulations/aml-ctf-rules/documents/primary/F2024C01198.pdf"
+        assert toc_extractor.document_key(pdf) == "aml-ctf-rules--primary--F2024C01198"
+        assert toc_extractor.document_key("/tmp/rules.pdf") == "rules"
+
+
+class TestStageCache:
+    @pytest.fixture
+    def pipeline(self, tmp_path, monkeypatch):
+        import main
+
+        monkeypatch.setattr(main, "RUNS_DIR", str(tmp_path / "runs"))
+        monkeypatch.setattr(main, "CACHE_DIR", str(tmp_path / "runs" / ".cache"))
+        return main, str(_write_tiny_pdf(tmp_path / "tiny.pdf"))
+
+    def _outputs(self, run_dir: Path) -> dict:
+        return {name: (run_dir / name).read_text() for name in ("nodes.json", "groups.json", "groups.svg")}
+
+    def test_rerun_reuses_every_stage(self, pipeline, monkeypatch):
+        main, pdf_path = pipeline
+        main.run_pipeline(pdf_path)
+
+        def no_scrape(self):
+            raise AssertionError("scrape should have been served from the cache")
+
+        monkeypatch.setattr(main.PDFScraper, "scrape", no_scrape)
+        monkeypatch.setattr(main, "build_groups_with_spans", lambda nodes: pytest.fail("groups not cached"))
+        main.run_pipeline(pdf_path)
+
+        runs = Path(main.RUNS_DIR)
+        assert self._outputs(runs / "1") == self._outputs(runs / "2")
+
+    def test_param_change_recomputes_downstream_only(self, pipeline, monkeypatch):
+        main, pdf_path = pipeline
+        main.run_pipeline(pdf_path)
+
+        calls = []
+        real_build_groups = main.build_groups_with_spans
+        monkeypatch.setattr(main.PDFScraper, "scrape", lambda self: pytest.fail("nodes not cached"))
+        monkeypatch.setattr(main, "build_groups_with_spans", lambda nodes: calls.append(1) or real_build_groups(nodes))
+        monkeypatch.setattr(main, "INDENT_TOLERANCE", main.INDENT_TOLERANCE + 1)
+        main.run_pipeline(pdf_path)
+
+        assert calls == [1]
+
+    def test_no_cache_always_scrapes(self, pipeline):
+        main, pdf_path = pipeline
+        main.run_pipeline(pdf_path, use_cache=False)
+        main.run_pipeline(pdf_path, use_cache=False)
+        assert not Path(main.CACHE_DIR).exists()
+
+    def test_no_svg_skips_visualisation(self, pipeline):
+        main, pdf_path = pipeline
+        main.run_pipeline(pdf_path, svg=False)
+        run_dir = Path(main.RUNS_DIR) / "1"
+        assert (run_dir / "groups.json").exists()
+        assert not (run_dir / "groups.svg").exists()
+
+
+class TestNodeStore:
+    def test_round_trip_matches_nodes_json(self, reference_nodes, tmp_path):
+        from node_store import NodeStore, write_node_store
+
+        path = write_node_store(reference_nodes, str(tmp_path / "nodes.bin"))
+        with NodeStore(path) as store:
+            assert len(store) == len(reference_nodes)
+            assert list(store) == reference_nodes
+            assert [list(n) for n in store[:3]] == [list(n) for n in reference_nodes[:3]]
+            assert store[-1] == reference_nodes[-1]
+
+    def test_columns_read_without_materialising(self, reference_nodes, tmp_path):
+        from node_store import NodeStore, write_node_store
+
+        path = write_node_store(reference_nodes, str(tmp_path / "nodes.bin"))
+        with NodeStore(path) as store:
+            assert list(store.x_indent) == [n["x_indent"] for n in reference_nodes]
+            assert store.text(7) == reference_nodes[7]["text"]
+            assert store.rule_code(7) == reference_nodes[7]["rule_code"]
+            assert store._cache.count(None) == len(reference_nodes)
+
+    def test_load_nodes_falls_back_to_json_unless_store_matches(self, reference_nodes, tmp_path):
+        import os
+        from node_store import NodeStore, open_nodes, write_node_store
+
+        nodes_path = tmp_path / "nodes.json"
+        nodes_path.write_text(json.dumps(reference_nodes[:5]))
+        write_node_store(reference_nodes[:5], str(tmp_path / "nodes.bin"), source=str(nodes_path))
+        with open_nodes(str(nodes_path)) as store:
+            assert isinstance(store, NodeStore)
+            first = store[0]
+        assert store._mm.closed
+        assert first == reference_nodes[0]  # materialised nodes outlive the mapping
+
+        # Touched after the store was built, even to an older mtime
+        earlier = os.path.getmtime(nodes_path) - 10
+        os.utime(nodes_path, (earlier, earlier))
+        with open_nodes(str(nodes_path)) as nodes:
+            assert nodes == reference_nodes[:5]
+
+        # A store written without its source is never trusted
+        write_node_store(reference_nodes[:5], str(tmp_path / "nodes.bin"))
+        with open_nodes(str(nodes_path)) as nodes:
+            assert isinstance(nodes, list)
+
+    def test_each_json_has_its_own_store(self, reference_nodes, tmp_path):
+        from node_store import NodeStore, open_nodes, store_path_for, write_node_store
+
+        nodes_path, alt_path = tmp_path / "nodes.json", tmp_path / "nodes_alt.json"
+        nodes_path.write_text(json.dumps(reference_nodes[:5]))
+        alt_path.write_text(json.dumps(reference_nodes[5:8]))
+        write_node_store(reference_nodes[:5], store_path_for(str(nodes_path)), source=str(nodes_path))
+        assert store_path_for(str(alt_path)) == str(tmp_path / "nodes_alt.bin")
+
+        with open_nodes(str(alt_path)) as nodes:
+            assert nodes == reference_nodes[5:8]
+        write_node_store(reference_nodes[5:8], store_path_for(str(alt_path)), source=str(alt_path))
+        with open_nodes(str(alt_path)) as alt, open_nodes(str(nodes_path)) as main_nodes:
+            assert isinstance(alt, NodeStore) and list(alt) == reference_nodes[5:8]
+            assert isinstance(main_nodes, NodeStore) and list(main_nodes) == reference_nodes[:5]
+
+    def test_pipeline_writes_store(self, tmp_path, monkeypatch):
+        import main
+        from node_store import NodeStore
+
+        monkeypatch.setattr(main, "RUNS_DIR", str(tmp_path / "runs"))
+        main.run_pipeline(str(_write_tiny_pdf(tmp_path / "tiny.pdf")), use_cache=False, svg=False)
+        run_dir = tmp_path / "runs" / "1"
+        with NodeStore(str(run_dir / "nodes.bin")) as store:
+            assert list(store) == json.loads((run_dir / "nodes.json").read_text())
+
+
+class TestReferenceIndex:
+    @staticmethod
+    def _nodes(*rows):
+        return [
+            {"node_index": i, "uid": f"u{i}", "rule_code": rc, "text": text, "x_indent": 90.0}
+            for i, (rc, text) in enumerate(rows)
+        ]
+
+    def _refs(self, nodes, i):
+        from main import link_references
+
+        link_references(nodes)
+        by_uid = {n["uid"]: n["rule_code"] for n in nodes}
+        return [by_uid[u] for u in nodes[i]["outgoing_references"]]
+
+    def test_range_links_every_sibling(self):
+        nodes = self._nodes(
+            ("4.9.1", "First."), ("4.9.2", "Second."), ("4.9.3", "Third."),
+            ("4.9.4", "Apply paragraphs 4.9.1 to 4.9.3."),
+        )
+        assert self._refs(nodes, 3) == ["4.9.1", "4.9.2", "4.9.3"]
+
+    def test_partial_continues_previous_full_code(self):
+        nodes = self._nodes(
+            ("4.3.2", "Head."), ("4.3.2(1)", "One."), ("4.3.2(2)", "Two."),
+            ("4.3.3", "As referred to in subparagraphs 4.3.2(1) and (2)."),
+        )
+        assert self._refs(nodes, 3) == ["4.3.2(1)", "4.3.2(2)"]
+
+    def test_partial_resolves_against_own_rule(self):
+        nodes = self._nodes(
+            ("4.2.7", "Head."), ("4.2.7(1)", "One."), ("4.2.7(2)", "Two."),
+            ("4.2.7(3)", "a combination of (1) and (2) above."),
+        )
+        assert self._refs(nodes, 3) == ["4.2.7(1)", "4.2.7(2)"]
+
+    def test_glued_and_suffixed_codes_are_not_references(self):
+        nodes = self._nodes(
+            ("2.1.2", "Head."), ("2.1.2(1)", "One."),
+            ("2.1.3", "See subparagraph 2.1.2A(1) and section 5(1) of the Act."),
+        )
+        assert self._refs(nodes, 2) == []
+
+    def test_incoming_mirrors_outgoing(self):
+        from main import link_references
+
+        nodes = self._nodes(("4.1.1", "See 4.1.2."), ("4.1.2", "See 4.1.1."), ("4.1.3", "See 4.1.1."))
+        index = link_references(nodes)
+        assert index.incoming[0] == [1, 2]
+        assert nodes[0]["incoming_references"] == ["u1", "u2"]
+        assert index.resolve("(2)", context="4.1.1") is None
+        assert index.resolve("4.1.3") == 2
+
+    def test_nodes_sharing_a_uid_are_linked_once(self):
+        from main import link_references
+
+        nodes = self._nodes(
+            ("4.1.1", "Not applicable."), ("4.1.2", "Not applicable."), ("4.1.3", "See 4.1.1 and 4.1.2."),
+        )
+        nodes[1]["uid"] = nodes[0]["uid"]  # uids hash the text
+        index = link_references(nodes)
+        assert index.outgoing[2] == [0, 1]
+        assert nodes[2]["outgoing_references"] == ["u0"]
+
+    def test_real_rules_range(self):
+        """Rule 4.2.10 of the full Rules names 4.2.11, then the ranges 4.2.3 to 4.2.8 and 4.9.1 to 4.9.3."""
+        from main import link_references
+
+        with open(PIPELINE_DIR / "runs" / "2" / "nodes.json") as f:
+            nodes = json.load(f)
+        index = link_references(nodes)
+        pos = next(i for i, n in enumerate(nodes) if n["rule_code"] == "4.2.10")
+        refs = [nodes[t]["rule_code"] for t in index.outgoing[pos]]  # uids can collide
+        assert refs == ["4.2.11", "4.2.3", "4.2.4", "4.2.5", "4.2.6", "4.2.7", "4.2.8",
+                        "4.9.1", "4.9.2", "4.9.3"]
@@ -3,34 +3,59 @@
 Step 0: Table of Contents extraction and classification pipeline.
 
 Sub-steps:
+  --  PDF outline fast path: when the PDF has bookmarks, toc.json is built
+      from them directly (exact pages, no LLM) and 0a/0b are skipped
   0a  Discover ToC page range and extract regex patterns (LLM-assisted, human review)
-  0b  Extract structured ToC JSON using discovered patterns (pdfplumber)
-  0c  Classify ToC sections to business processes (LLM, human review + approval)
+  0b  Extract structured ToC JSON using discovered patterns (pdfplumber or PyMuPDF, see --backend)
+  0c  Classify ToC sections to business processes (overrides, learned code map and
+      chapter inheritance first; LLM for the rest; human review + approval)
 
 Outputs (written to run_dir):
   toc_config.json      — ToC page range + regex patterns (after 0a approval)
   toc.json             — Structured list of ToC entries (after 0b)
   toc_classified.json  — Section → process mapping + process_to_sections index (after 0c approval)
 
+Headless mode (--headless, implied by --all) never prompts. Approvals come
+from a JSON file keyed by PDF file stem (default: toc_approvals.json in the
+regulation's directory):
+
+  {"<pdf stem>": {"toc_pages": [2, 3], "entry_pattern": "...", "sub_entry_patterns": [...],
+                  "classification_overrides": {"1_1": null, "4_2": "cdd-individuals"},
+                  "approve_classification": true}}
+
+A step with nothing approved writes toc_config.pending.json or
+toc_classified.pending.json for review and stops that document.
+
 Usage:
     python toc_extractor.py chapter4.pdf runs/1          # Run all steps
+    python toc_extractor.py chapter4.pdf runs/1 --no-outline
     python toc_extractor.py chapter4.pdf runs/1 --step 0a
     python toc_extractor.py chapter4.pdf runs/1 --step 0b
     python toc_extractor.py chapter4.pdf runs/1 --step 0c
+    python toc_extractor.py chapter4.pdf runs/1 --headless --approvals toc_approvals.json
+    python toc_extractor.py --all runs/toc --workers 4   # every data/regulations/*/documents/**/*.pdf
 """
 
 import argparse
+import bisect
+import contextlib
+import glob
 import json
 import logging
 import os
 import re
 import sys
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 from pathlib import Path
 
 import anthropic
-import pdfplumber
+import fitz  # PyMuPDF
 from dotenv import load_dotenv
 
+from llm_client import LLM_CACHE_DIR, CachedClient, ResponseCache
+from pdf_backends import BACKENDS, DEFAULT_BACKEND, open_pdf
+
 load_dotenv()
 
 logging.basicConfig(
@@ -48,6 +73,11 @@ MODEL = "claude-sonnet-4-6"
 # Helpers
 # ---------------------------------------------------------------------------
 
+def _llm_client(use_cache: bool = True, refresh: bool = False) -> CachedClient:
+    """API client whose responses are cached in runs/.cache/llm."""
+    return CachedClient(anthropic.Anthropic(), ResponseCache(enabled=use_cache, refresh=refresh))
+
+
 def _confirm(prompt: str) -> bool:
     """Prompt user for y/n confirmation."""
     while True:
@@ -58,34 +88,131 @@ def _confirm(prompt: str) -> bool:
             return False
 
 
-def _extract_page_text(pdf_path: str, page_numbers: list[int]) -> str:
-    """Extract raw text from given 1-indexed page numbers using pdfplumber."""
-    chunks = []
-    with pdfplumber.open(pdf_path) as pdf:
-        for pn in page_numbers:
-            if 1 <= pn <= len(pdf.pages):
-                text = pdf.pages[pn - 1].extract_text() or ""
-                chunks.append(f"--- Page {pn} ---\n{text}")
-    return "\n\n".join(chunks)
-
-
-def _extract_page_lines(pdf_path: str, page_numbers: list[int]) -> list[tuple[int, str]]:
-    """Extract (page_number, line_text) tuples from given pages."""
-    result = []
-    with pdfplumber.open(pdf_path) as pdf:
-        for pn in page_numbers:
-            if 1 <= pn <= len(pdf.pages):
-                text = pdf.pages[pn - 1].extract_text() or ""
-                for line in text.split("\n"):
-                    line = line.strip()
-                    if line:
-                        result.append((pn, line))
-    return result
+# ---------------------------------------------------------------------------
+# Approvals (headless mode)
+# ---------------------------------------------------------------------------
+
+REGULATIONS_DIR = (_PIPELINE_DIR / "../data/regulations").resolve()
+APPROVALS_FILENAME = "toc_approvals.json"
+APPROVED_PATTERN_KEYS = ("toc_pages", "entry_pattern", "sub_entry_patterns")
+
+
+class PendingReview(Exception):
+    """A headless run reached a step that needs human approval; *path* is the artefact to review."""
+
+    def __init__(self, step: str, path: str):
+        super().__init__(f"step {step} needs review: {path}")
+        self.step = step
+        self.path = path
+
+
+def load_approvals(path: str | None, pdf_path: str) -> dict:
+    """Approvals for *pdf_path* (keyed by its file stem) from the approvals file at *path*; {} if none."""
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f).get(Path(pdf_path).stem, {})
+
+
+def _write_pending(run_dir: str, name: str, data: dict) -> str:
+    out_path = os.path.join(run_dir, name)
+    with open(out_path, "w") as f:
+        json.dump(data, f, indent=2)
+    print(f"\nPending review → {out_path}")
+    return out_path
+
+
+# ---------------------------------------------------------------------------
+# PDF session
+# ---------------------------------------------------------------------------
+
+TOC_FRONT_MATTER_PAGES = 30  # pages searched for the ToC heading by default
+
+
+class TocDocument:
+    """The PDF opened once for steps 0a and 0b, with a per-page text cache.
 
+    Each page's extract_text() runs at most once however many scans
+    (heading search, ToC extent, ToC lines, section index) read it.
 
-def _pdf_page_count(pdf_path: str) -> int:
-    with pdfplumber.open(pdf_path) as pdf:
-        return len(pdf.pages)
+    Usage:
+        with TocDocument("rules.pdf") as doc:
+            toc_config = step_0a(pdf_path, run_dir, doc=doc)
+            step_0b(pdf_path, run_dir, toc_config, doc=doc)
+    """
+
+    def __init__(self, pdf_path: str, backend: str = DEFAULT_BACKEND):
+        self.pdf_path = pdf_path
+        self.backend = backend
+        self._pdf = open_pdf(pdf_path, backend)
+        self.page_count = len(self._pdf.pages)
+        self._text: dict[int, str] = {}
+        self._indexes: dict[tuple, dict[str, list[int]]] = {}
+
+    def page_text(self, page_number: int) -> str:
+        """Text of a 1-indexed page (extracted on first use)."""
+        text = self._text.get(page_number)
+        if text is None:
+            page = self._pdf.pages[page_number - 1]
+            text = self._text[page_number] = page.extract_text() or ""
+            page.close()  # drop the backend's per-page object cache; the text is kept here
+        return text
+
+    def page_lines(self, page_number: int) -> list[str]:
+        """Stripped, non-empty lines of a 1-indexed page."""
+        return [line.strip() for line in self.page_text(page_number).split("\n") if line.strip()]
+
+    def extract_text(self, page_numbers: list[int]) -> str:
+        """Raw text of the given 1-indexed pages, each under a '--- Page N ---' marker."""
+        return "\n\n".join(
+            f"--- Page {pn} ---\n{self.page_text(pn)}" for pn in page_numbers if 1 <= pn <= self.page_count
+        )
+
+    def extract_lines(self, page_numbers: list[int]) -> list[tuple[int, str]]:
+        """(page_number, line_text) for every non-empty line of the given pages."""
+        return [
+            (pn, line) for pn in page_numbers if 1 <= pn <= self.page_count for line in self.page_lines(pn)
+        ]
+
+    def section_index(self, patterns: list[re.Pattern], skip_pages: list[int] = ()) -> dict[str, list[int]]:
+        """Leading section code → ascending pages where a line starts with it, in one pass.
+
+        Built on first use for each (patterns, skip_pages) and kept, so every
+        ToC entry then resolves with a dictionary lookup.
+        """
+        key = (tuple(p.pattern for p in patterns), tuple(skip_pages))
+        index = self._indexes.get(key)
+        if index is None:
+            index = self._indexes[key] = {}
+            skip = set(skip_pages)
+            for page_num in range(1, self.page_count + 1):
+                if page_num in skip:
+                    continue
+                for line in self.page_lines(page_num):
+                    code = _extract_section_code(line, patterns)
+                    if code is not None:
+                        pages = index.setdefault(code, [])
+                        if not pages or pages[-1] != page_num:
+                            pages.append(page_num)
+        return index
+
+    def find_heading(self, pattern: re.Pattern, max_pages: int | None = TOC_FRONT_MATTER_PAGES) -> int | None:
+        """First 1-indexed page with a line matching *pattern*, within the first *max_pages* (None: all)."""
+        last = self.page_count if max_pages is None else min(max_pages, self.page_count)
+        for page_num in range(1, last + 1):
+            if any(pattern.match(line) for line in self.page_lines(page_num)):
+                return page_num
+        return None
+
+    def close(self):
+        self._pdf.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
 
 
 # ---------------------------------------------------------------------------
@@ -95,19 +222,15 @@ def _pdf_page_count(pdf_path: str) -> int:
 TOC_HEADER_RE = re.compile(r"^\s*(table\s+of\s+contents|contents)\s*$", re.IGNORECASE)
 
 
-def _scan_for_toc_start(pdf_path: str) -> int | None:
-    """Scan all pages for a 'Table of Contents' or 'Contents' heading. Returns 1-indexed page."""
-    with pdfplumber.open(pdf_path) as pdf:
-        for page_num, page in enumerate(pdf.pages, start=1):
-            text = page.extract_text() or ""
-            for line in text.split("\n"):
-                if TOC_HEADER_RE.match(line.strip()):
-                    logger.info(f"Found ToC header on page {page_num}")
-                    return page_num
-    return None
+def _scan_for_toc_start(doc: TocDocument, max_pages: int | None = TOC_FRONT_MATTER_PAGES) -> int | None:
+    """Find a 'Table of Contents' or 'Contents' heading in the front matter. Returns 1-indexed page."""
+    page_num = doc.find_heading(TOC_HEADER_RE, max_pages)
+    if page_num is not None:
+        logger.info(f"Found ToC header on page {page_num}")
+    return page_num
 
 
-def _scan_for_toc_end(pdf_path: str, toc_start: int) -> int:
+def _scan_for_toc_end(doc: TocDocument, toc_start: int) -> int:
     """
     Starting from toc_start, advance page by page until the ToC pattern breaks.
     A page is considered still part of the ToC if at least 25% of its non-empty
@@ -117,57 +240,81 @@ def _scan_for_toc_end(pdf_path: str, toc_start: int) -> int:
     PAGE_NUM_RE = re.compile(r"\s+\d+\s*$")
     last_toc_page = toc_start
 
-    with pdfplumber.open(pdf_path) as pdf:
-        total = len(pdf.pages)
-        for page_num in range(toc_start, total + 1):
-            page = pdf.pages[page_num - 1]
-            text = page.extract_text() or ""
-            lines = [l.strip() for l in text.split("\n") if l.strip()]
-            if not lines:
-                continue
-            hits = sum(1 for l in lines if PAGE_NUM_RE.search(l))
-            ratio = hits / len(lines)
-            if ratio >= 0.25:
-                last_toc_page = page_num
-            else:
-                # No longer looks like ToC — stop
-                break
+    for page_num in range(toc_start, doc.page_count + 1):
+        lines = doc.page_lines(page_num)
+        if not lines:
+            continue
+        hits = sum(1 for l in lines if PAGE_NUM_RE.search(l))
+        ratio = hits / len(lines)
+        if ratio >= 0.25:
+            last_toc_page = page_num
+        else:
+            # No longer looks like ToC — stop
+            break
 
     logger.info(f"ToC spans pages {toc_start}–{last_toc_page}")
     return last_toc_page
 
 
-def step_0a(pdf_path: str, run_dir: str) -> dict:
+def step_0a(pdf_path: str, run_dir: str, backend: str = DEFAULT_BACKEND,
+            use_cache: bool = True, refresh: bool = False, doc: TocDocument | None = None,
+            approvals: dict | None = None, headless: bool = False) -> dict:
     """
     Discover ToC page range + regex patterns.
     Writes toc_config.json after human approval.
     Returns the toc_config dict.
+
+    Reads the PDF through *doc* (opened here if not given). Pages and
+    patterns in *approvals* are used as-is; when *headless*, anything else
+    is written to toc_config.pending.json and PendingReview is raised.
     """
+    if doc is None:
+        with TocDocument(pdf_path, backend) as doc:
+            return step_0a(pdf_path, run_dir, backend, use_cache, refresh, doc, approvals, headless)
+    approvals = approvals or {}
+
     print("\n" + "=" * 60)
     print("STEP 0a — ToC Pattern Discovery")
     print("=" * 60)
 
     # 1. Locate ToC pages
-    toc_start = _scan_for_toc_start(pdf_path)
-    if toc_start is None:
-        logger.warning("No ToC header found automatically. Defaulting to page 1.")
-        toc_start = 1
+    if "toc_pages" in approvals:
+        toc_pages = approvals["toc_pages"]
+        print(f"\nUsing approved ToC pages: {toc_pages}")
+    else:
+        toc_start = _scan_for_toc_start(doc)
+        if toc_start is None:
+            logger.warning(f"No ToC header found in the first {TOC_FRONT_MATTER_PAGES} pages. Defaulting to page 1.")
+            toc_start = 1
 
-    toc_end = _scan_for_toc_end(pdf_path, toc_start)
-    toc_pages = list(range(toc_start, toc_end + 1))
+        toc_end = _scan_for_toc_end(doc, toc_start)
+        toc_pages = list(range(toc_start, toc_end + 1))
 
-    print(f"\nDetected ToC on pages: {toc_pages}")
-    if not _confirm("Are these the correct ToC pages? (If not, you'll be asked to enter them manually)"):
-        raw = input("Enter ToC page numbers (comma-separated, e.g. 2,3,4): ").strip()
-        toc_pages = [int(p.strip()) for p in raw.split(",")]
-        print(f"Using pages: {toc_pages}")
+        print(f"\nDetected ToC on pages: {toc_pages}")
+        if not headless and not _confirm("Are these the correct ToC pages? "
+                                         "(If not, you'll be asked to enter them manually)"):
+            raw = input("Enter ToC page numbers (comma-separated, e.g. 2,3,4): ").strip()
+            toc_pages = [int(p.strip()) for p in raw.split(",")]
+            print(f"Using pages: {toc_pages}")
+
+    out_path = os.path.join(run_dir, "toc_config.json")
+    if "entry_pattern" in approvals:
+        toc_config = {k: approvals[k] for k in APPROVED_PATTERN_KEYS if k in approvals}
+        toc_config["toc_pages"] = toc_pages
+        toc_config.setdefault("sub_entry_patterns", [])
+        print(f"Using approved patterns: {toc_config['entry_pattern']} + "
+              f"{len(toc_config['sub_entry_patterns'])} sub-entry pattern(s)")
+        with open(out_path, "w") as f:
+            json.dump(toc_config, f, indent=2)
+        print(f"\nSaved → {out_path}")
+        return toc_config
 
     # 2. Extract ToC text and send to LLM for pattern discovery
-    toc_text = _extract_page_text(pdf_path, toc_pages)
+    toc_text = doc.extract_text(toc_pages)
 
     print(f"\nSending {len(toc_pages)} ToC page(s) to LLM for pattern extraction...")
 
-    client = anthropic.Anthropic()
+    client = _llm_client(use_cache, refresh)
     response = client.messages.create(
         model=MODEL,
         max_tokens=2048,
@@ -216,6 +363,9 @@ Return ONLY a valid JSON object, no explanation.""",
     if toc_config.get("notes"):
         print(f"  notes            : {toc_config['notes']}")
 
+    if headless:
+        raise PendingReview("0a", _write_pending(run_dir, "toc_config.pending.json", toc_config))
+
     while not _confirm("Accept these regex patterns?"):
         print("\nEdit patterns manually:")
         entry = input(f"  entry_pattern [{toc_config.get('entry_pattern')}]: ").strip()
@@ -230,7 +380,6 @@ Return ONLY a valid JSON object, no explanation.""",
             print(f"  sub_entry[{i}]     : {p}")
 
     # 4. Save
-    out_path = os.path.join(run_dir, "toc_config.json")
     with open(out_path, "w") as f:
         json.dump(toc_config, f, indent=2)
     print(f"\nSaved → {out_path}")
@@ -239,7 +388,7 @@ Return ONLY a valid JSON object, no explanation.""",
 
 
 # ---------------------------------------------------------------------------
-# Step 0b: Extract structured ToC using pdfplumber + approved patterns
+# Step 0b: Extract structured ToC using the PDF backend + approved patterns
 # ---------------------------------------------------------------------------
 
 def _compile_all_patterns(toc_config: dict) -> list[re.Pattern]:
@@ -275,18 +424,27 @@ def _normalise_code(code: str) -> str:
     """Convert a section code like 'Part 4.2' or '4.2.3' to underscore form '4_2' / '4_2_3'."""
     # Strip 'Part' prefix
     code = re.sub(r"^Part\s+", "", code, flags=re.IGNORECASE).strip()
+    # Other prefixes (Chapter, Division, …) stay, upper-cased whatever the printed case
+    code = re.sub(r"^[A-Za-z]+(?=\s)", lambda m: m.group(0).upper(), code)
     # Replace dots and brackets with underscores
     code = re.sub(r"[.()\s]+", "_", code).strip("_")
     return code
 
 
-def step_0b(pdf_path: str, run_dir: str, toc_config: dict | None = None) -> list[dict]:
+def step_0b(pdf_path: str, run_dir: str, toc_config: dict | None = None,
+            backend: str = DEFAULT_BACKEND, doc: TocDocument | None = None) -> list[dict]:
     """
     Extract structured ToC from PDF using regex patterns from toc_config.
     Writes toc.json. Returns list of ToC entry dicts.
+
+    Reads the PDF through *doc* (opened here if not given).
     """
+    if doc is None:
+        with TocDocument(pdf_path, backend) as doc:
+            return step_0b(pdf_path, run_dir, toc_config, backend, doc)
+
     print("\n" + "=" * 60)
-    print("STEP 0b — ToC Extraction (pdfplumber)")
+    print(f"STEP 0b — ToC Extraction ({backend})")
     print("=" * 60)
 
     if toc_config is None:
@@ -307,7 +465,7 @@ def step_0b(pdf_path: str, run_dir: str, toc_config: dict | None = None) -> list
         logger.error("No regex patterns in toc_config.json.")
         sys.exit(1)
 
-    lines = _extract_page_lines(pdf_path, toc_pages)
+    lines = doc.extract_lines(toc_pages)
     entries: list[dict] = []
 
     for page_num, line in lines:
@@ -331,7 +489,7 @@ def step_0b(pdf_path: str, run_dir: str, toc_config: dict | None = None) -> list
             "raw_code": code,
             "title": title,
             "doc_page": page_ref,   # page number as printed in the document
-            "pdf_page": None,       # actual PDF page index (computed after offset detection)
+            "pdf_page": None,       # actual PDF page index (resolved via the section index)
             "depth": depth,
         })
 
@@ -341,20 +499,24 @@ def step_0b(pdf_path: str, run_dir: str, toc_config: dict | None = None) -> list
     if len(entries) > 10:
         print(f"  ... and {len(entries) - 10} more")
 
-    # --- Page offset detection ---
-    # ToC page numbers are document-internal (printed numbers).
-    # PDF page indices may be offset by front matter (cover, ToC pages themselves, etc.).
-    # Auto-detect: find a ToC entry with a page number, search for its code in the PDF,
-    # then compute: pdf_page = doc_page + offset.
-    offset = _detect_page_offset(pdf_path, entries, patterns)
-    if offset is not None:
-        print(f"\nDetected page offset: {offset:+d} (doc page + {offset} = PDF page index)")
-        for e in entries:
-            if e["doc_page"] is not None:
-                e["pdf_page"] = e["doc_page"] + offset
-    else:
-        print("\nCould not auto-detect page offset — pdf_page will be None.")
-        print("You can manually set 'page_offset' in toc_config.json and re-run step 0b.")
+    # --- PDF page resolution ---
+    # ToC page numbers are document-internal (printed numbers); PDF page
+    # indices are offset by front matter, and the offset can change mid-way.
+    # Each entry is looked up in a one-pass index of leading section codes;
+    # entries not found there take the offset of their nearest resolved
+    # neighbour (or toc_config's page_offset, if set).
+    resolved = _resolve_pdf_pages(doc, entries, patterns, toc_pages, toc_config.get("page_offset"))
+    offsets: dict[int, int] = {}
+    for e in entries:
+        if e["pdf_page"] is not None and e["doc_page"] is not None:
+            offset = e["pdf_page"] - e["doc_page"]
+            offsets[offset] = offsets.get(offset, 0) + 1
+    unresolved = sum(1 for e in entries if e["pdf_page"] is None)
+    print(f"\nResolved {resolved}/{len(entries)} entries from the section index; "
+          f"offsets (doc page → PDF page): {', '.join(f'{o:+d} ×{n}' for o, n in sorted(offsets.items())) or 'none'}")
+    if unresolved:
+        print(f"{unresolved} entries have no pdf_page. You can set 'page_offset' in toc_config.json "
+              "and re-run step 0b.")
 
     out_path = os.path.join(run_dir, "toc.json")
     with open(out_path, "w") as f:
@@ -364,41 +526,107 @@ def step_0b(pdf_path: str, run_dir: str, toc_config: dict | None = None) -> list
     return entries
 
 
-def _detect_page_offset(pdf_path: str, entries: list[dict], patterns: list[re.Pattern]) -> int | None:
+def _resolve_pdf_pages(doc: TocDocument, entries: list[dict], patterns: list[re.Pattern],
+                       toc_pages: list[int], fallback_offset: int | None = None) -> int:
     """
-    Auto-detect the offset between ToC-printed page numbers and actual PDF page indices.
+    Set each entry's pdf_page. Returns how many were found in the section index.
 
-    Strategy: for each ToC entry that has a doc_page, search the PDF pages near that
-    page number for text that starts with the entry's raw_code. The first successful
-    match gives us: offset = actual_pdf_page - doc_page.
+    An entry's page is the first page, at or after the previous entry's,
+    that starts a line with its raw_code (ToC pages excluded). The others get
+    doc_page + the offset of the nearest resolved entry before them (after
+    them, for leading entries), else *fallback_offset*.
     """
-    total_pages = _pdf_page_count(pdf_path)
-    # Use entries that have a page reference, starting from deeper sections
-    # (more distinctive codes, less likely to match ToC pages themselves)
-    candidates = [e for e in entries if e.get("doc_page") and e.get("depth", 0) >= 1]
-    # Try first 5 candidates
-    for entry in candidates[:5]:
-        doc_page = entry["doc_page"]
-        search_code = entry.get("raw_code", "")
-        if not search_code:
-            continue
-        # Search in a window of ±5 pages around the expected position
-        search_range = range(
-            max(1, doc_page - 5),
-            min(total_pages + 1, doc_page + 6),
-        )
-        with pdfplumber.open(pdf_path) as pdf:
-            for pdf_page_num in search_range:
-                page = pdf.pages[pdf_page_num - 1]
-                text = page.extract_text() or ""
-                lines = [l.strip() for l in text.split("\n") if l.strip()]
-                for line in lines:
-                    for pat in patterns:
-                        m = pat.match(line)
-                        if m and m.group(0).strip() == search_code:
-                            offset = pdf_page_num - doc_page
-                            return offset
-    return None
+    index = doc.section_index(patterns, skip_pages=toc_pages)
+    known: list[int | None] = []
+    last_page = 0
+    for e in entries:
+        pages = index.get(e.get("raw_code", ""), [])
+        k = bisect.bisect_left(pages, last_page)
+        if k < len(pages):
+            e["pdf_page"] = last_page = pages[k]
+        known.append(e["pdf_page"] - e["doc_page"] if e["pdf_page"] and e["doc_page"] is not None else None)
+    resolved = sum(1 for e in entries if e["pdf_page"] is not None)
+
+    following = [None] * len(entries)
+    nxt = None
+    for i in range(len(entries) - 1, -1, -1):
+        following[i] = nxt
+        nxt = known[i] if known[i] is not None else nxt
+    previous = None
+    for i, e in enumerate(entries):
+        if known[i] is not None:
+            previous = known[i]
+        elif e["pdf_page"] is None and e["doc_page"] is not None:
+            offset = next((o for o in (previous, following[i], fallback_offset) if o is not None), None)
+            if offset is not None:
+                e["pdf_page"] = e["doc_page"] + offset
+    return resolved
+
+
+# ---------------------------------------------------------------------------
+# Fast path: build toc.json from the PDF outline (bookmarks), no LLM
+# ---------------------------------------------------------------------------
+# A PDF may embed an outline whose titles start with the section code
+# ("Part 4.1—Introduction", "4.1.1  Purpose") and whose targets are exact PDF
+# pages. When one is present, steps 0a and 0b are skipped entirely. Codes are
+# normalised as in step 0b ("Chapter 3" → CHAPTER_3, "Part 4.1" → 4_1,
+# "Division 2" → DIVISION_2); depth is the bookmark's outline level. (None of
+# the PDFs in this repo carries an outline today.)
+
+OUTLINE_CODE_RE = re.compile(
+    r"^(?:(?P<kind>Chapter|Part|Division|Subdivision|Schedule)\s+)?"
+    r"(?P<num>\d+[A-Z]?(?:\.\d+[A-Z]?)*)(?![\d.])[\s—–:.\-]*(?P<title>.*)$",
+    re.IGNORECASE,
+)
+OUTLINE_MIN_ENTRIES = 3  # fewer coded bookmarks than this → use the regex/LLM path
+
+
+def _outline_entries(pdf_path: str) -> list[dict]:
+    """toc.json entries for the coded bookmarks of *pdf_path*'s outline (empty if it has none)."""
+    entries = []
+    with fitz.open(pdf_path) as pdf:
+        for level, title, page in pdf.get_toc(simple=True):
+            m = OUTLINE_CODE_RE.match(title.strip())
+            if m is None:
+                continue  # "Contents", "Endnotes", …
+            raw_code = f"{m['kind']} {m['num']}" if m["kind"] else m["num"]
+            code = _normalise_code(raw_code)
+            label = pdf[page - 1].get_label() if 1 <= page <= pdf.page_count else ""
+            entries.append({
+                "code": code,
+                "raw_code": raw_code,
+                "title": m["title"].strip(" .—–-") or title.strip(),
+                "doc_page": int(label) if label.isdigit() else None,
+                "pdf_page": page if page >= 1 else None,
+                "depth": level - 1,
+            })
+    return entries
+
+
+def step_outline(pdf_path: str, run_dir: str) -> list[dict] | None:
+    """
+    Write toc.json straight from the PDF outline, with exact page targets.
+    Returns the entries, or None when the PDF has no usable outline.
+    """
+    entries = _outline_entries(pdf_path)
+    if len(entries) < OUTLINE_MIN_ENTRIES:
+        logger.info(f"No usable PDF outline ({len(entries)} coded bookmarks) — using ToC text + regex patterns")
+        return None
+
+    print("\n" + "=" * 60)
+    print("STEP 0a/0b — ToC from PDF outline")
+    print("=" * 60)
+    print(f"\nRead {len(entries)} ToC entries from the outline.")
+    for e in entries[:10]:
+        print(f"  [{e['code']}] {e['title']} (PDF p.{e['pdf_page']})")
+    if len(entries) > 10:
+        print(f"  ... and {len(entries) - 10} more")
+
+    out_path = os.path.join(run_dir, "toc.json")
+    with open(out_path, "w") as f:
+        json.dump(entries, f, indent=2)
+    print(f"\nSaved → {out_path}")
+    return entries
 
 
 # ---------------------------------------------------------------------------
@@ -498,31 +726,9 @@ def _salvage_entries_from_truncated_json(raw: str) -> dict | None:
     return {"entries": entries, "reasoning": "(salvaged from truncated response)"}
 
 
-def step_0c(run_dir: str, toc_entries: list[dict] | None = None, process_meta: dict[str, dict] | None = None) -> dict:
-    """
-    Classify ToC sections to business processes using LLM.
-    Shows result for human approval, then writes toc_classified.json.
-    Returns classification dict.
-    """
-    print("\n" + "=" * 60)
-    print("STEP 0c — ToC Classification (LLM)")
-    print("=" * 60)
-
-    if toc_entries is None:
-        toc_path = os.path.join(run_dir, "toc.json")
-        if not os.path.exists(toc_path):
-            logger.error("toc.json not found. Run step 0b first.")
-            sys.exit(1)
-        with open(toc_path) as f:
-            toc_entries = json.load(f)
-
-    if process_meta is None:
-        try:
-            process_meta = _load_process_forms_meta()
-        except Exception as e:
-            logger.error(f"Failed to load process forms from architect.py: {e}")
-            sys.exit(1)
-
+def _classify_with_llm(toc_entries: list[dict], process_meta: dict[str, dict],
+                       use_cache: bool, refresh: bool) -> dict:
+    """Raw {"entries", "reasoning"} classification of *toc_entries* from the LLM."""
     # Build prompt — hierarchical ToC grouped by top-level section
     toc_summary = _format_toc_hierarchically(toc_entries)
     processes_summary = "\n".join(
@@ -532,7 +738,7 @@ def step_0c(run_dir: str, toc_entries: list[dict] | None = None, process_meta: d
 
     print(f"\nSending {len(toc_entries)} ToC entries + {len(process_meta)} processes to LLM...")
 
-    client = anthropic.Anthropic()
+    client = _llm_client(use_cache, refresh)
     response = client.messages.create(
         model=MODEL,
         max_tokens=8192,
@@ -595,9 +801,248 @@ Return ONLY valid JSON. Every code from the ToC must appear exactly once in entr
             sys.exit(1)
         logger.info(f"Salvaged {len(classification_raw.get('entries', []))} entries from truncated JSON.")
 
+    return classification_raw
+
+
+# Deterministic pre-classification: only entries it cannot decide go to the LLM.
+# The learned code map holds the approved toc_classified.json decisions of one
+# document, code → {title key: process_id}. Codes only mean something within a
+# document, so each has its own file beside the response cache, named by
+# document_key(); batch workers each own one document and never share a file.
+# A document without a map is seeded from the run's own approved
+# toc_classified.json, so earlier approvals count on the first run too.
+
+TOC_CODE_MAP_DIR = os.path.join(os.path.dirname(LLM_CACHE_DIR), "toc_code_maps")
+
+_QUOTES = str.maketrans({"‘": "'", "’": "'", "“": '"', "”": '"', "–": "-", "—": "-"})
+
+
+def _title_key(title: str) -> str:
+    """Comparable form of a ToC title: no [notes], quotes straightened, lowercase, single spaces."""
+    title = re.sub(r"\[[^\]]*\]", "", title.translate(_QUOTES))
+    return re.sub(r"\s+", " ", title).strip(" .").lower()
+
+
+def document_key(pdf_path: str) -> str:
+    """<regulation>--<path under documents> for a PDF under <regulation>/documents, else the PDF stem."""
+    documents_dir = _documents_dir(pdf_path)
+    if documents_dir is None:
+        return Path(pdf_path).stem
+    relative = Path(pdf_path).relative_to(documents_dir).with_suffix("")
+    return "--".join((documents_dir.parent.name, *relative.parts))
+
+
+def _code_map_path(document: str) -> str:
+    return os.path.join(TOC_CODE_MAP_DIR, f"{document}.json")
+
+
+def load_code_map(document: str | None, run_dir: str | None = None) -> dict[str, dict[str, str | None]]:
+    """The learned code map of *document*, seeded from <run_dir>/toc_classified.json when it has none."""
+    if document is not None and os.path.exists(_code_map_path(document)):
+        with open(_code_map_path(document)) as f:
+            return json.load(f)
+    approved_path = os.path.join(run_dir, "toc_classified.json") if run_dir else None
+    if not approved_path or not os.path.exists(approved_path):
+        return {}
+    with open(approved_path) as f:
+        entries = json.load(f).get("entries", [])
+    logger.info(f"Learned code map seeded from {approved_path}")
+    code_map: dict[str, dict[str, str | None]] = {}
+    _learn(code_map, entries)
+    if document is not None:
+        _save_code_map(code_map, document)
+    return code_map
+
+
+def _learn(code_map: dict, entries: list[dict]) -> None:
+    for e in entries:
+        if e.get("code") and e.get("title"):
+            code_map.setdefault(e["code"], {})[_title_key(e["title"])] = e.get("process_id")
+
+
+def _save_code_map(code_map: dict, document: str) -> None:
+    path = _code_map_path(document)
+    os.makedirs(TOC_CODE_MAP_DIR, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(code_map, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def learn_code_map(entries: list[dict], document: str | None) -> None:
+    """Fold approved classification *entries* into *document*'s learned code map (latest approval wins)."""
+    if document is None:
+        return
+    code_map = load_code_map(document)
+    _learn(code_map, entries)
+    _save_code_map(code_map, document)
+
+
+def _learned_process(code_map: dict, entry: dict) -> tuple[bool, str | None]:
+    """(known, process_id) from the map: the same code with a title that equals or extends this one.
+
+    Wrapped ToC lines truncate titles, so either title may be a prefix of
+    the other. Matches that disagree are ambiguous and left to the LLM.
+    """
+    key = _title_key(entry["title"])
+    matches = {pid for title, pid in code_map.get(entry["code"], {}).items()
+               if key and title and (title.startswith(key) or key.startswith(title))}
+    return (True, matches.pop()) if len(matches) == 1 else (False, None)
+
+
+def _ancestor_codes(code: str) -> list[str]:
+    """
+    Parent codes of *code*, nearest first. Step 0b keeps the word of a
+    chapter ("CHAPTER_4") but strips "Part" from its Parts ("4_1"), so a
+    numbered top level is looked up with and without the chapter prefix:
+    "4_2_1" → ["4_2", "CHAPTER_4", "4"]. Codes led by a word have no parent.
+    """
+    parts = code.split("_")
+    if not parts[0].isdigit():
+        return []
+    ancestors = ["_".join(parts[:n]) for n in range(len(parts) - 1, 1, -1)]
+    return ancestors + [f"CHAPTER_{parts[0]}", parts[0]] if len(parts) > 1 else ancestors
+
+
+def _inherit(code: str, decided: dict[str, dict]) -> str | None:
+    """Process of the nearest decided ancestor of *code*, if that ancestor has one."""
+    for parent in _ancestor_codes(code):
+        if parent in decided:
+            return decided[parent]["process_id"]
+    return None
+
+
+def _preclassify(toc_entries: list[dict], overrides: dict[str, str | None],
+                 code_map: dict, process_meta: dict[str, dict]) -> dict[str, dict]:
+    """
+    code → {"process_id", "source"} for the entries decided without the LLM:
+    approved overrides, then the learned code map, then chapter inheritance
+    from the nearest decided ancestor mapped to a process.
+    """
+    unknown = sorted({pid for pid in overrides.values() if pid and pid not in process_meta})
+    if unknown:
+        logger.warning(f"classification_overrides name unknown processes (ignored): {unknown}")
+
+    decided: dict[str, dict] = {}
+    for e in toc_entries:
+        if e["code"] in overrides:
+            decided[e["code"]] = {"process_id": overrides[e["code"]], "source": "override"}
+            continue
+        known, pid = _learned_process(code_map, e)
+        if known and (pid is None or pid in process_meta):
+            decided[e["code"]] = {"process_id": pid, "source": "learned"}
+    _inherit_undecided(toc_entries, decided)
+    return decided
+
+
+def _inherit_undecided(toc_entries: list[dict], decided: dict[str, dict]) -> None:
+    """Add the entries whose nearest explicitly decided ancestor maps to a process to *decided*."""
+    explicit = dict(decided)
+    for e in toc_entries:
+        if e["code"] not in decided:
+            pid = _inherit(e["code"], explicit)
+            if pid:
+                decided[e["code"]] = {"process_id": pid, "source": "inherited"}
+
+
+def _chapter_entries(entries: list[dict], toc_entries: list[dict]) -> list[dict]:
+    """The *entries* with no ancestor in the ToC (chapters and parentless sections)."""
+    codes = {e["code"] for e in toc_entries}
+    return [e for e in entries if not any(a in codes for a in _ancestor_codes(e["code"]))]
+
+
+def _merge_classification(toc_entries: list[dict], decided: dict[str, dict], llm_entries: list[dict]) -> list[dict]:
+    """One entry per ToC code, in ToC order: pre-classified, else the LLM's answer, else inherited."""
+    llm_pid = {e.get("code"): e.get("process_id") for e in llm_entries}
+    entries = []
+    missing = 0
+    for e in toc_entries:
+        code = e["code"]
+        if code in decided:
+            pid, source = decided[code]["process_id"], decided[code]["source"]
+        elif code in llm_pid:
+            pid, source = llm_pid[code], "llm"
+        else:
+            # Dropped by a truncated response: fall back to the chapter's process
+            pid, source = _inherit(code, {x["code"]: x for x in entries}), "inherited"
+            missing += 1
+        entries.append({"code": code, "title": e["title"], "process_id": pid, "source": source})
+    if missing:
+        logger.warning(f"{missing} ToC entries missing from the LLM response — inherited from their chapter or left null")
+    return entries
+
+
+def step_0c(run_dir: str, toc_entries: list[dict] | None = None, process_meta: dict[str, dict] | None = None,
+            use_cache: bool = True, refresh: bool = False,
+            approvals: dict | None = None, headless: bool = False, document: str | None = None) -> dict:
+    """
+    Classify ToC sections to business processes using LLM.
+    Shows result for human approval, then writes toc_classified.json.
+    Returns classification dict.
+
+    Only entries _preclassify cannot decide (overrides, learned code map,
+    chapter inheritance) are sent to the LLM: their chapters first, then
+    whatever the chapters' answers leave undecided. The learned map is
+    *document*'s (see document_key), seeded from an approved
+    toc_classified.json already in *run_dir*; saved classifications extend
+    it. "classification_overrides" in *approvals* win over everything; with
+    "approve_classification" or full overrides the result is saved without
+    review. Otherwise, when *headless*, it is written to
+    toc_classified.pending.json and PendingReview is raised.
+    """
+    print("\n" + "=" * 60)
+    print("STEP 0c — ToC Classification (rules + LLM)")
+    print("=" * 60)
+
+    if toc_entries is None:
+        toc_path = os.path.join(run_dir, "toc.json")
+        if not os.path.exists(toc_path):
+            logger.error("toc.json not found. Run step 0b first.")
+            sys.exit(1)
+        with open(toc_path) as f:
+            toc_entries = json.load(f)
+
+    approvals = approvals or {}
+    if process_meta is None:
+        try:
+            process_meta = _load_process_forms_meta()
+        except Exception as e:
+            logger.error(f"Failed to load process forms from architect.py: {e}")
+            sys.exit(1)
+
+    overrides = approvals.get("classification_overrides", {})
+    fully_overridden = bool(toc_entries) and all(e["code"] in overrides for e in toc_entries)
+    decided = _preclassify(toc_entries, overrides, load_code_map(document, run_dir), process_meta)
+    sources = [d["source"] for d in decided.values()]
+    print(f"\nPre-classified {len(decided)}/{len(toc_entries)} ToC entries "
+          f"({sources.count('override')} override, {sources.count('learned')} learned, "
+          f"{sources.count('inherited')} inherited).")
+
+    undecided = [e for e in toc_entries if e["code"] not in decided]
+    reasoning = []
+    chapters = _chapter_entries(undecided, toc_entries)
+    if chapters and len(chapters) < len(undecided):
+        # Chapters first, in a small call: Parts of a mapped chapter then inherit it
+        # and only the rest (children of unmapped chapters) are sent on
+        chapter_raw = _classify_with_llm(chapters, process_meta, use_cache, refresh)
+        chapter_codes = {e["code"] for e in chapters}
+        for e in chapter_raw.get("entries", []):
+            if e.get("code") in chapter_codes:
+                decided[e["code"]] = {"process_id": e.get("process_id"), "source": "llm"}
+        _inherit_undecided(toc_entries, decided)
+        undecided = [e for e in toc_entries if e["code"] not in decided]
+        reasoning.append(chapter_raw.get("reasoning", ""))
+    if undecided:
+        classification_raw = _classify_with_llm(undecided, process_meta, use_cache, refresh)
+        reasoning.append(classification_raw.get("reasoning", ""))
+    else:
+        print("Nothing left for the LLM.")
+        classification_raw = {"entries": []}
+        reasoning = reasoning or ["(all sections pre-classified)"]
+
     # Build process_to_sections index
     process_to_sections: dict[str, list[str]] = {pid: [] for pid in process_meta}
-    entries = classification_raw.get("entries", [])
+    entries = _merge_classification(toc_entries, decided, classification_raw.get("entries", []))
 
     for entry in entries:
         pid = entry.get("process_id")
@@ -611,7 +1056,7 @@ Return ONLY valid JSON. Every code from the ToC must appear exactly once in entr
     result = {
         "entries": entries,
         "process_to_sections": process_to_sections,
-        "reasoning": classification_raw.get("reasoning", ""),
+        "reasoning": " ".join(r for r in reasoning if r),
     }
 
     # Human review
@@ -629,19 +1074,27 @@ Return ONLY valid JSON. Every code from the ToC must appear exactly once in entr
         for e in unmapped:
             print(f"  [{e['code']}] {e['title']}")
 
-    while not _confirm("Approve this classification and save toc_classified.json?"):
-        print("\nYou can edit toc_classified.json manually after this run, or:")
-        action = input("  r = re-run LLM classification, q = quit: ").strip().lower()
-        if action == "r":
-            return step_0c(run_dir, toc_entries, process_meta)
-        elif action == "q":
-            print("Aborted.")
-            sys.exit(0)
+    if fully_overridden or approvals.get("approve_classification"):
+        print("\nClassification approved in the approvals file.")
+    elif headless:
+        raise PendingReview("0c", _write_pending(run_dir, "toc_classified.pending.json", result))
+    else:
+        while not _confirm("Approve this classification and save toc_classified.json?"):
+            print("\nYou can edit toc_classified.json manually after this run, or:")
+            action = input("  r = re-run LLM classification, q = quit: ").strip().lower()
+            if action == "r":
+                # A re-run must reach the API, not replay the cached answer
+                return step_0c(run_dir, toc_entries, process_meta, use_cache, refresh=True,
+                               approvals=approvals, document=document)
+            elif action == "q":
+                print("Aborted.")
+                sys.exit(0)
 
     out_path = os.path.join(run_dir, "toc_classified.json")
     with open(out_path, "w") as f:
         json.dump(result, f, indent=2)
     print(f"\nSaved → {out_path}")
+    learn_code_map(entries, document)
 
     return result
 
@@ -650,25 +1103,131 @@ Return ONLY valid JSON. Every code from the ToC must appear exactly once in entr
 # Entry point
 # ---------------------------------------------------------------------------
 
-def run_all(pdf_path: str, run_dir: str):
+def run_all(pdf_path: str, run_dir: str, backend: str = DEFAULT_BACKEND,
+            use_cache: bool = True, refresh: bool = False, use_outline: bool = True,
+            approvals: dict | None = None, headless: bool = False):
     os.makedirs(run_dir, exist_ok=True)
-    toc_config = step_0a(pdf_path, run_dir)
-    toc_entries = step_0b(pdf_path, run_dir, toc_config)
-    step_0c(run_dir, toc_entries)
+    toc_entries = step_outline(pdf_path, run_dir) if use_outline else None
+    if toc_entries is None:
+        with TocDocument(pdf_path, backend) as doc:
+            toc_config = step_0a(pdf_path, run_dir, backend, use_cache, refresh, doc, approvals, headless)
+            toc_entries = step_0b(pdf_path, run_dir, toc_config, backend, doc)
+    step_0c(run_dir, toc_entries, use_cache=use_cache, refresh=refresh, approvals=approvals, headless=headless,
+            document=document_key(pdf_path))
     print("\n✓ Step 0 complete. toc_classified.json is ready for the architect pipeline.")
 
 
+# ---------------------------------------------------------------------------
+# Batch: every document under data/regulations, headless and concurrent
+# ---------------------------------------------------------------------------
+
+def find_documents(regulations_dir: str | Path = REGULATIONS_DIR) -> list[str]:
+    """Every PDF under <regulation>/documents, including subfolders such as primary/ and secondary/."""
+    return sorted(glob.glob(os.path.join(str(regulations_dir), "*", "documents", "**", "*.pdf"), recursive=True))
+
+
+def _documents_dir(pdf_path: str) -> Path | None:
+    """The nearest ancestor of *pdf_path* named documents, if any."""
+    return next((p for p in Path(pdf_path).parents if p.name == "documents"), None)
+
+
+def default_approvals_path(pdf_path: str) -> str | None:
+    """<regulation>/toc_approvals.json for a PDF anywhere under <regulation>/documents, else None."""
+    documents_dir = _documents_dir(pdf_path)
+    return str(documents_dir.parent / APPROVALS_FILENAME) if documents_dir else None
+
+
+def _batch_run_dir(runs_root: str, pdf_path: str) -> str:
+    """<runs_root>/<regulation>/<path under documents, without .pdf>, e.g. …/aml-ctf-rules/primary/F2024C01198."""
+    documents_dir = _documents_dir(pdf_path)
+    if documents_dir is None:
+        return os.path.join(runs_root, Path(pdf_path).stem)
+    relative = Path(pdf_path).relative_to(documents_dir).with_suffix("")
+    return os.path.join(runs_root, documents_dir.parent.name, str(relative))
+
+
+def _run_document(pdf_path: str, run_dir: str, approvals: dict, backend: str,
+                  use_cache: bool, refresh: bool, use_outline: bool) -> dict:
+    """Headless run_all for one PDF (pool worker); its console output goes to <run_dir>/toc.log."""
+    os.makedirs(run_dir, exist_ok=True)
+    result = {"pdf": pdf_path, "run_dir": run_dir, "status": "done", "detail": ""}
+    with open(os.path.join(run_dir, "toc.log"), "w") as log, contextlib.redirect_stdout(log):
+        try:
+            run_all(pdf_path, run_dir, backend, use_cache, refresh, use_outline, approvals, headless=True)
+        except PendingReview as e:
+            result.update(status="pending", detail=e.path)
+        except SystemExit:
+            result.update(status="failed", detail="see toc.log")
+        except Exception as e:
+            logger.exception(f"{pdf_path}: ToC extraction failed")
+            result.update(status="failed", detail=f"{type(e).__name__}: {e}")
+    return result
+
+
+def run_batch(pdf_paths: list[str], runs_root: str, approvals_path: str | None = None, workers: int = 4,
+              backend: str = DEFAULT_BACKEND, use_cache: bool = True, refresh: bool = False,
+              use_outline: bool = True) -> list[dict]:
+    """
+    Run step 0 headless for every PDF in *pdf_paths*, *workers* documents at
+    a time, into <runs_root>/<regulation>/<path under documents>. Approvals come from
+    *approvals_path*, or each regulation's toc_approvals.json.
+    Returns one {"pdf", "run_dir", "status", "detail"} per PDF, in order.
+    """
+    if not pdf_paths:
+        logger.error("No PDFs to process")
+        return []
+    run_dirs = [_batch_run_dir(runs_root, p) for p in pdf_paths]
+    approvals = [load_approvals(approvals_path or default_approvals_path(p), p) for p in pdf_paths]
+    logger.info(f"Extracting ToCs of {len(pdf_paths)} documents with {workers} workers")
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(
+            _run_document, pdf_paths, run_dirs, approvals,
+            repeat(backend), repeat(use_cache), repeat(refresh), repeat(use_outline),
+        ))
+
+    print(f"\n{'status':8}  document")
+    for r in results:
+        print(f"{r['status']:8}  {os.path.relpath(r['pdf'])}" + (f"  ({r['detail']})" if r["detail"] else ""))
+    return results
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Extract and classify PDF Table of Contents.")
-    parser.add_argument("pdf", help="Path to the PDF file")
-    parser.add_argument("run_dir", help="Run directory (e.g. runs/1)")
+    parser.add_argument("pdf", nargs="?", help="Path to the PDF file")
+    parser.add_argument("run_dir", nargs="?", help="Run directory (e.g. runs/1)")
     parser.add_argument(
         "--step",
         choices=["0a", "0b", "0c"],
         help="Run only a specific sub-step (default: all)",
     )
+    parser.add_argument("--backend", choices=BACKENDS, default=DEFAULT_BACKEND,
+                        help="PDF text-extraction backend (fitz is faster)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Bypass the LLM response cache (runs/.cache/llm)")
+    parser.add_argument("--refresh", action="store_true",
+                        help="Re-call the API and overwrite cached responses")
+    parser.add_argument("--no-outline", action="store_true",
+                        help="Ignore the PDF outline; derive the ToC from its text (steps 0a + 0b)")
+    parser.add_argument("--headless", action="store_true",
+                        help="Never prompt: use the approvals file, write *.pending.json for anything unapproved")
+    parser.add_argument("--approvals", default=None,
+                        help=f"Approvals JSON keyed by PDF stem (default: <regulation>/{APPROVALS_FILENAME})")
+    parser.add_argument("--all", nargs="?", const="runs/toc", metavar="RUNS_ROOT",
+                        help="Headless run over every data/regulations/*/documents/**/*.pdf, "
+                             "into RUNS_ROOT/<regulation>/<path under documents> (default: runs/toc)")
+    parser.add_argument("--workers", type=int, default=4, help="Documents processed at once with --all (default: 4)")
     args = parser.parse_args()
+    use_cache = not args.no_cache
+    use_outline = not args.no_outline
 
+    if args.all:
+        results = run_batch(find_documents(), os.path.abspath(args.all), args.approvals, args.workers, args.backend,
+                            use_cache, args.refresh, use_outline)
+        statuses = {r["status"] for r in results}
+        sys.exit(1 if not results or "failed" in statuses else 2 if "pending" in statuses else 0)
+
+    if not args.pdf or not args.run_dir:
+        parser.error("pdf and run_dir are required unless --all is given")
     pdf_path = os.path.abspath(args.pdf)
     run_dir = os.path.abspath(args.run_dir)
 
@@ -677,12 +1236,20 @@ if __name__ == "__main__":
         sys.exit(1)
 
     os.makedirs(run_dir, exist_ok=True)
+    approvals = load_approvals(args.approvals or default_approvals_path(pdf_path), pdf_path)
 
-    if args.step == "0a":
-        step_0a(pdf_path, run_dir)
-    elif args.step == "0b":
-        step_0b(pdf_path, run_dir)
-    elif args.step == "0c":
-        step_0c(run_dir)
-    else:
-        run_all(pdf_path, run_dir)
+    try:
+        if args.step == "0a":
+            step_0a(pdf_path, run_dir, args.backend, use_cache, args.refresh,
+                    approvals=approvals, headless=args.headless)
+        elif args.step == "0b":
+            step_0b(pdf_path, run_dir, backend=args.backend)
+        elif args.step == "0c":
+            step_0c(run_dir, use_cache=use_cache, refresh=args.refresh, approvals=approvals, headless=args.headless,
+                    document=document_key(pdf_path))
+        else:
+            run_all(pdf_path, run_dir, args.backend, use_cache, args.refresh, use_outline,
+                    approvals, args.headless)
+    except PendingReview as e:
+        logger.warning(str(e))
+        sys.exit(2)